@@ -3,8 +3,6 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from argcomplete.completers import FilesCompleter  # pylint: disable=import-error
-
 from azure.cli.core import AzCommandsLoader
 from azure.cli.core.decorators import Completer
 from azure.cli.core.commands.events import EVENT_INVOKER_PRE_CMD_TBL_TRUNCATE, EVENT_INVOKER_ON_TAB_COMPLETION
@@ -13,20 +11,6 @@ from azure.cli.command_modules.interactive.events import (
     EVENT_INTERACTIVE_POST_SUB_TREE_CREATE
 )
 
-from azext_alias.util import get_alias_table
-from azext_alias._validators import (
-    process_alias_create_namespace,
-    process_alias_import_namespace,
-    process_alias_export_namespace
-)
-from azext_alias import _help  # pylint: disable=unused-import
-from azext_alias.hooks import (
-    alias_event_handler,
-    enable_aliases_autocomplete,
-    transform_cur_commands_interactive,
-    enable_aliases_autocomplete_interactive
-)
-
 
 # We don't have access to load_cmd_tbl_func in custom.py (need the entire command table
 # for alias and command validation when the user invokes alias create).
@@ -48,23 +32,45 @@ class AliasExtCommandLoader(AzCommandsLoader):
         self.cli_ctx.register_event(EVENT_INTERACTIVE_POST_SUB_TREE_CREATE, enable_aliases_autocomplete_interactive)
 
     def load_command_table(self, _):
+        from azext_alias import _help  # pylint: disable=unused-variable
+        from azext_alias._validators import (
+            process_alias_create_namespace,
+            process_alias_import_namespace,
+            process_alias_export_namespace
+        )
 
         with self.command_group('alias') as g:
             g.custom_command('create', 'create_alias', validator=process_alias_create_namespace)
+            g.custom_command('expand', 'expand_aliases')
             g.custom_command('export', 'export_aliases', validator=process_alias_export_namespace)
             g.custom_command('import', 'import_aliases', validator=process_alias_import_namespace)
             g.custom_command('list', 'list_alias')
             g.custom_command('remove', 'remove_alias')
+            g.custom_command('rewrite', 'rewrite_aliases')
             g.custom_command('remove-all', 'remove_all_aliases',
                              confirmation='Are you sure you want to remove all registered aliases?')
 
+        with self.command_group('alias daemon') as g:
+            g.custom_command('start', 'start_daemon')
+            g.custom_command('stop', 'stop_daemon')
+
         return self.command_table
 
     def load_arguments(self, _):
+        from argcomplete.completers import FilesCompleter  # pylint: disable=import-error
+        from azure.cli.core.commands.parameters import get_enum_type
+
         with self.argument_context('alias create') as c:
             c.argument('alias_name', options_list=['--name', '-n'], help='The name of the alias.')
             c.argument('alias_command', options_list=['--command', '-c'], help='The command that the alias points to.')
 
+        with self.argument_context('alias expand') as c:
+            c.argument('source', options_list=['--source', '-s'],
+                       help='The file of command lines to expand. Default: stdin.', completer=FilesCompleter())
+            c.argument('destination', options_list=['--destination', '-d'],
+                       help='The file to write the expanded command lines to. Default: stdout.',
+                       completer=FilesCompleter())
+
         with self.argument_context('alias export') as c:
             c.argument('export_path', options_list=['--path', '-p'],
                        help='The path of the alias configuration file to export to', completer=FilesCompleter())
@@ -75,17 +81,58 @@ class AliasExtCommandLoader(AzCommandsLoader):
             c.argument('alias_source', options_list=['--source', '-s'],
                        help='The source of the aliases to import from.', completer=FilesCompleter())
 
+        with self.argument_context('alias rewrite') as c:
+            c.argument('script_path', options_list=['--script'],
+                       help='The bash or PowerShell script to rewrite.', completer=FilesCompleter())
+            c.argument('destination', options_list=['--destination', '-d'],
+                       help='The file to write the rewritten script to. Default: stdout.', completer=FilesCompleter())
+            c.argument('shell', arg_type=get_enum_type(['bash', 'powershell']),
+                       help='The shell of the script. Default: powershell for .ps1 and .psm1 scripts, bash otherwise.')
+
         with self.argument_context('alias remove') as c:
             c.argument('alias_names', options_list=['--name', '-n'], help='Space-separated aliases',
-                       completer=get_alias_completer, nargs='*')
+                       completer=get_user_alias_completer, nargs='*')
 
 
 @Completer
 def get_alias_completer(cmd, prefix, namespace, **kwargs):  # pylint: disable=unused-argument
     """
-    An argument completer for alias name.
+    An argument completer for the name of an alias in effect in the current directory.
+    """
+    from azext_alias.util import get_merged_alias_table
+    return get_merged_alias_table().sections()
+
+
+@Completer
+def get_user_alias_completer(cmd, prefix, namespace, **kwargs):  # pylint: disable=unused-argument
+    """
+    An argument completer for the name of an alias in the user's alias config file, the only one that can be modified.
     """
+    from azext_alias.util import get_alias_table
     return get_alias_table().sections()
 
 
+# The event handlers below only import their implementation in hooks.py when the event is raised,
+# so that loading the extension does not import anything that the current command does not need.
+
+def alias_event_handler(cli_ctx, **kwargs):
+    from azext_alias.hooks import alias_event_handler as handler
+    handler(cli_ctx, **kwargs)
+
+
+def enable_aliases_autocomplete(cli_ctx, **kwargs):
+    from azext_alias.hooks import enable_aliases_autocomplete as handler
+    handler(cli_ctx, **kwargs)
+
+
+def transform_cur_commands_interactive(cli_ctx, **kwargs):
+    from azext_alias.hooks import transform_cur_commands_interactive as handler
+    handler(cli_ctx, **kwargs)
+
+
+def enable_aliases_autocomplete_interactive(cli_ctx, **kwargs):
+    from azext_alias.hooks import enable_aliases_autocomplete_interactive as handler
+    handler(cli_ctx, **kwargs)
+
+
 COMMAND_LOADER_CLS = AliasExtCommandLoader
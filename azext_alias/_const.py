@@ -9,16 +9,59 @@ from azure.cli.core._environment import get_config_dir
 
 GLOBAL_CONFIG_DIR = get_config_dir()
 ALIAS_FILE_NAME = 'alias'
-ALIAS_HASH_FILE_NAME = 'alias.sha1'
-COLLIDED_ALIAS_FILE_NAME = 'collided_alias'
-ALIAS_TAB_COMP_TABLE_FILE_NAME = 'alias_tab_completion'
-GLOBAL_ALIAS_TAB_COMP_TABLE_PATH = os.path.join(GLOBAL_CONFIG_DIR, ALIAS_TAB_COMP_TABLE_FILE_NAME)
+# The advisory lock file held by the processes that write an alias config file, next to the alias config file
+ALIAS_LOCK_FILE_SUFFIX = '.lock'
+LOCAL_ALIAS_FILE_NAME = '.azalias'
+# Repo-local alias config files are only loaded if this environment variable is set to true
+LOCAL_ALIAS_ENABLED_ENV_VAR = 'AZURE_ALIAS_LOCAL_FILES'
+SYSTEM_ALIAS_PATH_ENV_VAR = 'AZURE_ALIAS_SYSTEM_FILE'
+ALIAS_STATE_FILE_NAME = 'alias_state'
+ALIAS_STATE_VERSION = 6
+GLOBAL_ALIAS_STATE_PATH = os.path.join(GLOBAL_CONFIG_DIR, ALIAS_STATE_FILE_NAME)
+# The files that older versions of the extension kept the alias state in, next to the alias state file
+LEGACY_ALIAS_STATE_FILE_NAMES = ['alias.sha1', 'collided_alias', 'alias_tab_completion']
+# The number of alias state files kept for the repo-local alias config files in use, each having its own
+MAX_LOCAL_ALIAS_STATES = 32
+# The file that records which alias config the holder of the alias state lock is rebuilding the alias state for
+ALIAS_STATE_LOCK_TARGET_SUFFIX = '.target'
+RESERVED_COMMANDS_FILE_NAME = 'alias_reserved_commands'
+RESERVED_COMMANDS_VERSION = 1
+GLOBAL_RESERVED_COMMANDS_PATH = os.path.join(GLOBAL_CONFIG_DIR, RESERVED_COMMANDS_FILE_NAME)
+ALIAS_TEMPLATE_CACHE_DIR_NAME = 'alias_template_cache'
+GLOBAL_ALIAS_TEMPLATE_CACHE_DIR = os.path.join(GLOBAL_CONFIG_DIR, ALIAS_TEMPLATE_CACHE_DIR_NAME)
 COLLISION_CHECK_LEVEL_DEPTH = 5
+ALIAS_TRACE_FILE_ENV_VAR = 'AZURE_ALIAS_TRACE_FILE'
+ALIAS_DAEMON_SOCKET_NAME = 'alias_daemon.sock'
+GLOBAL_ALIAS_DAEMON_SOCKET_PATH = os.path.join(GLOBAL_CONFIG_DIR, ALIAS_DAEMON_SOCKET_NAME)
+# The number of seconds that az waits for the alias daemon before transforming in-process
+ALIAS_DAEMON_TIMEOUT = 0.5
+# The number of seconds that az waits for another process rebuilding the alias state for the same alias config
+ALIAS_STATE_REBUILD_TIMEOUT = 2
+ALIAS_STATE_REBUILD_POLL_INTERVAL = 0.05
+# The number of aliases that a worker process validates at a time when importing aliases
+ALIAS_VALIDATION_BATCH_SIZE = 250
+# The number of aliases from which they are validated by a pool of worker processes. Starting the pool takes
+# ~0.1-0.2s with fork and ~0.5-0.9s with spawn (Windows and macOS, where every worker imports the extension again),
+# while validating an alias in-process takes ~0.1ms (see validate_aliases in scripts/benchmark/benchmark.py)
+ALIAS_VALIDATION_POOL_THRESHOLD = 10000
 
 INSUFFICIENT_POS_ARG_ERROR = 'alias: "{}" takes exactly {} positional argument{} ({} given)'
 CONFIG_PARSING_ERROR = 'alias: Please ensure you have a valid alias configuration file. Error detail: %s'
 DEBUG_MSG = 'Alias Manager: Transforming "%s" to "%s"'
 DEBUG_MSG_WITH_TIMING = 'Alias Manager: Transformed args to %s in %.3fms'
+DEBUG_MSG_PHASE_TIMING = 'Alias Manager: %s took %.3fms'
+DEBUG_MSG_DAEMON_UNAVAILABLE = ('Alias Manager: The alias daemon is unavailable, transforming in-process. '
+                                'Error detail: %s')
+DEBUG_MSG_VALIDATION_POOL_ERROR = ('Alias Manager: Failed to start the alias validation processes, validating '
+                                   'in-process. Error detail: %s')
+DEBUG_MSG_ALIAS_STATE_REBUILD_DEFERRED = ('Alias Manager: Another process is rebuilding the alias state, using the '
+                                          'last collision table')
+DEBUG_MSG_NO_COMMAND_TABLE = ('Alias Manager: The command table is not available, leaving the alias state to be '
+                              'rebuilt by the next az command')
+DEBUG_MSG_TRACE_WRITE_ERROR = 'Alias Manager: Failed to write the timing trace to %s. Error detail: %s'
+LOCAL_ALIAS_INSECURE_WARNING = ('alias: Ignored %s, which is not owned by the current user or can be modified by '
+                                'other users')
+AMBIGUOUS_ALIAS_WARNING = 'alias: "%s" is the first word of more than one alias, "%s" will be used. Aliases: %s'
 POS_ARG_DEBUG_MSG = 'Alias Manager: Transforming "%s" to "%s", with the following positional arguments: %s'
 DUPLICATED_PLACEHOLDER_ERROR = 'alias: Duplicated placeholders found when transforming "{}"'
 RENDER_TEMPLATE_ERROR = 'alias: Encounted error when injecting positional arguments to "{}". Error detail: {}'
@@ -32,6 +75,18 @@ INCONSISTENT_ARG_ERROR = 'alias: Positional argument{} {} {} not in both alias n
 COMMAND_LVL_ERROR = 'alias: "{}" is a reserved command and cannot be used to represent "{}"'
 ALIAS_FILE_NOT_FOUND_ERROR = 'alias: File not found'
 ALIAS_FILE_DIR_ERROR = 'alias: {} is a directory'
+INVALID_ALIASES_ERROR = 'alias: Found {} invalid alias{} in {}:\n{}'
+INVALID_ALIAS_DETAIL = '  [{}] {}'
 ALIAS_FILE_URL_ERROR = 'alias: Encounted error when retrieving alias file from {}. Error detail: {}'
 POST_EXPORT_ALIAS_MSG = 'alias: Exported alias configuration file to %s.'
+IMPORT_NO_CHANGE_MSG = 'alias: All the aliases in %s are already registered.'
+DAEMON_UNSUPPORTED_ERROR = ('alias: The alias daemon requires Unix domain sockets, which are not supported '
+                            'on this platform')
+DAEMON_ALREADY_RUNNING_ERROR = 'alias: The alias daemon is already running on {}'
+DAEMON_NOT_RUNNING_ERROR = 'alias: The alias daemon is not running on {}'
+DAEMON_STARTED_MSG = 'alias: The alias daemon is listening on %s. Run "az alias daemon stop" to stop it.'
 FILE_ALREADY_EXISTS_ERROR = 'alias: {} already exists.'
+REWRITE_SKIPPED_WARNING = 'alias: Skipped the az invocation on line %s. Error detail: %s'
+REWRITE_DYNAMIC_ARG_ERROR = ('alias: A positional argument is evaluated from a value that is only known '
+                             'when the script runs')
+EXPAND_LINE_ERROR = 'alias: Encounted error when expanding line {}. Error detail: {}'
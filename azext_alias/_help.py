@@ -41,9 +41,46 @@ helps['alias create'] = """
 """
 
 
+helps['alias expand'] = """
+    type: command
+    short-summary: Expand the aliases in a list of az command lines, one command line per line.
+    long-summary: The command lines are read from a file or stdin and expanded one at a time, so that command lines generated ahead of time can be run without the alias extension. Environment variables (e.g. $VAR) are kept for the shell that runs the expanded command lines to expand.
+    examples:
+        - name: Expand the aliases in a file of command lines.
+          text: |
+            az alias expand --source commands.txt --destination expanded.txt
+        - name: Expand the aliases in command lines piped from another program.
+          text: |
+            generate-commands | az alias expand > expanded.txt
+"""
+
+
+helps['alias daemon'] = """
+    type: group
+    short-summary: Manage the alias daemon, which keeps the aliases loaded in memory and transforms them for every az process of the current user.
+"""
+
+
+helps['alias daemon start'] = """
+    type: command
+    short-summary: Run the alias daemon in the foreground until it is stopped.
+    long-summary: While the daemon is running, az processes send their arguments to it over a Unix domain socket instead of loading the aliases themselves. They fall back to transforming the aliases themselves if the daemon does not respond. Not supported on Windows.
+    examples:
+        - name: Start the alias daemon in the background.
+          text: |
+            az alias daemon start &
+"""
+
+
+helps['alias daemon stop'] = """
+    type: command
+    short-summary: Stop the alias daemon.
+"""
+
+
 helps['alias export'] = """
     type: command
-    short-summary: Export all registered aliases to a given path, as an INI configuration file. If no export path is specified, the alias configuration file is exported to the current working directory.
+    short-summary: Export all the aliases in effect in the current directory to a given path, as an INI configuration file. If no export path is specified, the alias configuration file is exported to the current working directory.
 """
 
 
@@ -55,7 +92,8 @@ helps['alias import'] = """
 
 helps['alias list'] = """
     type: command
-    short-summary: List the registered aliases.
+    short-summary: List the aliases in effect in the current directory.
+    long-summary: The aliases are merged from the system-wide, user and repository-local alias configuration files.
 """
 
 
@@ -65,6 +103,20 @@ helps['alias remove'] = """
 """
 
 
+helps['alias rewrite'] = """
+    type: command
+    short-summary: Rewrite the az invocations in a bash or PowerShell script into fully expanded commands, so that the script can run without the alias extension.
+    long-summary: Arguments that are only known when the script runs (variables, command substitutions, etc.) are kept as they are. Invocations that pass such an argument to an alias that evaluates it are left unchanged, with a warning.
+    examples:
+        - name: Rewrite a bash script.
+          text: |
+            az alias rewrite --script deploy.sh --destination deploy.expanded.sh
+        - name: Rewrite a PowerShell script.
+          text: |
+            az alias rewrite --script deploy.ps1 --destination deploy.expanded.ps1
+"""
+
+
 helps['alias remove-all'] = """
     type: command
     short-summary: Remove all registered aliases.
@@ -6,13 +6,17 @@
 import os
 import re
 import shlex
+from collections import namedtuple
 
 from knack.util import CLIError
+from knack.log import get_logger
 
 import azext_alias
+
 from azext_alias.argument import get_placeholders
 from azext_alias.util import (
     get_config_parser,
+    get_reserved_command_index,
     is_url,
     reduce_alias_table,
     filter_alias_create_namespace,
@@ -20,12 +24,17 @@ from azext_alias.util import (
 )
 from azext_alias._const import (
     COLLISION_CHECK_LEVEL_DEPTH,
+    ALIAS_VALIDATION_BATCH_SIZE,
+    ALIAS_VALIDATION_POOL_THRESHOLD,
+    DEBUG_MSG_VALIDATION_POOL_ERROR,
     INVALID_ALIAS_COMMAND_ERROR,
     EMPTY_ALIAS_ERROR,
     INVALID_STARTING_CHAR_ERROR,
     INCONSISTENT_ARG_ERROR,
     COMMAND_LVL_ERROR,
     CONFIG_PARSING_ERROR,
+    INVALID_ALIASES_ERROR,
+    INVALID_ALIAS_DETAIL,
     ALIAS_FILE_NOT_FOUND_ERROR,
     ALIAS_FILE_DIR_ERROR,
     FILE_ALREADY_EXISTS_ERROR,
@@ -33,6 +42,11 @@ from azext_alias._const import (
 )
 from azext_alias.alias import AliasManager
 
+logger = get_logger(__name__)
+
+# An alias that failed validation, along with the error message
+InvalidAlias = namedtuple('InvalidAlias', ['alias', 'command', 'error'])
+
 
 def process_alias_create_namespace(namespace):
     """
@@ -42,10 +56,7 @@ def process_alias_create_namespace(namespace):
         namespace: argparse namespace object.
     """
     namespace = filter_alias_create_namespace(namespace)
-    _validate_alias_name(namespace.alias_name)
-    _validate_alias_command(namespace.alias_command)
-    _validate_alias_command_level(namespace.alias_name, namespace.alias_command)
-    _validate_pos_args_syntax(namespace.alias_name, namespace.alias_command)
+    _validate_alias(namespace.alias_name, namespace.alias_command)
 
 
 def process_alias_import_namespace(namespace):
@@ -84,6 +95,97 @@ def process_alias_export_namespace(namespace):
         namespace.export_path = os.path.join(namespace.export_path, ALIAS_FILE_NAME)
 
 
+def validate_aliases(aliases, batch_size=ALIAS_VALIDATION_BATCH_SIZE, pool_threshold=ALIAS_VALIDATION_POOL_THRESHOLD):
+    """
+    Validate aliases in bulk. If there are at least pool_threshold aliases and more than one CPU, the batches
+    of aliases are validated in parallel by a pool of worker processes, each of which builds the reserved
+    command index once. Otherwise, starting the pool costs more than it saves and the aliases are validated
+    in-process.
+
+    Args:
+        aliases: A list of tuples with [0] being the alias name and [1] the command it points to.
+        batch_size: The number of aliases that a worker process validates at a time.
+        pool_threshold: The number of aliases from which they are validated by a pool of worker processes.
+
+    Returns:
+        The list of InvalidAlias for every invalid alias, in the order of aliases.
+    """
+    aliases = list(aliases)
+    batches = [aliases[i:i + batch_size] for i in range(0, len(aliases), batch_size)]
+    pool = _start_validation_pool(len(batches)) if len(batches) > 1 and len(aliases) >= pool_threshold else None
+    if pool is not None:
+        try:
+            return [invalid_alias for batch_result in pool.map(_validate_alias_batch, batches)
+                    for invalid_alias in batch_result]
+        finally:
+            pool.terminate()
+
+    return _validate_alias_batch(aliases)
+
+
+def _start_validation_pool(number_of_batches):
+    """
+    Start a pool of worker processes for validate_aliases, with one process per CPU (and at most one per batch).
+
+    Returns:
+        The pool, or None if there is only one CPU or the worker processes cannot be started.
+    """
+    import multiprocessing
+
+    try:
+        processes = min(multiprocessing.cpu_count(), number_of_batches)
+        if processes < 2:
+            return None
+        return multiprocessing.Pool(processes, _init_validation_worker, (azext_alias.cached_reserved_commands,))
+    except (ImportError, NotImplementedError, OSError) as exception:
+        logger.debug(DEBUG_MSG_VALIDATION_POOL_ERROR, exception)
+        return None
+
+
+def _init_validation_worker(reserved_commands):
+    """
+    Set up a worker process of validate_aliases with the reserved commands of the parent process.
+    """
+    azext_alias.cached_reserved_commands = reserved_commands
+    get_reserved_command_index()
+
+
+def _validate_alias_batch(aliases):
+    """
+    Validate a batch of aliases.
+
+    Args:
+        aliases: A list of tuples with [0] being the alias name and [1] the command it points to.
+
+    Returns:
+        The list of InvalidAlias for every invalid alias in the batch.
+    """
+    invalid_aliases = []
+    for alias_name, alias_command in aliases:
+        try:
+            _validate_alias(alias_name, alias_command)
+        except CLIError as exception:
+            invalid_aliases.append(InvalidAlias(alias_name, alias_command, str(exception)))
+        except Exception as exception:  # pylint: disable=broad-except
+            invalid_aliases.append(InvalidAlias(alias_name, alias_command,
+                                                AliasManager.process_exception_message(exception)))
+    return invalid_aliases
+
+
+def _validate_alias(alias_name, alias_command):
+    """
+    Check if an alias is valid.
+
+    Args:
+        alias_name: The name of the alias to validate.
+        alias_command: The command that the alias points to.
+    """
+    _validate_alias_name(alias_name)
+    _validate_alias_command(alias_command)
+    _validate_alias_command_level(alias_name, alias_command)
+    _validate_pos_args_syntax(alias_name, alias_command)
+
+
 def _validate_alias_name(alias_name):
     """
     Check if the alias name is valid.
@@ -117,9 +219,8 @@ def _validate_alias_command(alias_command):
 
     # Extract possible CLI commands and validate
     command_to_validate = ' '.join(split_command[:boundary_index]).lower()
-    for command in azext_alias.cached_reserved_commands:
-        if re.match(r'([a-z\-]*\s)*{}($|\s)'.format(command_to_validate), command):
-            return
+    if get_reserved_command_index().has_command_words(command_to_validate.split()):
+        return
 
     _validate_positional_arguments(shlex.split(alias_command))
 
@@ -156,21 +257,33 @@ def _validate_alias_command_level(alias, command):
         alias: The name of the alias.
         command: The command that the alias points to.
     """
-    alias_collision_table = AliasManager.build_collision_table([alias])
+    alias_collision_levels = _get_collision_levels(alias)
 
     # Alias is not a reserved command, so it can point to any command
-    if not alias_collision_table:
+    if not alias_collision_levels:
         return
 
-    command_collision_table = AliasManager.build_collision_table([command])
-    alias_collision_levels = alias_collision_table.get(alias.split()[0], [])
-    command_collision_levels = command_collision_table.get(command.split()[0], [])
-
     # Check if there is a command level conflict
-    if set(alias_collision_levels) & set(command_collision_levels):
+    if alias_collision_levels & _get_collision_levels(command):
         raise CLIError(COMMAND_LVL_ERROR.format(alias, command))
 
 
+def _get_collision_levels(alias):
+    """
+    Get the levels of the command tree at which the first word of an alias (or command) is a reserved command.
+
+    Args:
+        alias: The alias or command.
+
+    Returns:
+        The set of the levels, starting at 1.
+    """
+    reserved_command_index = get_reserved_command_index()
+    word = alias.split()[0].lower()
+    return set(level for level in range(1, COLLISION_CHECK_LEVEL_DEPTH + 1)
+               if reserved_command_index.is_reserved_word(word, level))
+
+
 def _validate_alias_file_path(alias_file_path):
     """
     Make sure the alias file path is neither non-existant nor a directory
@@ -188,6 +301,7 @@ def _validate_alias_file_path(alias_file_path):
 def _validate_alias_file_content(alias_file_path, url=''):
     """
     Make sure the alias name and alias command in the alias file is in valid format.
+    Every invalid alias is reported at once.
 
     Args:
         The alias file path to import aliases from.
@@ -195,16 +309,19 @@ def _validate_alias_file_content(alias_file_path, url=''):
     alias_table = get_config_parser()
     try:
         alias_table.read(alias_file_path)
-        for alias_name, alias_command in reduce_alias_table(alias_table):
-            _validate_alias_name(alias_name)
-            _validate_alias_command(alias_command)
-            _validate_alias_command_level(alias_name, alias_command)
-            _validate_pos_args_syntax(alias_name, alias_command)
+        aliases = list(reduce_alias_table(alias_table))
     except Exception as exception:  # pylint: disable=broad-except
         error_msg = CONFIG_PARSING_ERROR % AliasManager.process_exception_message(exception)
         error_msg = error_msg.replace(alias_file_path, url or alias_file_path)
         raise CLIError(error_msg)
 
+    invalid_aliases = validate_aliases(aliases)
+    if invalid_aliases:
+        details = '\n'.join(INVALID_ALIAS_DETAIL.format(invalid_alias.alias, invalid_alias.error)
+                            for invalid_alias in invalid_aliases)
+        raise CLIError(INVALID_ALIASES_ERROR.format(len(invalid_aliases), '' if len(invalid_aliases) == 1 else 'es',
+                                                    url or alias_file_path, details))
+
 
 def _validate_positional_arguments(args):
     """
@@ -228,10 +345,11 @@ def _validate_positional_arguments(args):
         else:
             break
 
+    reserved_command_index = get_reserved_command_index()
     while nouns:
         search = ' '.join(nouns)
         # Since the command name may be immediately followed by a positional arg, strip those off
-        if not next((x for x in azext_alias.cached_reserved_commands if x.endswith(search)), False):
+        if not reserved_command_index.has_command_ending_with(search):
             del nouns[-1]
         else:
             return
@@ -4,38 +4,46 @@
 # --------------------------------------------------------------------------------------------
 
 import os
-import re
-import json
+import stat
 import shlex
-import hashlib
 from collections import defaultdict
 
 from knack.log import get_logger
 
-import azext_alias
-from azext_alias import telemetry
+from azext_alias import telemetry, timing
 from azext_alias._const import (
     GLOBAL_CONFIG_DIR,
     ALIAS_FILE_NAME,
-    ALIAS_HASH_FILE_NAME,
-    COLLIDED_ALIAS_FILE_NAME,
+    LOCAL_ALIAS_FILE_NAME,
+    LOCAL_ALIAS_ENABLED_ENV_VAR,
+    SYSTEM_ALIAS_PATH_ENV_VAR,
     CONFIG_PARSING_ERROR,
     DEBUG_MSG,
     COLLISION_CHECK_LEVEL_DEPTH,
-    POS_ARG_DEBUG_MSG
+    POS_ARG_DEBUG_MSG,
+    AMBIGUOUS_ALIAS_WARNING,
+    LOCAL_ALIAS_INSECURE_WARNING,
+    DEBUG_MSG_NO_COMMAND_TABLE
 )
-from azext_alias.argument import build_pos_args_table, render_template
 from azext_alias.util import (
     is_alias_command,
     cache_reserved_commands,
     get_config_parser,
-    build_tab_completion_table
+    read_config_string,
+    get_file_stat,
+    get_cli_fingerprint,
+    get_reserved_command_index,
+    reduce_alias_table,
+    build_tab_completion_table,
+    AliasStateStore
 )
 
 
 GLOBAL_ALIAS_PATH = os.path.join(GLOBAL_CONFIG_DIR, ALIAS_FILE_NAME)
-GLOBAL_ALIAS_HASH_PATH = os.path.join(GLOBAL_CONFIG_DIR, ALIAS_HASH_FILE_NAME)
-GLOBAL_COLLIDED_ALIAS_PATH = os.path.join(GLOBAL_CONFIG_DIR, COLLIDED_ALIAS_FILE_NAME)
+# The read-only alias config file shared by every user of the machine
+SYSTEM_ALIAS_PATH = os.environ.get(SYSTEM_ALIAS_PATH_ENV_VAR) or \
+    (os.path.join(os.environ.get('PROGRAMDATA', 'C:\\ProgramData'), 'azure', ALIAS_FILE_NAME) if os.name == 'nt'
+     else os.path.join(os.sep, 'etc', 'azure', ALIAS_FILE_NAME))
 
 logger = get_logger(__name__)
 
@@ -45,49 +53,108 @@ class AliasManager(object):
     def __init__(self, **kwargs):
         self.alias_table = get_config_parser()
         self.kwargs = kwargs
-        self.collided_alias = defaultdict(list)
         self.alias_config_str = ''
         self.alias_config_hash = ''
-        self.load_alias_table()
+        # None until the collision table has been loaded or rebuilt (see prepare_collision_table)
+        self.collided_alias = None
+        self.compiled_alias_table = None
+        alias_stat = get_alias_layers_stat(self.kwargs.get('cwd'))
+        with timing.span('read_alias_state'):
+            self.alias_state = AliasStateStore(get_local_alias_path(alias_stat))
+        with timing.span('load_alias_snapshot'):
+            alias_snapshot_loaded = self.load_alias_snapshot(alias_stat)
+        if not alias_snapshot_loaded and not self.load_invalid_alias_config(alias_stat):
+            with timing.span('parse_alias_config'):
+                self.load_alias_table()
+            with timing.span('compile_alias_table'):
+                self.build_alias_index()
         self.load_alias_hash()
 
     def load_alias_table(self):
         """
-        Load (create, if not exist) the alias config file.
+        Load and merge the layers of alias config files (creating the user's alias config file if it does not exist).
         """
         try:
-            # w+ creates the alias config file if it does not exist
-            open_mode = 'r+' if os.path.exists(GLOBAL_ALIAS_PATH) else 'w+'
-            with open(GLOBAL_ALIAS_PATH, open_mode) as alias_config_file:
-                self.alias_config_str = alias_config_file.read()
-            self.alias_table.read(GLOBAL_ALIAS_PATH)
+            # Create the alias config file if it does not exist, without truncating one written concurrently
+            if not os.path.exists(GLOBAL_ALIAS_PATH):
+                open(GLOBAL_ALIAS_PATH, 'a').close()
+            alias_layers, self.alias_state.alias_stat = read_alias_layers(self.kwargs.get('cwd'))
+            self.alias_config_str = ''.join(layer_config_str for _, layer_config_str in alias_layers)
+            # The alias config files may have been touched without changing the alias config that failed to parse
+            if self.alias_state.load_invalid_alias_config(alias_config_hash=self.get_alias_config_sha1()):
+                if self.alias_state.alias_config_error:
+                    logger.warning(CONFIG_PARSING_ERROR, self.alias_state.alias_config_error)
+                return
+
+            self.alias_table = merge_alias_layers(alias_layers)
             telemetry.set_number_of_aliases_registered(len(self.alias_table.sections()))
         except Exception as exception:  # pylint: disable=broad-except
-            logger.warning(CONFIG_PARSING_ERROR, AliasManager.process_exception_message(exception))
+            self.alias_state.alias_config_error = AliasManager.process_exception_message(exception)
+            logger.warning(CONFIG_PARSING_ERROR, self.alias_state.alias_config_error)
             self.alias_table = get_config_parser()
             telemetry.set_exception(exception)
 
+    def load_invalid_alias_config(self, alias_stat):
+        """
+        Skip loading the alias config files if none of them has been modified since they failed to parse,
+        and only repeat the parsing error.
+
+        Args:
+            alias_stat: The stat fingerprints of the alias config files in effect.
+
+        Returns:
+            True if the alias config is known to fail to parse.
+        """
+        if not self.alias_state.load_invalid_alias_config(alias_stat):
+            return False
+
+        if self.alias_state.alias_config_error:
+            logger.warning(CONFIG_PARSING_ERROR, self.alias_state.alias_config_error)
+        return True
+
+    def load_alias_snapshot(self, alias_stat):
+        """
+        Load the compiled alias table from the alias state, without parsing the alias config file.
+
+        The compiled alias table is only used if the same alias config files are in effect and none
+        of them has been modified since it was compiled (same modification time, size and inode).
+
+        Args:
+            alias_stat: The stat fingerprints of the alias config files in effect.
+
+        Returns:
+            True if the compiled alias table has been loaded.
+        """
+        if GLOBAL_ALIAS_PATH not in dict(alias_stat):
+            return False
+
+        self.compiled_alias_table = self.alias_state.load_snapshot(alias_stat)
+        if self.compiled_alias_table is None:
+            return False
+
+        telemetry.set_number_of_aliases_registered(self.alias_state['number_of_aliases'])
+        return True
+
+    def build_alias_index(self):
+        """
+        Build the lookup tables used by transform from self.alias_table, reusing the parsed placeholders
+        of the aliases that have not changed since the alias table was last compiled.
+        """
+        self.compiled_alias_table = AliasManager.compile_alias_table(self.alias_table,
+                                                                     self.alias_state['compiled_alias_table'])
+
     def load_alias_hash(self):
         """
-        Load (create, if not exist) the alias hash file.
+        Load the alias config hash from the alias state. An empty hash means that the full command table
+        has to be loaded to rebuild the alias state.
         """
-        # w+ creates the alias hash file if it does not exist
-        open_mode = 'r+' if os.path.exists(GLOBAL_ALIAS_HASH_PATH) else 'w+'
-        with open(GLOBAL_ALIAS_HASH_PATH, open_mode) as alias_config_hash_file:
-            self.alias_config_hash = alias_config_hash_file.read()
+        self.alias_config_hash = self.alias_state['alias_config_hash']
 
     def load_collided_alias(self):
         """
-        Load (create, if not exist) the collided alias file.
+        Load the collided aliases from the alias state.
         """
-        # w+ creates the alias config file if it does not exist
-        open_mode = 'r+' if os.path.exists(GLOBAL_COLLIDED_ALIAS_PATH) else 'w+'
-        with open(GLOBAL_COLLIDED_ALIAS_PATH, open_mode) as collided_alias_file:
-            collided_alias_str = collided_alias_file.read()
-            try:
-                self.collided_alias = json.loads(collided_alias_str if collided_alias_str else '{}')
-            except Exception:  # pylint: disable=broad-except
-                self.collided_alias = {}
+        self.collided_alias = self.alias_state['collided_alias']
 
     def detect_alias_config_change(self):
         """
@@ -101,36 +168,48 @@ class AliasManager(object):
         if self.parse_error():
             return False
 
-        alias_config_sha1 = hashlib.sha1(self.alias_config_str.encode('utf-8')).hexdigest()
+        # The compiled alias table is written along with the hash of the alias config it was compiled from
+        if self.alias_state.snapshot_loaded:
+            return False
+
+        alias_config_sha1 = self.get_alias_config_sha1()
         if alias_config_sha1 != self.alias_config_hash:
             # Overwrite the old hash with the new one
             self.alias_config_hash = alias_config_sha1
             return True
         return False
 
-    def transform(self, args):
+    def get_alias_config_sha1(self):
+        """
+        Get the hash of the content of the alias config files.
+        """
+        import hashlib
+
+        return hashlib.sha1(self.alias_config_str.encode('utf-8')).hexdigest()
+
+    def transform(self, args, expand_env_vars=True):
         """
         Transform any aliases in args to their respective commands.
 
         Args:
             args: A list of space-delimited command input extracted directly from the console.
+            expand_env_vars: False if environment variables should be left for the shell to expand.
 
         Returns:
             A list of transformed commands according to the alias configuration file.
         """
         if self.parse_error():
-            # Write an empty hash so next run will check the config file against the entire command table again
-            AliasManager.write_alias_config_hash(empty_hash=True)
+            # Remember the alias config so it is not parsed again until it changes
+            with timing.span('write_alias_state'):
+                self.alias_state.write_invalid_alias_config(self.get_alias_config_sha1())
+            self.alias_config_hash = ''
             return args
 
-        # Only load the entire command table if it detects changes in the alias config
-        if self.detect_alias_config_change():
-            self.load_full_command_table()
-            self.collided_alias = AliasManager.build_collision_table(self.alias_table.sections())
-            build_tab_completion_table(self.alias_table)
-        else:
-            self.load_collided_alias()
+        # The collision table only needs to be loaded (or rebuilt) once, however many args are transformed
+        if self.collided_alias is None:
+            self.prepare_collision_table()
 
+        alias_commands = self.compiled_alias_table['commands']
         transformed_commands = []
         alias_iter = enumerate(args, 1)
         for alias_index, alias in alias_iter:
@@ -146,26 +225,68 @@ class AliasManager(object):
 
             full_alias = self.get_full_alias(alias)
 
-            if self.alias_table.has_option(full_alias, 'command'):
-                cmd_derived_from_alias = self.alias_table.get(full_alias, 'command')
+            if full_alias in alias_commands:
+                cmd_derived_from_alias = alias_commands[full_alias]
                 telemetry.set_alias_hit(full_alias)
             else:
                 transformed_commands.append(alias)
                 continue
 
-            pos_args_table = build_pos_args_table(full_alias, args, alias_index)
+            # Aliases known to have no placeholders never need the template engine
+            placeholders = self.compiled_alias_table['placeholders'].get(full_alias)
+            pos_args_table = None
+            if placeholders is None or placeholders:
+                from azext_alias.argument import build_pos_args_table
+                pos_args_table = build_pos_args_table(full_alias, args, alias_index, placeholders=placeholders)
+
             if pos_args_table:
+                from azext_alias.argument import render_template
+
                 logger.debug(POS_ARG_DEBUG_MSG, full_alias, cmd_derived_from_alias, pos_args_table)
-                transformed_commands += render_template(cmd_derived_from_alias, pos_args_table)
+                with timing.span('render_template'):
+                    transformed_commands += render_template(
+                        cmd_derived_from_alias, pos_args_table,
+                        expressions=self.compiled_alias_table['expressions'].get(full_alias))
 
                 # Skip the next arg(s) because they have been already consumed as a positional argument above
                 for pos_arg in pos_args_table:  # pylint: disable=unused-variable
                     next(alias_iter)
             else:
                 logger.debug(DEBUG_MSG, full_alias, cmd_derived_from_alias)
-                transformed_commands += shlex.split(cmd_derived_from_alias)
+                if full_alias in self.compiled_alias_table['tokens']:
+                    transformed_commands += self.compiled_alias_table['tokens'][full_alias]
+                else:
+                    transformed_commands += shlex.split(cmd_derived_from_alias)
+
+        return self.post_transform(transformed_commands, expand_env_vars=expand_env_vars)
+
+    def prepare_collision_table(self):
+        """
+        Load the collision table from the alias state, or rebuild it against the entire command table
+        if the alias config has changed and no other process is rebuilding it.
 
-        return self.post_transform(transformed_commands)
+        The alias state is left untouched if the command table is not available (load_cmd_tbl_func),
+        e.g. when expanding aliases outside of an az command: a collision table rebuilt without it
+        would let aliases shadow the commands of Azure CLI until the alias config changes again.
+        """
+        # Only load the entire command table if it detects changes in the alias config
+        with timing.span('hash_alias_config'):
+            alias_config_changed = self.detect_alias_config_change()
+        if alias_config_changed and 'load_cmd_tbl_func' not in self.kwargs:
+            logger.debug(DEBUG_MSG_NO_COMMAND_TABLE)
+            self.alias_state.written = True
+            alias_config_changed = False
+        if alias_config_changed:
+            with timing.span('acquire_alias_state_lock'):
+                alias_config_changed = self.alias_state.acquire_lock(self.alias_config_hash)
+        if alias_config_changed:
+            with timing.span('load_command_table'):
+                self.load_full_command_table()
+            with timing.span('build_collision_table'):
+                self.collided_alias = AliasManager.update_collision_table(self.alias_state,
+                                                                          self.alias_table.sections())
+        else:
+            self.load_collided_alias()
 
     def get_full_alias(self, query):
         """
@@ -177,53 +298,81 @@ class AliasManager(object):
         Returns:
             The full alias (with the placeholders, if any).
         """
-        if query in self.alias_table.sections():
-            return query
-
-        return next((section for section in self.alias_table.sections() if section.split()[0] == query), '')
+        return self.compiled_alias_table['index'].get(query, '')
 
     def load_full_command_table(self):
         """
-        Perform a full load of the command table to get all the reserved command words.
+        Get all the reserved command words, performing a full load of the command table if they
+        have not been persisted for the installed Azure CLI.
         """
-        load_cmd_tbl_func = self.kwargs.get('load_cmd_tbl_func', lambda _: {})
-        cache_reserved_commands(load_cmd_tbl_func)
-        telemetry.set_full_command_table_loaded()
+        if cache_reserved_commands(self.kwargs['load_cmd_tbl_func']):
+            telemetry.set_full_command_table_loaded()
 
-    def post_transform(self, args):
+    def post_transform(self, args, expand_env_vars=True):
         """
-        Inject environment variables, and write hash to alias hash file after transforming alias to commands.
+        Inject environment variables after transforming alias to commands. If the alias configuration has changed
+        or had to be parsed, also write the new alias state; otherwise nothing is written.
 
         Args:
             args: A list of args to post-transform.
+            expand_env_vars: False if environment variables should be left for the shell to expand.
         """
         # Ignore 'az' if it is the first command
         args = args[1:] if args and args[0] == 'az' else args
+        post_transform_commands = AliasManager.expand_env_vars(args) if expand_env_vars else list(args)
+
+        # The alias state lock is only held while rebuilding the alias state against the entire command table
+        alias_config_changed = self.alias_state.lock_file is not None
+        is_alias_state_stale = alias_config_changed or \
+            (not self.alias_state.snapshot_loaded and self.alias_state.alias_stat)
+        if is_alias_state_stale and not self.alias_state.written:
+            if alias_config_changed:
+                with timing.span('build_tab_completion_table'):
+                    tab_completion_table = build_tab_completion_table(self.alias_table)
+            else:
+                tab_completion_table = self.alias_state['tab_completion_table']
+            with timing.span('write_alias_state'):
+                self.alias_state.write(self.alias_table, self.alias_config_hash, self.alias_state.alias_stat,
+                                       self.collided_alias, tab_completion_table,
+                                       compiled_alias_table=self.compiled_alias_table)
+
+        self.alias_state.release_lock()
+
+        return post_transform_commands
+
+    @staticmethod
+    def expand_env_vars(args):
+        """
+        Expand the environment variables in args, except in the command of 'az alias create'.
 
-        post_transform_commands = []
+        Args:
+            args: A list of transformed args.
+
+        Returns:
+            A list of args with their environment variables expanded.
+        """
+        expanded_args = []
         for i, arg in enumerate(args):
             # Do not translate environment variables for command argument
             if is_alias_command(['create'], args) and i > 0 and args[i - 1] in ['-c', '--command']:
-                post_transform_commands.append(arg)
+                expanded_args.append(arg)
             else:
-                post_transform_commands.append(os.path.expandvars(arg))
+                expanded_args.append(os.path.expandvars(arg))
 
-        AliasManager.write_alias_config_hash(self.alias_config_hash)
-        AliasManager.write_collided_alias(self.collided_alias)
-
-        return post_transform_commands
+        return expanded_args
 
     def parse_error(self):
         """
         Check if there is a configuration parsing error.
 
         A parsing error has occurred if there are strings inside the alias config file
-        but there is no alias loaded in self.alias_table.
+        but there is no alias loaded in self.alias_table, or if the alias config failed (or is known to fail) to parse.
 
         Returns:
             True if there is an error parsing the alias configuration file. Otherwises, false.
         """
-        return not self.alias_table.sections() and self.alias_config_str
+        return self.alias_state.alias_config_error is not None or \
+            not self.alias_table.sections() and self.alias_config_str
 
     @staticmethod
     def build_collision_table(aliases, levels=COLLISION_CHECK_LEVEL_DEPTH):
@@ -246,41 +395,145 @@ class AliasManager(object):
             levels: the amount of levels we tranverse through the command table tree.
         """
         collided_alias = defaultdict(list)
-        for alias in aliases:
-            # Only care about the first word in the alias because alias
-            # cannot have spaces (unless they have positional arguments)
-            word = alias.split()[0]
-            for level in range(1, levels + 1):
-                collision_regex = r'^{}{}($|\s)'.format(r'([a-z\-]*\s)' * (level - 1), word.lower())
-                if list(filter(re.compile(collision_regex).match, azext_alias.cached_reserved_commands)) \
-                        and level not in collided_alias[word]:
-                    collided_alias[word].append(level)
+        AliasManager.check_collisions(collided_alias, aliases, levels)
 
         telemetry.set_collided_aliases(list(collided_alias.keys()))
         return collided_alias
 
     @staticmethod
-    def write_alias_config_hash(alias_config_hash='', empty_hash=False):
+    def update_collision_table(alias_state, aliases, levels=COLLISION_CHECK_LEVEL_DEPTH):
         """
-        Write self.alias_config_hash to the alias hash file.
+        Update the collision table in the alias state for a new list of aliases. Only the aliases whose
+        first word was not in the aliases that the collision table was built from are checked against the
+        command table; the collisions of removed aliases are dropped. The collision table is built from scratch
+        if the alias state does not record the aliases it was built from, or if the installed Azure CLI has changed.
 
         Args:
-            empty_hash: True if we want to write an empty string into the file. Empty string in the alias hash file
-                means that we have to perform a full load of the command table in the next run.
+            alias_state: The current alias state.
+            aliases: The new list of aliases.
+            levels: the amount of levels we tranverse through the command table tree.
+
+        Returns:
+            The updated collision table.
         """
-        with open(GLOBAL_ALIAS_HASH_PATH, 'w') as alias_config_hash_file:
-            alias_config_hash_file.write('' if empty_hash else alias_config_hash)
+        cli_fingerprint = get_cli_fingerprint()
+        if alias_state['collided_alias_sections'] is None or not cli_fingerprint or \
+                cli_fingerprint != alias_state['cli_fingerprint']:
+            return AliasManager.build_collision_table(aliases, levels)
+
+        old_words = set(alias.split()[0] for alias in alias_state['collided_alias_sections'])
+        new_words = set(alias.split()[0] for alias in aliases)
+        collided_alias = defaultdict(list)
+        for word, collided_levels in alias_state['collided_alias'].items():
+            if word in new_words:
+                collided_alias[word] = collided_levels
+        AliasManager.check_collisions(collided_alias, [alias for alias in aliases if alias.split()[0] not in old_words],
+                                      levels)
+
+        telemetry.set_collided_aliases(list(collided_alias.keys()))
+        return collided_alias
 
     @staticmethod
-    def write_collided_alias(collided_alias_dict):
+    def check_collisions(collided_alias, aliases, levels):
         """
-        Write the collided aliases string into the collided alias file.
+        Check aliases against the entire command table and record their collisions in a collision table.
+
+        Args:
+            collided_alias: The collision table to record collisions in.
+            aliases: The aliases to check.
+            levels: the amount of levels we tranverse through the command table tree.
         """
-        # w+ creates the alias config file if it does not exist
-        open_mode = 'r+' if os.path.exists(GLOBAL_COLLIDED_ALIAS_PATH) else 'w+'
-        with open(GLOBAL_COLLIDED_ALIAS_PATH, open_mode) as collided_alias_file:
-            collided_alias_file.truncate()
-            collided_alias_file.write(json.dumps(collided_alias_dict))
+        reserved_command_index = get_reserved_command_index()
+        for alias in aliases:
+            # Only care about the first word in the alias because alias
+            # cannot have spaces (unless they have positional arguments)
+            word = alias.split()[0]
+            for level in range(1, levels + 1):
+                if reserved_command_index.is_reserved_word(word.lower(), level) and level not in collided_alias[word]:
+                    collided_alias[word].append(level)
+
+    @staticmethod
+    def compile_alias_table(alias_table, previous_compiled_alias_table=None):
+        """
+        Compile the alias table into the lookup tables used by transform.
+
+        The compiled alias table is structured as:
+        {
+            'commands': {full alias (with placeholders, if any): the command it points to},
+            'index': {full alias or its first word: full alias},
+            'tokens': {full alias without placeholders: its command split into args},
+            'placeholders': {full alias: its placeholders' names in order},
+            'expressions': {full alias with placeholders: the placeholder expressions in its command},
+            'ambiguous': {first word shared by more than one alias: those aliases}
+        }
+        An alias matching a section name exactly takes precedence over one matching by first word;
+        otherwise the first section in the file wins, and a warning is logged for each ambiguous first word.
+        Aliases whose placeholders or command cannot be parsed are left out of 'placeholders', 'expressions'
+        and 'tokens' so transform reports the error when they are hit.
+
+        The placeholders, expressions and tokens of an alias are carried over from previous_compiled_alias_table
+        if neither the alias nor its command has changed, so only new and modified aliases are parsed.
+
+        Args:
+            alias_table: The alias table to compile.
+            previous_compiled_alias_table: The compiled alias table of a previous version of alias_table, if any.
+
+        Returns:
+            The compiled alias table.
+        """
+        from azext_alias.argument import get_placeholders, compile_placeholder_expression
+
+        commands = dict(reduce_alias_table(alias_table))
+        index = {alias: alias for alias in commands}
+        tokens = {}
+        placeholders = {}
+        expressions = {}
+        aliases_by_first_word = defaultdict(list)
+        previous = previous_compiled_alias_table or {}
+        previous_commands = previous.get('commands', {})
+        previous_placeholders = previous.get('placeholders', {})
+        for alias in alias_table.sections():
+            if alias not in commands:
+                continue
+
+            aliases_by_first_word[alias.split()[0]].append(alias)
+            if alias in previous_placeholders and previous_commands.get(alias) == commands[alias]:
+                placeholders[alias] = previous_placeholders[alias]
+                if alias in previous['expressions']:
+                    expressions[alias] = previous['expressions'][alias]
+                if alias in previous['tokens']:
+                    tokens[alias] = previous['tokens'][alias]
+                continue
+
+            try:
+                placeholders[alias] = get_placeholders(alias, check_duplicates=True)
+                if placeholders[alias]:
+                    expressions[alias] = get_placeholders(commands[alias])
+                    for expression in expressions[alias]:
+                        compile_placeholder_expression(expression)
+                else:
+                    tokens[alias] = shlex.split(commands[alias])
+            except Exception:  # pylint: disable=broad-except
+                # Leave the alias out so transform parses it again and reports the error
+                placeholders.pop(alias, None)
+                expressions.pop(alias, None)
+
+        ambiguous = {}
+        for word, aliases in aliases_by_first_word.items():
+            index.setdefault(word, aliases[0])
+            if len(aliases) > 1:
+                ambiguous[word] = aliases
+                # Only warn when the alias config is compiled, not every time the compiled alias table is loaded
+                logger.warning(AMBIGUOUS_ALIAS_WARNING, word, index[word], ', '.join(aliases))
+
+        return {
+            'commands': commands,
+            'index': index,
+            'tokens': tokens,
+            'placeholders': placeholders,
+            'expressions': expressions,
+            'ambiguous': ambiguous
+        }
 
     @staticmethod
     def process_exception_message(exception):
@@ -297,3 +550,153 @@ class AliasManager(object):
         for replace_char in ['\t', '\n', '\\n']:
             exception_message = exception_message.replace(replace_char, '' if replace_char != '\t' else ' ')
         return exception_message.replace('section', 'alias')
+
+
+def find_local_alias_path(cwd=None):
+    """
+    Find the repo-local alias config file (.azalias) in a directory or its closest ancestor that has one.
+    Repo-local alias config files are opt-in (see LOCAL_ALIAS_ENABLED_ENV_VAR). The search stops at the root
+    of the repository (the directory that contains .git) or at the home directory, whichever comes first.
+
+    Args:
+        cwd: The directory to start searching from. Default: the current working directory.
+
+    Returns:
+        The path of the repo-local alias config file, or None if there is none or if it is not trusted
+        (see is_trusted_alias_file).
+    """
+    if os.environ.get(LOCAL_ALIAS_ENABLED_ENV_VAR, '').lower() not in ['1', 'true', 'yes', 'on']:
+        return None
+
+    home_directory = os.path.abspath(os.path.expanduser('~'))
+    directory = os.path.abspath(cwd or os.getcwd())
+    while True:
+        path = os.path.join(directory, LOCAL_ALIAS_FILE_NAME)
+        if os.path.isfile(path):
+            if is_trusted_alias_file(path):
+                return path
+            logger.warning(LOCAL_ALIAS_INSECURE_WARNING, path)
+            return None
+        parent_directory = os.path.dirname(directory)
+        if parent_directory == directory or directory == home_directory or \
+                os.path.exists(os.path.join(directory, '.git')):
+            return None
+        directory = parent_directory
+
+
+def is_trusted_alias_file(path):
+    """
+    Check if an alias config file is owned by the current user and cannot be modified by other users,
+    so that the aliases in it cannot run commands that the current user did not define.
+    File ownership and permissions are not checked on Windows.
+
+    Args:
+        path: The path of the alias config file.
+
+    Returns:
+        True if the alias config file is trusted.
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+
+    file_stat = os.stat(path)
+    return file_stat.st_uid == os.getuid() and not file_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def get_alias_layers_stat(cwd=None):
+    """
+    Get the stat fingerprints of the alias config files in effect, from the lowest to the highest precedence:
+    the system-wide alias config file, the user's alias config file and the repo-local alias config file.
+
+    Args:
+        cwd: The directory to search the repo-local alias config file from. Default: the current working directory.
+
+    Returns:
+        A tuple of tuples with [0] being the path of an existing alias config file and [1] its stat fingerprint.
+    """
+    alias_stat = []
+    for path in [SYSTEM_ALIAS_PATH, GLOBAL_ALIAS_PATH, find_local_alias_path(cwd)]:
+        if not path or path in dict(alias_stat):
+            continue
+        try:
+            alias_stat.append((path, get_file_stat(path)))
+        except (IOError, OSError):
+            pass
+
+    return tuple(alias_stat)
+
+
+def get_local_alias_path(alias_stat):
+    """
+    Get the path of the repo-local alias config file in effect.
+
+    Args:
+        alias_stat: The stat fingerprints of the alias config files in effect, as returned by get_alias_layers_stat.
+
+    Returns:
+        The path of the repo-local alias config file, or None if there is none in effect.
+    """
+    return next((path for path, _ in alias_stat if path not in [SYSTEM_ALIAS_PATH, GLOBAL_ALIAS_PATH]), None)
+
+
+def load_alias_layers(cwd=None):
+    """
+    Load the alias config files in effect and merge them into a single alias table (see merge_alias_layers).
+
+    Args:
+        cwd: The directory to search the repo-local alias config file from. Default: the current working directory.
+
+    Returns:
+        A tuple with [0] being the merged alias table, [1] the concatenated content of the alias config files
+        and [2] their stat fingerprints.
+    """
+    alias_layers, alias_stat = read_alias_layers(cwd)
+    return merge_alias_layers(alias_layers), ''.join(layer_config_str for _, layer_config_str in alias_layers), \
+        alias_stat
+
+
+def read_alias_layers(cwd=None):
+    """
+    Read the content of the alias config files in effect.
+
+    Args:
+        cwd: The directory to search the repo-local alias config file from. Default: the current working directory.
+
+    Returns:
+        A tuple with [0] being a tuple of (path, content) of the alias config files, from the lowest to the highest
+        precedence, and [1] their stat fingerprints.
+    """
+    alias_layers = []
+    alias_stat = []
+    for path, _ in get_alias_layers_stat(cwd):
+        # The content that has been read is parsed later, since the file may be replaced by a writer at any time
+        with open(path, 'r') as alias_config_file:
+            alias_stat.append((path, get_file_stat(alias_config_file.fileno())))
+            alias_layers.append((path, alias_config_file.read()))
+
+    return tuple(alias_layers), tuple(alias_stat)
+
+
+def merge_alias_layers(alias_layers):
+    """
+    Parse the content of alias config files and merge them into a single alias table. An alias defined in
+    more than one file is taken from the file with the highest precedence (see get_alias_layers_stat),
+    and the aliases of a file with a higher precedence come first in the merged alias table.
+
+    Args:
+        alias_layers: A tuple of (path, content) of the alias config files, as returned by read_alias_layers.
+
+    Returns:
+        The merged alias table.
+    """
+    alias_table = get_config_parser()
+    for path, layer_config_str in reversed(alias_layers):
+        layer_table = get_config_parser()
+        read_config_string(layer_table, layer_config_str, path)
+        for section in layer_table.sections():
+            if not alias_table.has_section(section):
+                alias_table.add_section(section)
+                for option, value in layer_table.items(section, raw=True):
+                    alias_table.set(section, option, value)
+
+    return alias_table
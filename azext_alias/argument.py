@@ -5,6 +5,7 @@
 
 # pylint: disable=import-error
 
+import os
 import re
 import shlex
 
@@ -12,6 +13,7 @@ from knack.util import CLIError
 
 import jinja2 as jinja
 from azext_alias._const import (
+    GLOBAL_ALIAS_TEMPLATE_CACHE_DIR,
     DUPLICATED_PLACEHOLDER_ERROR,
     RENDER_TEMPLATE_ERROR,
     INSUFFICIENT_POS_ARG_ERROR,
@@ -19,6 +21,72 @@ from azext_alias._const import (
     PLACEHOLDER_BRACKETS_ERROR
 )
 
+# The shared Jinja environment, created on first use by get_jinja_env()
+_jinja_env = None
+
+# Placeholder expressions compiled by compile_placeholder_expression(), keyed by their source
+_compiled_expressions = {}
+
+
+class AliasBytecodeCache(jinja.FileSystemBytecodeCache):
+    """
+    A Jinja bytecode cache that never fails a render. A cache file half-written by a concurrent
+    az process or an unwritable config directory simply results in a template recompilation.
+    """
+
+    def load_bytecode(self, bucket):
+        try:
+            super(AliasBytecodeCache, self).load_bytecode(bucket)
+        except Exception:  # pylint: disable=broad-except
+            bucket.reset()
+
+    def dump_bytecode(self, bucket):
+        try:
+            super(AliasBytecodeCache, self).dump_bytecode(bucket)
+        except (IOError, OSError):
+            pass
+
+
+def get_jinja_env():
+    """
+    Get the Jinja environment shared by all alias commands.
+
+    Templates are looked up by the alias command text. Compiled templates are cached in memory
+    by the environment, and their bytecode is persisted in the alias template cache directory
+    so that subsequent az invocations skip template compilation.
+
+    Returns:
+        The shared Jinja environment.
+    """
+    global _jinja_env  # pylint: disable=global-statement
+    if _jinja_env is None:
+        bytecode_cache = None
+        try:
+            if not os.path.isdir(GLOBAL_ALIAS_TEMPLATE_CACHE_DIR):
+                os.makedirs(GLOBAL_ALIAS_TEMPLATE_CACHE_DIR)
+            bytecode_cache = AliasBytecodeCache(GLOBAL_ALIAS_TEMPLATE_CACHE_DIR)
+        except (IOError, OSError):
+            pass
+
+        _jinja_env = jinja.Environment(loader=jinja.FunctionLoader(_load_alias_template),
+                                       bytecode_cache=bytecode_cache)
+
+    return _jinja_env
+
+
+def _load_alias_template(cmd_derived_from_alias):
+    """
+    Load the template source of an alias command, for Jinja's FunctionLoader.
+
+    Args:
+        cmd_derived_from_alias: The alias command, which is also the name of the template.
+
+    Returns:
+        A tuple of the template source, its filename (none) and a function telling Jinja that
+        the template is always up to date, since the source is derived from the name alone.
+    """
+    return normalize_placeholders(cmd_derived_from_alias, inject_quotes=True), None, lambda: True
+
 
 def get_placeholders(arg, check_duplicates=False):
     """
@@ -86,7 +154,7 @@ def normalize_placeholders(arg, inject_quotes=False):
     return arg.replace('{{', '"{{').replace('}}', '}}"') if inject_quotes else arg
 
 
-def build_pos_args_table(full_alias, args, start_index):
+def build_pos_args_table(full_alias, args, start_index, placeholders=None):
     """
     Build a dictionary where the key is placeholder name and the value is the position argument value.
 
@@ -94,12 +162,16 @@ def build_pos_args_table(full_alias, args, start_index):
         full_alias: The full alias (including any placeholders).
         args: The arguments that the user inputs in the terminal.
         start_index: The index at which we start ingesting position arguments.
+        placeholders: The placeholders' names of full_alias, if already known.
 
     Returns:
         A dictionary with the key beign the name of the placeholder and its value
         being the respective positional argument.
     """
-    pos_args_placeholder = get_placeholders(full_alias, check_duplicates=True)
+    if placeholders is None:
+        placeholders = get_placeholders(full_alias, check_duplicates=True)
+
+    pos_args_placeholder = placeholders
     pos_args = args[start_index: start_index + len(pos_args_placeholder)]
 
     if len(pos_args_placeholder) != len(pos_args):
@@ -116,20 +188,20 @@ def build_pos_args_table(full_alias, args, start_index):
     return dict(zip(pos_args_placeholder, pos_args))
 
 
-def render_template(cmd_derived_from_alias, pos_args_table):
+def render_template(cmd_derived_from_alias, pos_args_table, expressions=None):
     """
     Render cmd_derived_from_alias as a Jinja template with pos_args_table as the arguments.
 
     Args:
         cmd_derived_from_alias: The string to be injected with positional arguemnts.
         pos_args_table: The dictionary used to rendered.
+        expressions: The placeholder expressions in cmd_derived_from_alias, if they are already known.
 
     Returns:
         A processed string with positional arguments injected.
     """
     try:
-        cmd_derived_from_alias = normalize_placeholders(cmd_derived_from_alias, inject_quotes=True)
-        template = jinja.Template(cmd_derived_from_alias)
+        template = get_jinja_env().get_template(cmd_derived_from_alias)
 
         # Shlex.split allows us to split a string by spaces while preserving quoted substrings
         # (positional arguments in this case)
@@ -139,7 +211,7 @@ def render_template(cmd_derived_from_alias, pos_args_table):
         # since Jinja template engine only checks for compile time error.
         # Only check for runtime errors if there is an empty string in rendered.
         if '' in rendered:
-            check_runtime_errors(cmd_derived_from_alias, pos_args_table)
+            check_runtime_errors(cmd_derived_from_alias, pos_args_table, expressions)
 
         return rendered
     except Exception as exception:
@@ -148,6 +220,7 @@ def render_template(cmd_derived_from_alias, pos_args_table):
             raise
 
         # The template has some sort of compile time errors
+        cmd_derived_from_alias = normalize_placeholders(cmd_derived_from_alias, inject_quotes=True)
         split_exception_message = str(exception).split()
 
         # Check if the error message provides the index of the erroneous character
@@ -167,7 +240,23 @@ def render_template(cmd_derived_from_alias, pos_args_table):
         raise CLIError(error_msg)
 
 
-def check_runtime_errors(cmd_derived_from_alias, pos_args_table):
+def compile_placeholder_expression(expression):
+    """
+    Compile a placeholder expression into a code object that can be evaluated directly.
+    Compiled expressions are cached for the lifetime of the process.
+
+    Args:
+        expression: The placeholder expression, e.g. url.split('.')[0].
+
+    Returns:
+        The compiled code object.
+    """
+    if expression not in _compiled_expressions:
+        _compiled_expressions[expression] = compile(expression, '<string>', 'eval')
+    return _compiled_expressions[expression]
+
+
+def check_runtime_errors(cmd_derived_from_alias, pos_args_table, expressions=None):
     """
     Validate placeholders and their expressions in cmd_derived_from_alias to make sure
     that there is no runtime error (such as index out of range).
@@ -176,14 +265,17 @@ def check_runtime_errors(cmd_derived_from_alias, pos_args_table):
         cmd_derived_from_alias: The command derived from the alias
             (include any positional argument placehodlers)
         pos_args_table: The positional argument table.
+        expressions: The placeholder expressions in cmd_derived_from_alias. They are parsed
+            from cmd_derived_from_alias if not specified.
     """
-    for placeholder, value in pos_args_table.items():
-        exec('{} = "{}"'.format(placeholder, value))  # pylint: disable=exec-used
+    if expressions is None:
+        expressions = get_placeholders(cmd_derived_from_alias)
 
-    expressions = get_placeholders(cmd_derived_from_alias)
+    # Undo the escaping done by build_pos_args_table
+    variables = {placeholder: value.replace('\\"', '"') for placeholder, value in pos_args_table.items()}
     for expression in expressions:
         try:
-            exec(expression)  # pylint: disable=exec-used
+            eval(compile_placeholder_expression(expression), {}, dict(variables))  # pylint: disable=eval-used
         except Exception as exception:  # pylint: disable=broad-except
             error_msg = PLACEHOLDER_EVAL_ERROR.format(expression, exception)
             raise CLIError(error_msg)
@@ -4,18 +4,32 @@
 # --------------------------------------------------------------------------------------------
 
 import os
+import sys
 import hashlib
 
+from six import StringIO, text_type
 from knack.util import CLIError
 from knack.log import get_logger
 
-from azext_alias._const import ALIAS_NOT_FOUND_ERROR, POST_EXPORT_ALIAS_MSG, ALIAS_FILE_NAME
-from azext_alias.alias import GLOBAL_ALIAS_PATH, AliasManager
+from azext_alias._const import (
+    ALIAS_NOT_FOUND_ERROR,
+    POST_EXPORT_ALIAS_MSG,
+    IMPORT_NO_CHANGE_MSG,
+    ALIAS_FILE_NAME,
+    ALIAS_LOCK_FILE_SUFFIX
+)
+from azext_alias.alias import GLOBAL_ALIAS_PATH, AliasManager, load_alias_layers, get_local_alias_path
 from azext_alias.util import (
     get_alias_table,
+    get_merged_alias_table,
     is_url,
     build_tab_completion_table,
+    update_tab_completion_table,
     get_config_parser,
+    get_cli_fingerprint,
+    AliasStateStore,
+    write_file_atomically,
+    file_lock,
     retrieve_file_from_url
 )
 
@@ -31,17 +45,19 @@ def create_alias(alias_name, alias_command):
         alias_command: The command that the alias points to.
     """
     alias_name, alias_command = alias_name.strip(), alias_command.strip()
-    alias_table = get_alias_table()
-    if alias_name not in alias_table.sections():
-        alias_table.add_section(alias_name)
+    with _alias_writer_lock():
+        alias_table = get_alias_table()
+        if alias_name not in alias_table.sections():
+            alias_table.add_section(alias_name)
 
-    alias_table.set(alias_name, 'command', alias_command)
-    _commit_change(alias_table)
+        alias_table.set(alias_name, 'command', alias_command)
+        _commit_change(alias_table)
 
 
 def export_aliases(export_path=None, exclusions=None):
     """
-    Export all registered aliases to a given path, as an INI configuration file.
+    Export all the aliases in effect in the current directory (see get_merged_alias_table) to a given path,
+    as an INI configuration file.
 
     Args:
         export_path: The path of the alias configuration file to export to.
@@ -50,7 +66,7 @@ def export_aliases(export_path=None, exclusions=None):
     if not export_path:
         export_path = os.path.abspath(ALIAS_FILE_NAME)
 
-    alias_table = get_alias_table()
+    alias_table = get_merged_alias_table()
     for exclusion in exclusions or []:
         if exclusion not in alias_table.sections():
             raise CLIError(ALIAS_NOT_FOUND_ERROR.format(exclusion))
@@ -60,31 +76,111 @@ def export_aliases(export_path=None, exclusions=None):
     logger.warning(POST_EXPORT_ALIAS_MSG, export_path)  # pylint: disable=superfluous-parens
 
 
+def expand_aliases(source=None, destination=None):
+    """
+    Expand the aliases in a file of az command lines, one command line at a time.
+
+    Args:
+        source: The path of the file of command lines to expand. Default: stdin.
+        destination: The path of the file to write the expanded command lines to. Default: stdout.
+    """
+    from azext_alias.expand import expand_stream
+
+    input_stream = open(source, 'r') if source else sys.stdin
+    output_stream = open(destination, 'w') if destination else sys.stdout
+    try:
+        expand_stream(input_stream, output_stream, alias_manager=AliasManager())
+    finally:
+        if source:
+            input_stream.close()
+        if destination:
+            output_stream.close()
+
+
+def rewrite_aliases(script_path, destination=None, shell=None):
+    """
+    Rewrite the az invocations in a bash or PowerShell script into their fully expanded commands.
+
+    Args:
+        script_path: The path of the script to rewrite.
+        destination: The path of the file to write the rewritten script to. Default: stdout.
+        shell: The shell of the script, 'bash' or 'powershell'. Default: inferred from the file extension.
+    """
+    from azext_alias.rewrite import get_shell, rewrite_script
+
+    with open(script_path, 'r') as script_file:
+        script = script_file.read()
+
+    rewritten = rewrite_script(AliasManager(), script, shell or get_shell(script_path))
+    if destination:
+        with open(destination, 'w') as destination_file:
+            destination_file.write(rewritten)
+    else:
+        sys.stdout.write(rewritten)
+
+
+def start_daemon():
+    """
+    Run the alias daemon in the foreground until it is stopped.
+    """
+    from azext_alias.daemon import serve
+    serve()
+
+
+def stop_daemon():
+    """
+    Stop the alias daemon.
+    """
+    from azext_alias.daemon import stop
+    stop()
+
+
 def import_aliases(alias_source):
     """
-    Import aliases from a file or an URL.
+    Import aliases from a file or an URL. Nothing is written if the import does not change any alias.
 
     Args:
         alias_source: The source of the alias. It can be a filepath or an URL.
     """
-    alias_table = get_alias_table()
+    imported_alias_table = get_config_parser()
     if is_url(alias_source):
-        alias_source = retrieve_file_from_url(alias_source)
-        alias_table.read(alias_source)
-        os.remove(alias_source)
+        alias_file_path = retrieve_file_from_url(alias_source)
+        imported_alias_table.read(alias_file_path)
+        os.remove(alias_file_path)
     else:
-        alias_table.read(alias_source)
-    _commit_change(alias_table)
+        imported_alias_table.read(alias_source)
+
+    with _alias_writer_lock():
+        alias_table = get_alias_table()
+        changed_aliases = []
+        for alias in imported_alias_table.sections():
+            imported_options = imported_alias_table.items(alias, raw=True)
+            if not alias_table.has_section(alias):
+                alias_table.add_section(alias)
+            elif all(alias_table.has_option(alias, option) and alias_table.get(alias, option, raw=True) == value
+                     for option, value in imported_options):
+                continue
+
+            changed_aliases.append(alias)
+            for option, value in imported_options:
+                alias_table.set(alias, option, value)
+
+        if changed_aliases:
+            _commit_change(alias_table, changed_aliases=changed_aliases)
+
+    if not changed_aliases:
+        logger.warning(IMPORT_NO_CHANGE_MSG, alias_source)
 
 
 def list_alias():
     """
-    List all registered aliases.
+    List all the aliases in effect in the current directory, from the system-wide, user and repo-local
+    alias config files (see get_merged_alias_table).
 
     Returns:
         An array of  dictionary containing the alias and the command that it points to.
     """
-    alias_table = get_alias_table()
+    alias_table = get_merged_alias_table()
     output = []
     for alias in alias_table.sections():
         if alias_table.has_option(alias, 'command'):
@@ -104,37 +200,70 @@ def remove_alias(alias_names):
     Args:
         alias_name: The name of the alias to be removed.
     """
-    alias_table = get_alias_table()
-    for alias_name in alias_names:
-        if alias_name not in alias_table.sections():
-            raise CLIError(ALIAS_NOT_FOUND_ERROR.format(alias_name))
-        alias_table.remove_section(alias_name)
-    _commit_change(alias_table)
+    with _alias_writer_lock():
+        alias_table = get_alias_table()
+        for alias_name in alias_names:
+            if alias_name not in alias_table.sections():
+                raise CLIError(ALIAS_NOT_FOUND_ERROR.format(alias_name))
+            alias_table.remove_section(alias_name)
+        _commit_change(alias_table)
 
 
 def remove_all_aliases():
     """
     Remove all registered aliases.
     """
-    _commit_change(get_config_parser())
+    with _alias_writer_lock():
+        _commit_change(get_config_parser())
 
 
-def _commit_change(alias_table, export_path=None, post_commit=True):
+def _alias_writer_lock():
+    """
+    Get the advisory lock held by the processes that change the alias config file, so that concurrent
+    changes are applied one after the other instead of overwriting each other. Readers never take the lock.
+    """
+    return file_lock(GLOBAL_ALIAS_PATH + ALIAS_LOCK_FILE_SUFFIX)
+
+
+def _commit_change(alias_table, export_path=None, post_commit=True, changed_aliases=None):
     """
     Record changes to the alias table.
-    Also write new alias config hash and collided alias, if any.
+    Also write the new alias state (alias config hash, compiled alias table, collided alias
+    and tab completion table), derived from the aliases of all the alias config files in effect.
 
     Args:
         alias_table: The alias table to commit.
         export_path: The path to export the aliases to. Default: GLOBAL_ALIAS_PATH.
         post_commit: True if we want to perform some extra actions after writing alias to file.
+        changed_aliases: The aliases that have been added or modified, if the change only adds or modifies
+            aliases. The tab completion table is then only updated for these aliases.
     """
-    with open(export_path or GLOBAL_ALIAS_PATH, 'w+') as alias_config_file:
-        alias_table.write(alias_config_file)
-        if post_commit:
-            alias_config_file.seek(0)
-            alias_config_hash = hashlib.sha1(alias_config_file.read().encode('utf-8')).hexdigest()
-            AliasManager.write_alias_config_hash(alias_config_hash)
-            collided_alias = AliasManager.build_collision_table(alias_table.sections())
-            AliasManager.write_collided_alias(collided_alias)
-            build_tab_completion_table(alias_table)
+    previous_alias_config_hash = None
+    if post_commit and changed_aliases is not None:
+        previous_alias_config_hash = hashlib.sha1(load_alias_layers()[1].encode('utf-8')).hexdigest()
+
+    # Readers of the alias config file see either the old or the new file, never a partially written one
+    alias_config_file = StringIO()
+    alias_table.write(alias_config_file)
+    alias_config_str = alias_config_file.getvalue()
+    # The alias table is written as already encoded bytes in Python 2
+    if isinstance(alias_config_str, text_type):
+        alias_config_str = alias_config_str.encode('utf-8')
+    write_file_atomically(export_path or GLOBAL_ALIAS_PATH, alias_config_str)
+
+    if post_commit:
+        # The aliases of the system-wide and repo-local alias config files are also in effect
+        merged_alias_table, alias_config_str, alias_stat = load_alias_layers()
+        alias_config_hash = hashlib.sha1(alias_config_str.encode('utf-8')).hexdigest()
+        # The alias state of the other repo-local alias config files is rebuilt when they are used next
+        alias_state = AliasStateStore(get_local_alias_path(alias_stat))
+        collided_alias = AliasManager.update_collision_table(alias_state, merged_alias_table.sections())
+        # The tab completion table in the alias state can only be updated if it was derived from the
+        # previous alias config and against the installed Azure CLI
+        if previous_alias_config_hash and previous_alias_config_hash == alias_state['alias_config_hash'] and \
+                alias_state['cli_fingerprint'] and alias_state['cli_fingerprint'] == get_cli_fingerprint():
+            tab_completion_table = update_tab_completion_table(alias_state['tab_completion_table'],
+                                                               merged_alias_table, changed_aliases)
+        else:
+            tab_completion_table = build_tab_completion_table(merged_alias_table)
+        alias_state.write(merged_alias_table, alias_config_hash, alias_stat, collided_alias, tab_completion_table)
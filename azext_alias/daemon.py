@@ -0,0 +1,255 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+An opt-in resident alias daemon, which keeps a loaded AliasManager in memory and serves transform
+requests from az processes over a Unix domain socket.
+
+The protocol is one JSON line per request and one JSON line per response:
+    request:  {"args": [the args to transform], "cwd": the working directory of the az process},
+              or {"command": "status"} or {"command": "stop"}
+    response: {"args": [the transformed args], "aliases_hit": [...]}, {"error": the CLIError message},
+              or {"fallback": true} if the daemon cannot serve the request.
+
+The daemon only serves transforms from an alias state that is up to date with the alias config files
+in effect in the working directory of the az process, and reloads its AliasManager whenever any of
+these files changes. Requests are served one at a time, so a client that does not send its request
+within ALIAS_DAEMON_TIMEOUT is disconnected. Rebuilding the alias state (which needs the
+command table of the az process) is always left to an in-process transform.
+"""
+
+import os
+import json
+import socket
+
+from knack.util import CLIError
+from knack.log import get_logger
+
+from azext_alias import telemetry, timing
+from azext_alias._const import (
+    GLOBAL_ALIAS_DAEMON_SOCKET_PATH,
+    ALIAS_DAEMON_TIMEOUT,
+    DEBUG_MSG_DAEMON_UNAVAILABLE,
+    DAEMON_UNSUPPORTED_ERROR,
+    DAEMON_ALREADY_RUNNING_ERROR,
+    DAEMON_NOT_RUNNING_ERROR,
+    DAEMON_STARTED_MSG
+)
+
+logger = get_logger(__name__)
+
+
+class AliasDaemon(object):
+
+    def __init__(self):
+        self.alias_manager = None
+        self.fingerprint = None
+        self.stopped = False
+
+    def get_alias_manager(self, cwd=None):
+        """
+        Get the AliasManager to serve transforms with, reloading it if the alias config files
+        or the alias state file have changed since it was loaded.
+
+        Args:
+            cwd: The working directory of the az process.
+
+        Returns:
+            The AliasManager, or None if the alias state is not up to date with the alias config files.
+        """
+        fingerprint = get_alias_files_fingerprint(cwd)
+        if self.alias_manager is None or fingerprint != self.fingerprint:
+            from azext_alias.alias import AliasManager
+
+            alias_manager = AliasManager(cwd=cwd)
+            self.alias_manager = alias_manager if alias_manager.alias_state.snapshot_loaded else None
+            self.fingerprint = fingerprint
+
+        return self.alias_manager
+
+    def handle_request(self, request):
+        """
+        Handle a request from an az process.
+
+        Args:
+            request: The request, as described in the module docstring.
+
+        Returns:
+            The response, as described in the module docstring.
+        """
+        command = request.get('command')
+        if command:
+            self.stopped = command == 'stop'
+            return {}
+
+        telemetry.reset()
+        timing.start()
+        try:
+            alias_manager = self.get_alias_manager(request.get('cwd'))
+            if alias_manager is None:
+                return {'fallback': True}
+            # Environment variables are expanded by the az process, in its own environment
+            args = alias_manager.transform(list(request['args']), expand_env_vars=False)
+        except CLIError as exception:
+            return {'error': str(exception)}
+        except Exception:  # pylint: disable=broad-except
+            # Let the in-process transform reproduce and report the error
+            self.alias_manager = None
+            return {'fallback': True}
+
+        return {'args': args, 'aliases_hit': telemetry.get_aliases_hit()}
+
+
+def get_alias_files_fingerprint(cwd=None):
+    """
+    Get the stat fingerprints of the alias config files in effect in cwd and the alias state file.
+    """
+    from azext_alias import alias, util
+
+    alias_stat = alias.get_alias_layers_stat(cwd)
+    try:
+        alias_state_stat = util.get_file_stat(util.get_alias_state_path(alias.get_local_alias_path(alias_stat)))
+    except (IOError, OSError):
+        alias_state_stat = None
+    return [alias_stat, alias_state_stat]
+
+
+def send_request(request, socket_path=None):
+    """
+    Send a request to the alias daemon.
+
+    Args:
+        request: The request, as described in the module docstring.
+        socket_path: The path of the daemon's socket. Default: GLOBAL_ALIAS_DAEMON_SOCKET_PATH.
+
+    Returns:
+        The response of the daemon.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=no-member
+    client.settimeout(ALIAS_DAEMON_TIMEOUT)
+    try:
+        client.connect(socket_path or GLOBAL_ALIAS_DAEMON_SOCKET_PATH)
+        client.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        response = b''
+        while not response.endswith(b'\n'):
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+    finally:
+        client.close()
+
+    return json.loads(response.decode('utf-8'))
+
+
+def request_transform(args, socket_path=None):
+    """
+    Transform args with the alias daemon, if it is running.
+
+    Args:
+        args: A list of args to transform.
+        socket_path: The path of the daemon's socket. Default: GLOBAL_ALIAS_DAEMON_SOCKET_PATH.
+
+    Returns:
+        The transformed args, or None if args have to be transformed in-process.
+    """
+    socket_path = socket_path or GLOBAL_ALIAS_DAEMON_SOCKET_PATH
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        return None
+
+    try:
+        response = send_request({'args': args, 'cwd': os.getcwd()}, socket_path)
+    except (IOError, OSError, ValueError) as exception:
+        logger.debug(DEBUG_MSG_DAEMON_UNAVAILABLE, exception)
+        return None
+
+    if 'error' in response:
+        raise CLIError(response['error'])
+    if 'args' not in response:
+        return None
+
+    from azext_alias.alias import AliasManager
+
+    for alias in response.get('aliases_hit', []):
+        telemetry.set_alias_hit(alias)
+    return AliasManager.expand_env_vars(response['args'])
+
+
+def serve(socket_path=None):
+    """
+    Run the alias daemon until it receives a stop request.
+
+    Args:
+        socket_path: The path of the socket to listen on. Default: GLOBAL_ALIAS_DAEMON_SOCKET_PATH.
+    """
+    from six.moves import socketserver
+
+    if not hasattr(socket, 'AF_UNIX'):
+        raise CLIError(DAEMON_UNSUPPORTED_ERROR)
+
+    socket_path = socket_path or GLOBAL_ALIAS_DAEMON_SOCKET_PATH
+    if os.path.exists(socket_path):
+        if is_daemon_running(socket_path):
+            raise CLIError(DAEMON_ALREADY_RUNNING_ERROR.format(socket_path))
+        # The socket of a daemon that did not exit cleanly
+        os.remove(socket_path)
+
+    alias_daemon = AliasDaemon()
+
+    class AliasRequestHandler(socketserver.StreamRequestHandler):
+
+        # Disconnect idle clients, which would otherwise block the requests of every other az process
+        timeout = ALIAS_DAEMON_TIMEOUT
+
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline().decode('utf-8'))
+                response = alias_daemon.handle_request(request)
+                self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            except (IOError, OSError, ValueError):
+                # The client disconnected, timed out (socket.timeout is an IOError/OSError) or sent an invalid
+                # request, and is left to transform in-process
+                pass
+
+    # Only the current user can connect to the socket
+    umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, AliasRequestHandler)  # pylint: disable=no-member
+    finally:
+        os.umask(umask)
+
+    logger.warning(DAEMON_STARTED_MSG, socket_path)
+    try:
+        while not alias_daemon.stopped:
+            server.handle_request()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def is_daemon_running(socket_path=None):
+    """
+    Check if the alias daemon is accepting connections.
+    """
+    try:
+        send_request({'command': 'status'}, socket_path)
+        return True
+    except (IOError, OSError, ValueError):
+        return False
+
+
+def stop(socket_path=None):
+    """
+    Stop the alias daemon.
+
+    Args:
+        socket_path: The path of the daemon's socket. Default: GLOBAL_ALIAS_DAEMON_SOCKET_PATH.
+    """
+    socket_path = socket_path or GLOBAL_ALIAS_DAEMON_SOCKET_PATH
+    try:
+        send_request({'command': 'stop'}, socket_path)
+    except (IOError, OSError, ValueError):
+        raise CLIError(DAEMON_NOT_RUNNING_ERROR.format(socket_path))
@@ -0,0 +1,108 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Expand the aliases in a stream of az command lines ahead of time.
+
+Every stage of the pipeline is a generator, so command lines are read, expanded and written one at
+a time and memory usage does not grow with the size of the input. A single AliasManager is loaded
+for the whole stream.
+
+Like az alias rewrite, references to environment variables (e.g. $VAR) are not expanded, but kept
+in the expanded command lines for the shell that runs them to expand.
+
+Usage:
+    python -m azext_alias.expand [--source commands.txt] [--destination expanded.txt]
+"""
+
+import sys
+import shlex
+import argparse
+
+from knack.util import CLIError
+
+from azext_alias._const import EXPAND_LINE_ERROR
+from azext_alias.rewrite import BASH, quote_arg
+
+
+def read_command_lines(stream):
+    """
+    Read command lines from a stream, one at a time.
+
+    Args:
+        stream: A file-like object of command lines.
+
+    Returns:
+        A generator of command lines without their line breaks.
+    """
+    for line in stream:
+        yield line.rstrip('\r\n')
+
+
+def expand_command_lines(alias_manager, lines):
+    """
+    Expand the aliases in command lines. Lines that do not contain any alias are returned unchanged,
+    except for their quoting. Environment variables are left for the shell to expand.
+
+    Args:
+        alias_manager: The AliasManager used to transform every command line.
+        lines: An iterable of command lines, with or without the leading 'az'.
+
+    Returns:
+        A generator of expanded command lines, one for each line in lines.
+    """
+    for line_number, line in enumerate(lines, 1):
+        try:
+            args = shlex.split(line)
+            if not args:
+                yield line
+                continue
+
+            prefix = ['az'] if args[0] == 'az' else []
+            expanded_args = alias_manager.transform(args[len(prefix):], expand_env_vars=False)
+        except (CLIError, ValueError) as exception:
+            raise CLIError(EXPAND_LINE_ERROR.format(line_number, exception))
+
+        yield ' '.join(quote_arg(arg, BASH) for arg in prefix + expanded_args)
+
+
+def expand_stream(input_stream, output_stream, alias_manager=None):
+    """
+    Expand the aliases in every command line of input_stream and write the results to output_stream.
+
+    Args:
+        input_stream: A file-like object of command lines to expand.
+        output_stream: A file-like object to write the expanded command lines to.
+        alias_manager: The AliasManager used to transform every command line. Default: a new AliasManager.
+    """
+    if alias_manager is None:
+        from azext_alias.alias import AliasManager
+        alias_manager = AliasManager()
+
+    for line in expand_command_lines(alias_manager, read_command_lines(input_stream)):
+        output_stream.write(line + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Expand the aliases in az command lines.')
+    parser.add_argument('--source', '-s', help='the file of command lines to expand (default: stdin)')
+    parser.add_argument('--destination', '-d', help='the file to write the expanded command lines to (default: stdout)')
+    args = parser.parse_args(argv)
+
+    input_stream = open(args.source, 'r') if args.source else sys.stdin
+    output_stream = open(args.destination, 'w') if args.destination else sys.stdout
+    try:
+        expand_stream(input_stream, output_stream)
+    except CLIError as exception:
+        sys.stderr.write('{}\n'.format(exception))
+        sys.exit(1)
+    finally:
+        for stream in [input_stream, output_stream]:
+            if stream not in [sys.stdin, sys.stdout]:
+                stream.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,21 +3,26 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import json
 import timeit
 
 from knack.log import get_logger
 
-from azure.cli.command_modules.interactive.azclishell.command_tree import CommandBranch
-from azext_alias import telemetry
+import azext_alias
+from azext_alias import telemetry, timing
 from azext_alias.alias import AliasManager
+from azext_alias.daemon import request_transform
 from azext_alias.util import (
     is_alias_command,
     cache_reserved_commands,
-    get_alias_table,
-    filter_aliases
+    get_merged_alias_table,
+    filter_aliases,
+    reduce_alias_table,
+    read_alias_state,
+    get_alias_state_path,
+    build_alias_completion_index,
+    search_alias_completion_index
 )
-from azext_alias._const import DEBUG_MSG_WITH_TIMING, GLOBAL_ALIAS_TAB_COMP_TABLE_PATH
+from azext_alias._const import DEBUG_MSG_WITH_TIMING
 
 logger = get_logger(__name__)
 
@@ -26,19 +31,25 @@ def alias_event_handler(_, **kwargs):
     """
     An event handler for alias transformation when EVENT_INVOKER_PRE_TRUNCATE_CMD_TBL event is invoked.
     """
+    elapsed_time = None
     try:
         telemetry.start()
+        timing.start()
 
         start_time = timeit.default_timer()
         args = kwargs.get('args')
-        alias_manager = AliasManager(**kwargs)
+        transformed_args = request_transform(args)
+        if transformed_args is None:
+            alias_manager = AliasManager(**kwargs)
+            transformed_args = alias_manager.transform(args)
 
         # [:] will keep the reference of the original args
-        args[:] = alias_manager.transform(args)
+        args[:] = transformed_args
 
         if is_alias_command(['create', 'import'], args):
             load_cmd_tbl_func = kwargs.get('load_cmd_tbl_func', lambda _: {})
-            cache_reserved_commands(load_cmd_tbl_func)
+            with timing.span('load_command_table'):
+                cache_reserved_commands(load_cmd_tbl_func)
 
         elapsed_time = (timeit.default_timer() - start_time) * 1000
         logger.debug(DEBUG_MSG_WITH_TIMING, args, elapsed_time)
@@ -48,6 +59,8 @@ def alias_event_handler(_, **kwargs):
         telemetry.set_exception(client_exception)
         raise
     finally:
+        telemetry.set_phase_times(timing.get_phase_times())
+        timing.conclude(elapsed_time)
         telemetry.conclude()
 
 
@@ -58,13 +71,16 @@ def enable_aliases_autocomplete(_, **kwargs):
     external_completions = kwargs.get('external_completions', [])
     prefix = kwargs.get('cword_prefix', [])
     cur_commands = kwargs.get('comp_words', [])
-    alias_table = get_alias_table()
+    alias_stat = azext_alias.alias.get_alias_layers_stat()
+    alias_state = read_alias_state(get_alias_state_path(azext_alias.alias.get_local_alias_path(alias_stat)))
+    alias_commands, alias_completion_index = _get_alias_completion_state(alias_state, alias_stat)
     # Transform aliases if they are in current commands,
     # so parser can get the correct subparser when chaining aliases
-    _transform_cur_commands(cur_commands, alias_table=alias_table)
+    _transform_cur_commands(cur_commands, alias_commands=alias_commands)
 
-    for alias, alias_command in filter_aliases(alias_table):
-        if alias.startswith(prefix) and alias.strip() != prefix and _is_autocomplete_valid(cur_commands, alias_command):
+    for alias, alias_command in search_alias_completion_index(alias_completion_index, prefix):
+        if alias.strip() != prefix and \
+                _is_autocomplete_valid(cur_commands, alias_command, alias_state['tab_completion_table']):
             # Only autocomplete the first word because alias is space-delimited
             external_completions.append(alias)
 
@@ -94,50 +110,71 @@ def enable_aliases_autocomplete_interactive(_, **kwargs):
     """
     Enable aliases autocomplete on interactive mode by injecting aliases in the command tree.
     """
+    from azure.cli.command_modules.interactive.azclishell.command_tree import CommandBranch
+
     subtree = kwargs.get('subtree', None)
     if not subtree or not hasattr(subtree, 'children'):
         return
 
-    for alias, alias_command in filter_aliases(get_alias_table()):
+    for alias, alias_command in filter_aliases(get_merged_alias_table()):
         # Only autocomplete the first word because alias is space-delimited
         if subtree.in_tree(alias_command.split()):
             subtree.add_child(CommandBranch(alias))
 
 
-def _is_autocomplete_valid(cur_commands, alias_command):
+def _is_autocomplete_valid(cur_commands, alias_command, tab_completion_table):
     """
     Determine whether autocomplete can be performed at the current state.
 
     Args:
-        parser: The current CLI parser.
         cur_commands: The current commands typed in the console.
         alias_command: The alias command.
+        tab_completion_table: The tab completion table, loaded once per completion request.
 
     Returns:
         True if autocomplete can be performed.
     """
     parent_command = ' '.join(cur_commands[1:])
-    with open(GLOBAL_ALIAS_TAB_COMP_TABLE_PATH, 'r') as tab_completion_table_file:
-        try:
-            tab_completion_table = json.loads(tab_completion_table_file.read())
-            return alias_command in tab_completion_table and parent_command in tab_completion_table[alias_command]
-        except Exception:  # pylint: disable=broad-except
-            return False
+    return alias_command in tab_completion_table and parent_command in tab_completion_table[alias_command]
+
+
+def _get_alias_completion_state(alias_state, alias_stat):
+    """
+    Get the aliases and the alias completion index from the alias state, or from the alias config files
+    if any of them has been modified since the alias state was written.
+
+    Args:
+        alias_state: The alias state.
+        alias_stat: The stat fingerprints of the alias config files in effect.
+
+    Returns:
+        A tuple with [0] being a dictionary of the aliases and the commands they point to, and
+        [1] being the alias completion index.
+    """
+    compiled_alias_table = alias_state['compiled_alias_table']
+    alias_completion_index = alias_state['alias_completion_index']
+    if compiled_alias_table is not None and alias_completion_index is not None and \
+            alias_stat == alias_state['alias_stat']:
+        return compiled_alias_table['commands'], alias_completion_index
+
+    alias_table = get_merged_alias_table()
+    return dict(reduce_alias_table(alias_table)), build_alias_completion_index(alias_table)
 
 
-def _transform_cur_commands(cur_commands, alias_table=None):
+def _transform_cur_commands(cur_commands, alias_commands=None):
     """
     Transform any aliases in cur_commands into their respective commands.
 
     Args:
-        alias_table: The alias table.
         cur_commands: current commands typed in the console.
+        alias_commands: A dictionary of the aliases and the commands they point to.
     """
     transformed = []
-    alias_table = alias_table if alias_table else get_alias_table()
+    if alias_commands is None:
+        alias_commands = dict(reduce_alias_table(get_merged_alias_table()))
     for cmd in cur_commands:
-        if cmd in alias_table.sections() and alias_table.has_option(cmd, 'command'):
-            transformed += alias_table.get(cmd, 'command').split()
+        if cmd in alias_commands:
+            transformed += alias_commands[cmd].split()
         else:
             transformed.append(cmd)
     cur_commands[:] = transformed
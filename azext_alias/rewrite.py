@@ -0,0 +1,541 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Rewrite the az invocations in bash and PowerShell scripts into their fully expanded commands.
+
+The scripts are not executed. An az invocation is recognized when az is the first word of a command,
+e.g. at the start of a line, after ;, &&, ||, |, ( or $( and after keywords such as then and do. Its
+arguments are read up to the end of the command (a newline, ;, &, |, ), a redirection or a comment).
+The bodies of bash here-documents (<<EOF ... EOF) and bash array assignments (arr=(...)) are not commands.
+
+Arguments that the shell expands at run time (variables, command substitutions, globs, etc.) are kept
+as they are. An invocation is left unchanged, with a warning, if an alias has to evaluate one of them
+as a positional argument, or if it cannot be transformed.
+"""
+
+import re
+from collections import namedtuple
+
+from knack.util import CLIError
+from knack.log import get_logger
+
+from azext_alias._const import REWRITE_SKIPPED_WARNING, REWRITE_DYNAMIC_ARG_ERROR
+
+logger = get_logger(__name__)
+
+BASH = 'bash'
+POWERSHELL = 'powershell'
+
+# The words after which a new command starts
+_COMMAND_KEYWORDS = {
+    BASH: {'if', 'then', 'else', 'elif', 'while', 'until', 'do', '!', 'time', '{', 'exec'},
+    POWERSHELL: {'=', '&', '.', '{', 'return'}
+}
+# The characters that separate commands
+_COMMAND_TERMINATORS = {
+    BASH: ';&|()\n',
+    POWERSHELL: ';&|(){}\n'
+}
+# The characters that end the arguments of a command
+_ARGUMENT_TERMINATORS = {
+    BASH: ';&|)\r\n<>',
+    POWERSHELL: ';&|)}\r\n<>'
+}
+# Unquoted characters that the shell expands (or treats specially) inside a word
+_DYNAMIC_CHARS = {
+    BASH: '$`*?[{~',
+    POWERSHELL: '$@({,'
+}
+_ESCAPE_CHAR = {
+    BASH: '\\',
+    POWERSHELL: '`'
+}
+_SAFE_ARG_PATTERN = {
+    BASH: re.compile(r'^[\w@%+=:,./-]+$'),
+    POWERSHELL: re.compile(r'^[\w%+=:./-]+$')
+}
+_ENV_VAR_PATTERN = re.compile(r'\$(\w+|\{\w+\})')
+# The values that dynamic words are transformed as, since their actual values are only known when the script runs
+_STAND_IN_FORMATS = ['__AZ_ALIAS_REWRITE_{}__', '__az.Alias-Rewrite/{}:x__']
+
+# A word of a script, as written (raw) and as passed to the command (value). The value of a dynamic word
+# is only known when the script runs.
+ScriptWord = namedtuple('ScriptWord', ['raw', 'value', 'is_dynamic'])
+
+
+def get_shell(script_path):
+    """
+    Get the shell of a script from its file extension.
+
+    Args:
+        script_path: The path of the script.
+
+    Returns:
+        'powershell' for .ps1 and .psm1 scripts, 'bash' otherwise.
+    """
+    return POWERSHELL if script_path.lower().endswith(('.ps1', '.psm1')) else BASH
+
+
+class ScriptScanner(object):  # pylint: disable=too-few-public-methods
+    """
+    Find the az invocations in a script.
+    """
+
+    def __init__(self, script, shell):
+        self.script = script
+        self.shell = shell
+        self.escape_char = _ESCAPE_CHAR[shell]
+
+    def find_az_invocations(self):
+        """
+        Find the az invocations in the script.
+
+        Returns:
+            A generator of tuples with [0] being the start index of the invocation, [1] its end index
+            and [2] the list of its words (starting with az).
+        """
+        script = self.script
+        i, at_command_start = 0, True
+        # The double-quoted strings, command substitutions and subshells that the scanner is in
+        contexts = []
+        # The here-documents whose bodies start after the current line
+        heredocs = []
+        while i < len(script):
+            char = script[i]
+            context = contexts[-1] if contexts else None
+            if context == '"':
+                i, at_command_start = self._scan_double_quoted(i, contexts, at_command_start)
+            elif char in ' \t\r':
+                i += 1
+            elif self._get_line_continuation_length(i):
+                i += self._get_line_continuation_length(i)
+            elif at_command_start and self._is_az_word(i):
+                end, words = self._read_invocation(i, context == '`')
+                yield i, end, words
+                i, at_command_start = end, False
+            elif char == self.escape_char:
+                i, at_command_start = i + 2, False
+            elif char == '#':
+                i = self._skip_comment(i)
+            elif char in '\'"':
+                i, at_command_start = self._scan_quote(i, contexts), False
+            elif self.shell == BASH and (script.startswith('((', i) or script.startswith('$((', i)):
+                # An arithmetic expression, in which << is a shift
+                i, at_command_start = self._skip_balanced(i + 1 if char == '$' else i), False
+            elif self._starts_substitution(i) or char in '()' or (self.shell == BASH and char == '`'):
+                i, at_command_start = self._scan_bracket(i, contexts)
+            elif self.shell == BASH and script.startswith('<<', i):
+                i = self._read_heredoc_redirection(i, heredocs)
+                at_command_start = False
+            elif char == '\n' and heredocs:
+                # The line break that ends the here-document body is scanned next
+                i, at_command_start = self._skip_heredoc_bodies(i + 1, heredocs), True
+                del heredocs[:]
+            elif char in _COMMAND_TERMINATORS[self.shell]:
+                i, at_command_start = i + 1, char != '}'
+            else:
+                i, at_command_start = self._scan_word(i, at_command_start)
+
+    def _scan_double_quoted(self, i, contexts, at_command_start):
+        """
+        Scan the character at index i of a double-quoted string. A command substitution in the string
+        starts a new command.
+
+        Returns:
+            A tuple with [0] being the index of the next character to scan and [1] whether a command starts there.
+        """
+        script = self.script
+        char = script[i]
+        if char == '"' and self.shell == POWERSHELL and script[i + 1:i + 2] == '"':
+            return i + 2, at_command_start
+        if char == '"':
+            contexts.pop()
+            return i + 1, at_command_start
+        if char == self.escape_char:
+            return i + 2, at_command_start
+        if self._starts_substitution(i):
+            contexts.append('(')
+            return i + 2, True
+        if self.shell == BASH and char == '`':
+            contexts.append('`')
+            return i + 1, True
+        return i + 1, at_command_start
+
+    def _scan_quote(self, i, contexts):
+        """
+        Scan the quote at index i. A single-quoted string is skipped as a whole, while a double-quoted
+        string is scanned character by character since it may contain command substitutions.
+
+        Returns:
+            The index of the next character to scan.
+        """
+        if self.script[i] == "'":
+            return self._read_single_quoted(i, [])
+        contexts.append('"')
+        return i + 1
+
+    def _scan_bracket(self, i, contexts):
+        """
+        Scan the bracket or bash backtick that starts or ends a command substitution or subshell at index i.
+
+        Returns:
+            A tuple with [0] being the index of the next character to scan and [1] whether a command starts there.
+        """
+        char = self.script[i]
+        context = contexts[-1] if contexts else None
+        if char == ')':
+            if context == '(':
+                contexts.pop()
+            return i + 1, False
+        if char == '`':
+            if context == '`':
+                contexts.pop()
+                return i + 1, False
+            contexts.append('`')
+            return i + 1, True
+        contexts.append('(')
+        return i + (1 if char == '(' else 2), True
+
+    def _scan_word(self, i, at_command_start):
+        """
+        Scan the unquoted word that starts at index i. A command starts after a keyword such as then or do,
+        and after the variable assignments before a bash command, e.g. VAR=value az ...
+
+        Returns:
+            A tuple with [0] being the end index of the word and [1] whether a command starts after it.
+        """
+        script = self.script
+        end = i
+        while end < len(script) and script[end] not in ' \t\r\n\'"`()<>' + _COMMAND_TERMINATORS[self.shell] and \
+                not self._starts_substitution(end):
+            end += 1
+        word = script[i:max(end, i + 1)]
+        is_bash_assignment = self.shell == BASH and re.match(r'^\w+=', word)
+        if self.shell == BASH and re.match(r'^\w+\+?=$', word) and script[end:end + 1] == '(':
+            # The elements of an array assignment, e.g. arr=(az group list), are words, not a command
+            end = self._skip_array_elements(end)
+        return max(end, i + 1), word in _COMMAND_KEYWORDS[self.shell] or bool(at_command_start and is_bash_assignment)
+
+    def _skip_array_elements(self, i):
+        """
+        Skip the parenthesized elements of a bash array assignment that start at index i.
+        """
+        script = self.script
+        depth = 0
+        while i < len(script):
+            char = script[i]
+            if char == self.escape_char:
+                i += 2
+                continue
+            if char == "'":
+                i = self._read_single_quoted(i, [])
+                continue
+            if char == '"':
+                i = self._read_double_quoted(i, [])[0]
+                continue
+            if char == '#' and script[i - 1] in ' \t\n(':
+                i = self._skip_comment(i)
+                continue
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return i
+
+    def _read_heredoc_redirection(self, i, heredocs):
+        """
+        Read the bash here-document redirection (e.g. <<EOF or <<-'EOF') or here-string (<<<) at index i.
+        The delimiter of a here-document is added to heredocs, along with whether the leading tabs of
+        its lines are stripped (<<-).
+
+        Returns:
+            The index of the next character to scan.
+        """
+        script = self.script
+        if script.startswith('<<<', i):
+            return i + 3
+        i += 2
+        strip_tabs = script.startswith('-', i)
+        i += 1 if strip_tabs else 0
+        while i < len(script) and script[i] in ' \t':
+            i += 1
+        end, delimiter = self._read_word(i, False)
+        if delimiter.value:
+            heredocs.append((delimiter.value, strip_tabs))
+        return max(end, i)
+
+    def _skip_heredoc_bodies(self, i, heredocs):
+        """
+        Skip the bodies of the here-documents that start at index i, one after another.
+
+        Returns:
+            The index of the line break that ends the delimiter line of the last body.
+        """
+        script = self.script
+        end = i
+        for delimiter, strip_tabs in heredocs:
+            while i < len(script):
+                end = script.find('\n', i)
+                end = len(script) if end == -1 else end
+                line = script[i:end].rstrip('\r')
+                i = end + 1
+                if (line.lstrip('\t') if strip_tabs else line) == delimiter:
+                    break
+        return min(end, len(script))
+
+    def _starts_substitution(self, i):
+        return self.script.startswith('$(', i) or (self.shell == POWERSHELL and self.script.startswith('@(', i))
+
+    def _is_az_word(self, i):
+        return self.script.startswith('az', i) and \
+            (i + 2 == len(self.script) or self.script[i + 2] in ' \t\r\n;&|)`')
+
+    def _get_line_continuation_length(self, i):
+        """
+        Get the length of the line continuation (an escaped line break) at index i, or 0 if there is none.
+        """
+        if self.script[i] != self.escape_char:
+            return 0
+        if self.script[i + 1:i + 2] == '\n':
+            return 2
+        return 3 if self.script[i + 1:i + 3] == '\r\n' else 0
+
+    def _skip_comment(self, i):
+        end = self.script.find('\n', i)
+        return len(self.script) if end == -1 else end
+
+    def _read_invocation(self, i, in_backticks):
+        """
+        Read the words of the invocation that starts at index i.
+
+        Returns:
+            A tuple with [0] being the end index of the invocation and [1] its words.
+        """
+        words = []
+        end = i
+        script = self.script
+        while i < len(script):
+            char = script[i]
+            if char in ' \t':
+                i += 1
+            elif self._get_line_continuation_length(i):
+                i += self._get_line_continuation_length(i)
+            elif char == '#' or char in _ARGUMENT_TERMINATORS[self.shell] or (in_backticks and char == '`'):
+                break
+            else:
+                word_end, word = self._read_word(i, in_backticks)
+                if word_end == i or script[word_end:word_end + 1] in ['<', '>'] and word.raw.isdigit():
+                    # A file descriptor redirection, e.g. 2>&1
+                    break
+                words.append(word)
+                i = end = word_end
+
+        return end, words
+
+    def _read_word(self, i, in_backticks):
+        """
+        Read the word that starts at index i. In a bash `command` substitution, a backtick ends the word.
+
+        Returns:
+            A tuple with [0] being the end index of the word and [1] the word.
+        """
+        script = self.script
+        start = i
+        value = []
+        is_dynamic = False
+        while i < len(script):
+            char = script[i]
+            if char in ' \t' or char in _ARGUMENT_TERMINATORS[self.shell] or (in_backticks and char == '`') or \
+                    self._get_line_continuation_length(i):
+                break
+            if char == self.escape_char:
+                value.append(script[i + 1:i + 2])
+                i += 2
+            elif char == "'":
+                i = self._read_single_quoted(i, value)
+            elif char == '"':
+                i, is_dynamic_string = self._read_double_quoted(i, value)
+                is_dynamic = is_dynamic or is_dynamic_string
+            elif char in _DYNAMIC_CHARS[self.shell]:
+                is_dynamic = True
+                i = self._skip_expansion(i)
+            else:
+                value.append(char)
+                i += 1
+
+        return i, ScriptWord(script[start:i], ''.join(value), is_dynamic)
+
+    def _read_single_quoted(self, i, value):
+        script = self.script
+        i += 1
+        while i < len(script):
+            if script[i] == "'":
+                # '' is an escaped quote in PowerShell
+                if self.shell == POWERSHELL and script[i + 1:i + 2] == "'":
+                    value.append("'")
+                    i += 2
+                    continue
+                return i + 1
+            value.append(script[i])
+            i += 1
+        return i
+
+    def _read_double_quoted(self, i, value):
+        script = self.script
+        is_dynamic = False
+        i += 1
+        while i < len(script):
+            char = script[i]
+            if char == '"':
+                if self.shell == POWERSHELL and script[i + 1:i + 2] == '"':
+                    value.append('"')
+                    i += 2
+                    continue
+                return i + 1, is_dynamic
+            if char == self.escape_char:
+                if self.shell == BASH and script[i + 1:i + 2] not in ['$', '`', '"', '\\', '\n']:
+                    value.append(char)
+                    i += 1
+                else:
+                    # PowerShell escape sequences such as `n have to be interpreted by the shell
+                    is_dynamic = is_dynamic or self.shell == POWERSHELL
+                    value.append(script[i + 1:i + 2])
+                    i += 2
+            elif char == '$' or (self.shell == BASH and char == '`'):
+                is_dynamic = True
+                i = self._skip_expansion(i)
+            else:
+                value.append(char)
+                i += 1
+        return i, is_dynamic
+
+    def _skip_expansion(self, i):
+        """
+        Skip a shell expansion, e.g. $VAR, ${VAR}, $(command), `command` or a glob character.
+        """
+        script = self.script
+        if script.startswith('$(', i) or script.startswith('@(', i) or script.startswith('${', i):
+            return self._skip_balanced(i + 1)
+        if script[i] in '({':
+            return self._skip_balanced(i)
+        if script[i] == '`':
+            end = script.find('`', i + 1)
+            return len(script) if end == -1 else end + 1
+        if script[i] == '$':
+            match = re.match(r'\$(env:)?\w*', script[i:])
+            return i + max(len(match.group(0)), 1)
+        return i + 1
+
+    def _skip_balanced(self, i):
+        """
+        Skip the bracketed expression that starts at index i.
+        """
+        opening = self.script[i]
+        closing = ')' if opening == '(' else '}'
+        depth = 0
+        while i < len(self.script):
+            if self.script[i] == opening:
+                depth += 1
+            elif self.script[i] == closing:
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return i
+
+
+def quote_arg(arg, shell):
+    """
+    Quote an argument for a shell. References to environment variables (e.g. $VAR) in the argument
+    are kept, so that the shell expands them like the alias extension would have.
+
+    Args:
+        arg: The argument to quote.
+        shell: 'bash' or 'powershell'.
+
+    Returns:
+        The quoted argument.
+    """
+    if _SAFE_ARG_PATTERN[shell].match(arg):
+        return arg
+
+    has_env_vars = bool(_ENV_VAR_PATTERN.search(arg))
+    if shell == BASH:
+        if has_env_vars:
+            return '"{}"'.format(re.sub(r'(["\\`])', r'\\\1', arg))
+        return "'{}'".format(arg.replace("'", "'\"'\"'"))
+
+    if has_env_vars:
+        arg = re.sub(r'(["`])', r'`\1', arg)
+        return '"{}"'.format(_ENV_VAR_PATTERN.sub(lambda match: '$env:' + match.group(1).strip('{}'), arg))
+    return "'{}'".format(arg.replace("'", "''"))
+
+
+def rewrite_invocation(alias_manager, words, shell):
+    """
+    Rewrite an az invocation into its fully expanded command.
+
+    Dynamic words are transformed as stand-ins. The invocation is transformed again with different
+    stand-ins, so that an alias that evaluates a dynamic word as a positional argument (and whose
+    result is therefore only known when the script runs) is detected.
+
+    Args:
+        alias_manager: The AliasManager used to transform the invocation.
+        words: The words of the invocation, starting with az.
+        shell: 'bash' or 'powershell'.
+
+    Returns:
+        The expanded invocation, or None if it does not contain any alias.
+    """
+    def get_args(stand_in_format):
+        return [stand_in_format.format(i) if word.is_dynamic else word.value for i, word in enumerate(words[1:])]
+
+    args = get_args(_STAND_IN_FORMATS[0])
+    transformed_args = alias_manager.transform(list(args), expand_env_vars=False)
+    if transformed_args == args:
+        return None
+
+    raw_args = {_STAND_IN_FORMATS[0].format(i): word.raw for i, word in enumerate(words[1:]) if word.is_dynamic}
+    if raw_args:
+        other_stand_ins = dict(zip(args, get_args(_STAND_IN_FORMATS[1])))
+        expected_args = [other_stand_ins[arg] if arg in raw_args else arg for arg in transformed_args]
+        if alias_manager.transform(get_args(_STAND_IN_FORMATS[1]), expand_env_vars=False) != expected_args:
+            raise CLIError(REWRITE_DYNAMIC_ARG_ERROR)
+
+    return ' '.join([words[0].raw] + [raw_args[arg] if arg in raw_args else quote_arg(arg, shell)
+                                      for arg in transformed_args])
+
+
+def rewrite_script(alias_manager, script, shell):
+    """
+    Rewrite every az invocation that contains an alias in a script into its fully expanded command.
+
+    Args:
+        alias_manager: The AliasManager used to transform every invocation.
+        script: The content of the script.
+        shell: 'bash' or 'powershell'.
+
+    Returns:
+        The rewritten script.
+    """
+    pieces = []
+    last_end = 0
+    for start, end, words in ScriptScanner(script, shell).find_az_invocations():
+        try:
+            rewritten = rewrite_invocation(alias_manager, words, shell)
+        except CLIError as exception:
+            logger.warning(REWRITE_SKIPPED_WARNING, script.count('\n', 0, start) + 1, exception)
+            rewritten = None
+
+        if rewritten is not None:
+            pieces += [script[last_end:start], rewritten]
+            last_end = end
+
+    pieces.append(script[last_end:])
+    return ''.join(pieces)
@@ -34,6 +34,7 @@ class AliasExtensionTelemetrySession(object):
         self.full_command_table_loaded = False
         self.aliases_hit = []
         self.number_of_aliases_registered = 0
+        self.phase_times = []
 
     def generate_payload(self):
         """
@@ -66,6 +67,8 @@ class AliasExtensionTelemetrySession(object):
         self.set_custom_properties(properties, 'CollidedAliases', ','.join(self.collided_aliases))
         self.set_custom_properties(properties, 'AliasesHit', ','.join(self.aliases_hit))
         self.set_custom_properties(properties, 'NumberOfAliasRegistered', self.number_of_aliases_registered)
+        self.set_custom_properties(properties, 'PhaseTimesMs',
+                                   ','.join('{}:{}'.format(name, duration) for name, duration in self.phase_times))
         self.set_custom_properties(properties, 'ActionType', 'Transformation')
 
         return properties
@@ -127,11 +130,27 @@ def set_alias_hit(alias_used):
     _session.add_alias_hit(alias_used)
 
 
+@decorators.suppress_all_exceptions(fallback_return=[])
+def get_aliases_hit():
+    return list(_session.aliases_hit)
+
+
+@decorators.suppress_all_exceptions(raise_in_diagnostics=True)
+def reset():
+    global _session  # pylint: disable=global-statement
+    _session = AliasExtensionTelemetrySession()
+
+
 @decorators.suppress_all_exceptions(raise_in_diagnostics=True)
 def set_number_of_aliases_registered(num_aliases):
     _session.number_of_aliases_registered = num_aliases
 
 
+@decorators.suppress_all_exceptions(raise_in_diagnostics=True)
+def set_phase_times(phase_times):
+    _session.phase_times = phase_times
+
+
 @decorators.suppress_all_exceptions(raise_in_diagnostics=True)
 def conclude():
     if not _session.aliases_hit and not _session.exceptions:
@@ -0,0 +1,45 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=line-too-long
+
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+
+import azext_alias
+import azext_alias.argument
+from azext_alias._const import ALIAS_FILE_NAME, ALIAS_STATE_FILE_NAME, ALIAS_TEMPLATE_CACHE_DIR_NAME
+from azext_alias.tests._const import TEST_RESERVED_COMMANDS
+
+
+class AliasTestCase(unittest.TestCase):
+    """
+    A test case that points the alias extension to a temporary config directory, so that the alias config file
+    (self.alias_path), the system-wide alias config file (self.system_alias_path, which does not exist unless
+    a test writes it), the alias state and the template cache of the tests never touch the user's.
+    """
+
+    def setUp(self):
+        self.mock_config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.mock_config_dir)
+        self.alias_path = os.path.join(self.mock_config_dir, ALIAS_FILE_NAME)
+        self.system_alias_path = os.path.join(self.mock_config_dir, 'system_alias')
+        self.start_patcher(mock.patch('azext_alias.cached_reserved_commands', TEST_RESERVED_COMMANDS))
+        self.start_patcher(mock.patch('azext_alias.alias.GLOBAL_ALIAS_PATH', self.alias_path))
+        self.start_patcher(mock.patch('azext_alias.alias.SYSTEM_ALIAS_PATH', self.system_alias_path))
+        self.start_patcher(mock.patch('azext_alias.util.GLOBAL_ALIAS_STATE_PATH', os.path.join(self.mock_config_dir, ALIAS_STATE_FILE_NAME)))
+        self.start_patcher(mock.patch('azext_alias.argument.GLOBAL_ALIAS_TEMPLATE_CACHE_DIR', os.path.join(self.mock_config_dir, ALIAS_TEMPLATE_CACHE_DIR_NAME)))
+        # The template environment caches the compiled templates in the template cache directory
+        azext_alias.argument._jinja_env = None  # pylint: disable=protected-access
+        self.addCleanup(setattr, azext_alias.argument, '_jinja_env', None)
+
+    def start_patcher(self, patcher):
+        """ Start a patcher, which is stopped when the test ends """
+        patched = patcher.start()
+        self.addCleanup(patcher.stop)
+        return patched
@@ -75,6 +75,20 @@ command = monitor
 command = account
 '''
 
+AMBIGUOUS_MOCK_ALIAS_STRING = '''
+[mn {{ arg_1 }}]
+command = monitor {{ arg_1 }}
+
+[mn]
+command = monitor
+
+[ac {{ arg_1 }}]
+command = account {{ arg_1 }}
+
+[ac {{ arg_1 }} {{ arg_2 }}]
+command = account {{ arg_1 }} {{ arg_2 }}
+'''
+
 MALFORMED_MOCK_ALIAS_STRING = '''
 [mn]
 command = monitor
@@ -8,19 +8,27 @@
 import os
 import sys
 import shlex
+import hashlib
+import threading
 import unittest
-from mock import Mock, patch
-from six.moves import configparser
+from collections import defaultdict
+from mock import patch
+from six.moves import builtins, configparser
 
 from knack.util import CLIError
 
 import azext_alias
+import azext_alias.alias
+import azext_alias.argument
+from azext_alias.util import AliasStateStore, get_config_parser, read_alias_state, get_alias_state_path, acquire_file_lock, release_file_lock, get_alias_state_lock_path, get_alias_state_lock_target_path
+from azext_alias._const import ALIAS_STATE_FILE_NAME, LOCAL_ALIAS_FILE_NAME, LOCAL_ALIAS_ENABLED_ENV_VAR, CONFIG_PARSING_ERROR
 from azext_alias.tests._const import (DEFAULT_MOCK_ALIAS_STRING,
                                       COLLISION_MOCK_ALIAS_STRING,
-                                      TEST_RESERVED_COMMANDS,
                                       DUP_SECTION_MOCK_ALIAS_STRING,
                                       DUP_OPTION_MOCK_ALIAS_STRING,
+                                      AMBIGUOUS_MOCK_ALIAS_STRING,
                                       MALFORMED_MOCK_ALIAS_STRING)
+from azext_alias.tests._base import AliasTestCase
 
 # Various test types
 TEST_TRANSFORM_ALIAS = 'test_transform_alias'
@@ -145,16 +153,12 @@ TEST_FN = {
 }
 
 
-class TestAlias(unittest.TestCase):
+class TestAlias(AliasTestCase):
 
     def setUp(self):
-        azext_alias.alias.AliasManager.write_alias_config_hash = Mock()
-        azext_alias.alias.AliasManager.write_collided_alias = Mock()
-        self.patcher = patch('azext_alias.cached_reserved_commands', TEST_RESERVED_COMMANDS)
-        self.patcher.start()
-
-    def tearDown(self):
-        self.patcher.stop()
+        super(TestAlias, self).setUp()
+        self.start_patcher(patch('azext_alias.util.AliasStateStore.write_invalid_alias_config'))
+        self.start_patcher(patch('azext_alias.util.AliasStateStore.write'))
 
     def test_build_empty_collision_table(self):
         alias_manager = self.get_alias_manager(DEFAULT_MOCK_ALIAS_STRING)
@@ -166,6 +170,71 @@ class TestAlias(unittest.TestCase):
         test_case = azext_alias.alias.AliasManager.build_collision_table(alias_manager.alias_table.sections(), levels=2)
         self.assertDictEqual({'account': [1, 2], 'dns': [2], 'list-locations': [2]}, test_case)
 
+    @patch('azext_alias.alias.get_cli_fingerprint', return_value=('2.0.28', ()))
+    def test_update_collision_table(self, _):
+        alias_state = {
+            'collided_alias': {'account': [1, 2], 'dns': [2]},
+            'collided_alias_sections': ['account', 'dns {{ arg_1 }}', 'mn'],
+            'cli_fingerprint': ('2.0.28', ())
+        }
+        with patch('azext_alias.alias.AliasManager.check_collisions', wraps=azext_alias.alias.AliasManager.check_collisions) as check_collisions:
+            test_case = azext_alias.alias.AliasManager.update_collision_table(alias_state, ['account', 'mn', 'list-locations', 'storage'], levels=2)
+        self.assertDictEqual({'account': [1, 2], 'list-locations': [2], 'storage': [1]}, test_case)
+        self.assertListEqual(['list-locations', 'storage'], check_collisions.call_args[0][1])
+
+    @patch('azext_alias.alias.get_cli_fingerprint', return_value=('2.0.29', ()))
+    def test_update_collision_table_cli_fingerprint_changed(self, _):
+        alias_state = {
+            'collided_alias': {'account': [1]},
+            'collided_alias_sections': ['account'],
+            'cli_fingerprint': ('2.0.28', ())
+        }
+        test_case = azext_alias.alias.AliasManager.update_collision_table(alias_state, ['account', 'dns'], levels=2)
+        self.assertDictEqual({'account': [1, 2], 'dns': [2]}, test_case)
+
+    def test_build_alias_index(self):
+        alias_manager = self.get_alias_manager()
+        self.assertEqual('mn', alias_manager.get_full_alias('mn'))
+        self.assertEqual('cp {{ arg_1 }} {{ arg_2 }}', alias_manager.get_full_alias('cp'))
+        self.assertEqual('cp {{ arg_1 }} {{ arg_2 }}', alias_manager.get_full_alias('cp {{ arg_1 }} {{ arg_2 }}'))
+        self.assertEqual('', alias_manager.get_full_alias('non-existing'))
+
+    def test_build_alias_expressions(self):
+        alias_manager = self.get_alias_manager()
+        self.assertListEqual(['arg_1', 'arg_2'], alias_manager.compiled_alias_table['expressions']['cp {{ arg_1 }} {{ arg_2 }}'])
+        self.assertNotIn('mn', alias_manager.compiled_alias_table['expressions'])
+
+    @patch('azext_alias.argument.get_placeholders', wraps=azext_alias.argument.get_placeholders)
+    def test_compile_alias_table_reuses_previous(self, mock_get_placeholders):
+        alias_table = self.get_alias_manager().alias_table
+        previous = azext_alias.alias.AliasManager.compile_alias_table(alias_table)
+        alias_table.set('mn', 'command', 'monitor metrics')
+        mock_get_placeholders.reset_mock()
+
+        compiled_alias_table = azext_alias.alias.AliasManager.compile_alias_table(alias_table, previous)
+        self.assertEqual(1, mock_get_placeholders.call_count)
+        self.assertListEqual(['monitor', 'metrics'], compiled_alias_table['tokens']['mn'])
+        self.assertDictEqual(previous['expressions'], compiled_alias_table['expressions'])
+        self.assertDictEqual(previous['placeholders'], compiled_alias_table['placeholders'])
+
+    def test_compile_alias_table_invalid_expression(self):
+        alias_table = get_config_parser()
+        alias_table.read_string(u'[cp {{ arg_1 }}]\ncommand = storage blob copy --url {{ arg_1.split( }}\n\n'
+                                u'[mn]\ncommand = monitor "metrics\n')
+        compiled_alias_table = azext_alias.alias.AliasManager.compile_alias_table(alias_table)
+        self.assertIn('cp {{ arg_1 }}', compiled_alias_table['commands'])
+        for alias in ['cp {{ arg_1 }}', 'mn']:
+            self.assertNotIn(alias, compiled_alias_table['placeholders'])
+            self.assertNotIn(alias, compiled_alias_table['expressions'])
+            self.assertNotIn(alias, compiled_alias_table['tokens'])
+
+    @patch('azext_alias.alias.logger')
+    def test_build_alias_index_ambiguous_first_word(self, mock_logger):
+        alias_manager = self.get_alias_manager(AMBIGUOUS_MOCK_ALIAS_STRING)
+        self.assertEqual('mn', alias_manager.get_full_alias('mn'))
+        self.assertEqual('ac {{ arg_1 }}', alias_manager.get_full_alias('ac'))
+        self.assertEqual(2, mock_logger.warning.call_count)
+
     def test_non_parse_error(self):
         alias_manager = self.get_alias_manager()
         self.assertFalse(alias_manager.parse_error())
@@ -197,8 +266,374 @@ class TestAlias(unittest.TestCase):
         self.assertEqual(shlex.split(value[1]), alias_manager.post_transform(shlex.split(value[0])))
 
 
+class TestAliasSnapshot(AliasTestCase):
+
+    def setUp(self):
+        super(TestAliasSnapshot, self).setUp()
+        with open(self.alias_path, 'w') as alias_config_file:
+            alias_config_file.write(DEFAULT_MOCK_ALIAS_STRING)
+        alias_table = get_config_parser()
+        alias_table.read(self.alias_path)
+        AliasStateStore().write(alias_table, 'test-hash', azext_alias.alias.get_alias_layers_stat(), {}, {})
+
+    def test_load_alias_snapshot(self):
+        with patch.object(azext_alias.alias.AliasManager, 'load_alias_table') as mock_load_alias_table:
+            alias_manager = azext_alias.alias.AliasManager()
+        self.assertFalse(mock_load_alias_table.called)
+        self.assertTrue(alias_manager.alias_state.snapshot_loaded)
+        self.assertEqual('test-hash', alias_manager.alias_config_hash)
+        self.assertEqual('cp {{ arg_1 }} {{ arg_2 }}', alias_manager.get_full_alias('cp'))
+        self.assertListEqual(['arg_1', 'arg_2'], alias_manager.compiled_alias_table['placeholders']['cp {{ arg_1 }} {{ arg_2 }}'])
+        self.assertListEqual(['list', '-otable'], alias_manager.compiled_alias_table['tokens']['ls'])
+
+    def test_load_alias_snapshot_ambiguous_alias_no_warning(self):
+        with open(self.alias_path, 'w') as alias_config_file:
+            alias_config_file.write(AMBIGUOUS_MOCK_ALIAS_STRING)
+        alias_table = get_config_parser()
+        alias_table.read(self.alias_path)
+        with patch('azext_alias.alias.logger') as mock_logger:
+            AliasStateStore().write(alias_table, 'test-hash', azext_alias.alias.get_alias_layers_stat(), {}, {})
+        self.assertEqual(2, mock_logger.warning.call_count)
+
+        for _ in range(2):
+            with patch('azext_alias.alias.logger') as mock_logger:
+                self.assertTrue(azext_alias.alias.AliasManager().alias_state.snapshot_loaded)
+            self.assertFalse(mock_logger.warning.called)
+
+    def test_load_alias_snapshot_modified_alias_file(self):
+        with open(self.alias_path, 'a') as alias_config_file:
+            alias_config_file.write('[grp]\ncommand = group\n')
+        alias_manager = azext_alias.alias.AliasManager()
+        self.assertFalse(alias_manager.alias_state.snapshot_loaded)
+        self.assertEqual('grp', alias_manager.get_full_alias('grp'))
+
+    def test_load_alias_state_corrupted(self):
+        with open(os.path.join(self.mock_config_dir, ALIAS_STATE_FILE_NAME), 'wb') as alias_state_file:
+            alias_state_file.write(b'corrupted')
+        alias_manager = azext_alias.alias.AliasManager()
+        self.assertFalse(alias_manager.alias_state.snapshot_loaded)
+        self.assertEqual('ls', alias_manager.get_full_alias('ls'))
+
+
+class TestAliasLayers(AliasTestCase):
+
+    def setUp(self):
+        super(TestAliasLayers, self).setUp()
+        self.repo_dir = os.path.join(self.mock_config_dir, 'repo')
+        self.cwd = os.path.join(self.repo_dir, 'src')
+        os.makedirs(self.cwd)
+        self.local_alias_path = os.path.join(self.repo_dir, LOCAL_ALIAS_FILE_NAME)
+        self.start_patcher(patch.dict('os.environ', {LOCAL_ALIAS_ENABLED_ENV_VAR: 'true'}))
+
+        self.write_alias_file(self.system_alias_path, '[ac]\ncommand = account\n\n[grp]\ncommand = group\n')
+        self.write_alias_file(azext_alias.alias.GLOBAL_ALIAS_PATH, '[grp]\ncommand = group list\n\n[ls]\ncommand = list\n')
+        self.write_alias_file(self.local_alias_path, '[ls]\ncommand = list -otable\n')
+
+    def test_find_local_alias_path(self):
+        self.assertEqual(self.local_alias_path, azext_alias.alias.find_local_alias_path(self.cwd))
+        self.assertEqual(self.local_alias_path, azext_alias.alias.find_local_alias_path(self.repo_dir))
+        self.assertIsNone(azext_alias.alias.find_local_alias_path(self.mock_config_dir))
+
+    def test_find_local_alias_path_disabled(self):
+        with patch.dict('os.environ', {LOCAL_ALIAS_ENABLED_ENV_VAR: ''}):
+            self.assertIsNone(azext_alias.alias.find_local_alias_path(self.cwd))
+
+    def test_find_local_alias_path_stops_at_repo_root(self):
+        os.makedirs(os.path.join(self.cwd, '.git'))
+        self.assertIsNone(azext_alias.alias.find_local_alias_path(self.cwd))
+
+    def test_find_local_alias_path_stops_at_home(self):
+        with patch('os.path.expanduser', return_value=self.cwd):
+            self.assertIsNone(azext_alias.alias.find_local_alias_path(self.cwd))
+
+    @unittest.skipIf(os.name == 'nt', 'Windows does not support POSIX file permissions')
+    def test_find_local_alias_path_writable_by_others(self):
+        os.chmod(self.local_alias_path, 0o666)
+        with patch('azext_alias.alias.logger') as mock_logger:
+            self.assertIsNone(azext_alias.alias.find_local_alias_path(self.cwd))
+        self.assertTrue(mock_logger.warning.called)
+
+    @unittest.skipIf(os.name == 'nt', 'Windows does not support POSIX file permissions')
+    def test_find_local_alias_path_owned_by_another_user(self):
+        with patch('os.getuid', return_value=os.getuid() + 1):
+            self.assertIsNone(azext_alias.alias.find_local_alias_path(self.cwd))
+
+    def test_get_alias_layers_stat(self):
+        self.assertListEqual([self.system_alias_path, azext_alias.alias.GLOBAL_ALIAS_PATH, self.local_alias_path],
+                             [path for path, _ in azext_alias.alias.get_alias_layers_stat(self.cwd)])
+        os.remove(self.system_alias_path)
+        self.assertListEqual([azext_alias.alias.GLOBAL_ALIAS_PATH],
+                             [path for path, _ in azext_alias.alias.get_alias_layers_stat(self.mock_config_dir)])
+
+    def test_load_alias_layers_precedence(self):
+        alias_table, _, _ = azext_alias.alias.load_alias_layers(self.cwd)
+        self.assertListEqual(['ls', 'grp', 'ac'], alias_table.sections())
+        self.assertEqual('list -otable', alias_table.get('ls', 'command'))
+        self.assertEqual('group list', alias_table.get('grp', 'command'))
+        self.assertEqual('account', alias_table.get('ac', 'command'))
+
+    def test_transform_layers(self):
+        self.assertListEqual(['account', 'group', 'list', 'list', '-otable'], self.transform(['ac', 'grp', 'ls'], self.cwd))
+        self.assertListEqual(['account', 'group', 'list', 'list'], self.transform(['ac', 'grp', 'ls'], self.mock_config_dir))
+
+    def test_alias_snapshot_invalidated_by_any_layer(self):
+        self.transform(['ls'], self.cwd)
+        self.assertTrue(azext_alias.alias.AliasManager(cwd=self.cwd).alias_state.snapshot_loaded)
+        self.write_alias_file(self.system_alias_path, '[ac]\ncommand = account list\n')
+        alias_manager = azext_alias.alias.AliasManager(cwd=self.cwd)
+        self.assertFalse(alias_manager.alias_state.snapshot_loaded)
+        self.assertListEqual(['account', 'list'], self.transform(['ac'], self.cwd))
+        # A different set of alias config files is in effect in another directory
+        self.assertFalse(azext_alias.alias.AliasManager(cwd=self.mock_config_dir).alias_state.snapshot_loaded)
+
+    def test_alias_snapshot_per_local_alias_path(self):
+        self.transform(['ls'], self.cwd)
+        self.transform(['ls'], self.mock_config_dir)
+        # Working in another directory does not invalidate the compiled alias table of this one
+        for cwd in [self.cwd, self.mock_config_dir, self.cwd]:
+            self.assertTrue(azext_alias.alias.AliasManager(cwd=cwd).alias_state.snapshot_loaded)
+        self.assertNotEqual(get_alias_state_path(), get_alias_state_path(self.local_alias_path))
+
+    @patch('azext_alias.util.MAX_LOCAL_ALIAS_STATES', 1)
+    def test_local_alias_states_pruned(self):
+        other_repo_dir = os.path.join(self.mock_config_dir, 'other_repo')
+        os.makedirs(other_repo_dir)
+        other_local_alias_path = os.path.join(other_repo_dir, LOCAL_ALIAS_FILE_NAME)
+        self.write_alias_file(other_local_alias_path, '[ls]\ncommand = list -ojson\n')
+        self.transform(['ls'], self.mock_config_dir)
+        self.transform(['ls'], self.cwd)
+        state_path = get_alias_state_path(self.local_alias_path)
+        # Make sure the other alias state file is the most recently written one
+        os.utime(state_path, (0, os.stat(state_path).st_mtime - 10))
+        self.assertListEqual(['list', '-ojson'], self.transform(['ls'], other_repo_dir))
+        self.assertFalse(os.path.exists(state_path))
+        self.assertTrue(os.path.exists(get_alias_state_path(other_local_alias_path)))
+        self.assertTrue(os.path.exists(get_alias_state_path()))
+
+    def test_alias_layer_parse_error(self):
+        self.write_alias_file(self.local_alias_path, '[ls\ncommand = list\n')
+        with patch('azext_alias.alias.logger') as mock_logger:
+            alias_manager = azext_alias.alias.AliasManager(cwd=self.cwd)
+        self.assertTrue(mock_logger.warning.called)
+        self.assertListEqual([], alias_manager.alias_table.sections())
+
+    def write_alias_file(self, path, alias_config_str):
+        with open(path, 'w') as alias_config_file:
+            alias_config_file.write(alias_config_str)
+        os.chmod(path, 0o644)
+        # Make sure the stat fingerprint changes even on file systems with a coarse modification time
+        os.utime(path, (0, os.stat(path).st_mtime + 1))
+
+    def transform(self, args, cwd):
+        alias_manager = azext_alias.alias.AliasManager(cwd=cwd, load_cmd_tbl_func=lambda _: {})
+        return alias_manager.post_transform(alias_manager.transform(args))
+
+
+class TestAliasStateRebuild(AliasTestCase):
+
+    def setUp(self):
+        super(TestAliasStateRebuild, self).setUp()
+
+        with open(azext_alias.alias.GLOBAL_ALIAS_PATH, 'w') as alias_config_file:
+            alias_config_file.write(DEFAULT_MOCK_ALIAS_STRING)
+        self.alias_config_hash = hashlib.sha1(DEFAULT_MOCK_ALIAS_STRING.encode('utf-8')).hexdigest()
+        self.lock_path = get_alias_state_lock_path()
+
+    def test_rebuild_releases_lock(self):
+        alias_manager = azext_alias.alias.AliasManager(load_cmd_tbl_func=lambda _: {})
+        with patch.object(alias_manager, 'load_full_command_table') as mock_load_full_command_table:
+            alias_manager.transform(['ac'])
+        self.assertTrue(mock_load_full_command_table.called)
+        self.assertEqual(self.alias_config_hash, read_alias_state()['alias_config_hash'])
+        lock_file = acquire_file_lock(self.lock_path, blocking=False)
+        self.assertIsNotNone(lock_file)
+        release_file_lock(lock_file)
+
+    def test_rebuild_by_another_process_for_another_alias_config(self):
+        lock_file = self.hold_lock('another-hash')
+        try:
+            alias_manager = azext_alias.alias.AliasManager(load_cmd_tbl_func=lambda _: {})
+            with patch.object(alias_manager, 'load_full_command_table') as mock_load_full_command_table, \
+                    patch('time.sleep') as mock_sleep:
+                self.assertListEqual(['account'], alias_manager.transform(['ac']))
+        finally:
+            release_file_lock(lock_file)
+        self.assertFalse(mock_load_full_command_table.called)
+        self.assertFalse(mock_sleep.called)
+        # The alias state is left to the process that rebuilds it
+        self.assertEqual('', read_alias_state()['alias_config_hash'])
+
+    def test_rebuild_by_another_process_for_same_alias_config(self):
+        lock_file = self.hold_lock(self.alias_config_hash)
+        write_alias_state = AliasStateStore.write
+
+        def rebuild_alias_state():
+            alias_table = get_config_parser()
+            alias_table.read(azext_alias.alias.GLOBAL_ALIAS_PATH)
+            write_alias_state(AliasStateStore(), alias_table, self.alias_config_hash, None, {'ac': [1]}, {})
+            release_file_lock(lock_file)
+
+        rebuild_thread = threading.Timer(0.2, rebuild_alias_state)
+        rebuild_thread.start()
+        try:
+            alias_manager = azext_alias.alias.AliasManager(load_cmd_tbl_func=lambda _: {})
+            with patch.object(alias_manager, 'load_full_command_table') as mock_load_full_command_table, \
+                    patch('azext_alias.util.AliasStateStore.write') as mock_write_alias_state:
+                # The collision table rebuilt by the other process is used
+                self.assertListEqual(['ac'], alias_manager.transform(['ac']))
+        finally:
+            rebuild_thread.join()
+        self.assertFalse(mock_load_full_command_table.called)
+        self.assertFalse(mock_write_alias_state.called)
+
+    def test_rebuild_by_another_process_timeout(self):
+        lock_file = self.hold_lock(self.alias_config_hash)
+        try:
+            alias_manager = azext_alias.alias.AliasManager(load_cmd_tbl_func=lambda _: {})
+            with patch.object(alias_manager, 'load_full_command_table') as mock_load_full_command_table, \
+                    patch('azext_alias.util.ALIAS_STATE_REBUILD_TIMEOUT', 0.1):
+                self.assertListEqual(['account'], alias_manager.transform(['ac']))
+        finally:
+            release_file_lock(lock_file)
+        self.assertFalse(mock_load_full_command_table.called)
+
+    def test_rebuild_writes_lock_target(self):
+        def load_full_command_table():
+            with open(get_alias_state_lock_target_path(), 'r') as lock_target_file:
+                self.assertEqual(self.alias_config_hash, lock_target_file.read())
+            # The locked byte of the lock file cannot be read on Windows, so nothing is written to it
+            self.assertEqual(0, os.path.getsize(self.lock_path))
+
+        alias_manager = azext_alias.alias.AliasManager(load_cmd_tbl_func=lambda _: {})
+        with patch.object(alias_manager, 'load_full_command_table', side_effect=load_full_command_table) as mock_load_full_command_table:
+            alias_manager.transform(['ac'])
+        self.assertTrue(mock_load_full_command_table.called)
+
+    def hold_lock(self, alias_config_hash):
+        """ Hold the alias state lock as another process rebuilding the alias state for alias_config_hash """
+        lock_file = acquire_file_lock(self.lock_path)
+        with open(get_alias_state_lock_target_path(), 'w') as lock_target_file:
+            lock_target_file.write(alias_config_hash)
+        return lock_file
+
+
+class TestAliasInvalidConfig(AliasTestCase):
+
+    def setUp(self):
+        super(TestAliasInvalidConfig, self).setUp()
+
+        self.write_alias_config('[ac\ncommand = account\n')
+        with patch('azext_alias.alias.logger') as mock_logger:
+            self.assertListEqual(['ac'], self.transform(['ac']))
+        self.parsing_error = mock_logger.warning.call_args[0][1]
+
+    def test_invalid_alias_config_recorded(self):
+        invalid_alias_config = read_alias_state()['invalid_alias_config']
+        self.assertEqual(hashlib.sha1(b'[ac\ncommand = account\n').hexdigest(), invalid_alias_config['alias_config_hash'])
+        self.assertEqual(self.parsing_error, invalid_alias_config['error'])
+        self.assertEqual('', read_alias_state()['alias_config_hash'])
+
+    def test_invalid_alias_config_not_parsed_again(self):
+        with patch('azext_alias.alias.logger') as mock_logger, \
+                patch('azext_alias.alias.AliasManager.load_alias_table') as mock_load_alias_table, \
+                patch('azext_alias.alias.AliasManager.load_full_command_table') as mock_load_full_command_table, \
+                patch('azext_alias.util.write_alias_state') as mock_write_alias_state:
+            self.assertListEqual(['ac'], self.transform(['ac']))
+        self.assertFalse(mock_load_alias_table.called)
+        self.assertFalse(mock_load_full_command_table.called)
+        self.assertFalse(mock_write_alias_state.called)
+        mock_logger.warning.assert_called_once_with(CONFIG_PARSING_ERROR, self.parsing_error)
+
+    def test_invalid_alias_config_touched(self):
+        self.write_alias_config('[ac\ncommand = account\n')
+        with patch('azext_alias.alias.logger') as mock_logger, \
+                patch('azext_alias.alias.merge_alias_layers') as mock_merge_alias_layers:
+            self.assertListEqual(['ac'], self.transform(['ac']))
+        self.assertFalse(mock_merge_alias_layers.called)
+        mock_logger.warning.assert_called_once_with(CONFIG_PARSING_ERROR, self.parsing_error)
+        self.assertEqual(azext_alias.alias.get_alias_layers_stat(), read_alias_state()['invalid_alias_config']['alias_stat'])
+
+    def test_invalid_alias_config_fixed(self):
+        self.write_alias_config('[ac]\ncommand = account\n')
+        with patch('azext_alias.alias.AliasManager.load_full_command_table') as mock_load_full_command_table:
+            self.assertListEqual(['account'], self.transform(['ac']))
+        self.assertTrue(mock_load_full_command_table.called)
+        self.assertIsNone(read_alias_state()['invalid_alias_config'])
+
+    def write_alias_config(self, alias_config_str):
+        with open(azext_alias.alias.GLOBAL_ALIAS_PATH, 'w') as alias_config_file:
+            alias_config_file.write(alias_config_str)
+        # Make sure the stat fingerprint changes even on file systems with a coarse modification time
+        os.utime(azext_alias.alias.GLOBAL_ALIAS_PATH, (0, os.stat(azext_alias.alias.GLOBAL_ALIAS_PATH).st_mtime + 1))
+
+    def transform(self, args):
+        alias_manager = azext_alias.alias.AliasManager(load_cmd_tbl_func=lambda _: {})
+        return alias_manager.transform(args)
+
+
+class TestAliasSteadyState(AliasTestCase):
+
+    def setUp(self):
+        super(TestAliasSteadyState, self).setUp()
+
+        with open(azext_alias.alias.GLOBAL_ALIAS_PATH, 'w') as alias_config_file:
+            alias_config_file.write(DEFAULT_MOCK_ALIAS_STRING)
+
+    def test_steady_state_writes_no_file(self):
+        # The first runs write the files derived from the alias config and the compiled template
+        self.transform(['ac', 'ls'])
+        self.transform(['cp', 'test1', 'test2'])
+
+        for args in [['ac', 'ls'], ['cp', 'test1', 'test2'], ['mn', 'diag'], ['vm', 'list']]:
+            self.assertEqual(0, self.count_file_writes(args))
+
+    def test_alias_config_change_writes_files(self):
+        self.transform(['ac', 'ls'])
+        with open(azext_alias.alias.GLOBAL_ALIAS_PATH, 'a') as alias_config_file:
+            alias_config_file.write('[grp]\ncommand = group\n')
+        self.assertNotEqual(0, self.count_file_writes(['grp', 'list']))
+        self.assertEqual(0, self.count_file_writes(['grp', 'list']))
+
+    def count_file_writes(self, args):
+        """ Count the number of files opened for writing or renamed when transforming args """
+        file_writes = []
+
+        def record_open(path, *args, **kwargs):
+            mode = args[0] if args else kwargs.get('mode', 'r')
+            if set(mode) & set('wax+'):
+                file_writes.append(path)
+            return real_open(path, *args, **kwargs)
+
+        def record_rename(func):
+            def wrapper(src, dst):
+                file_writes.append(dst)
+                return func(src, dst)
+            return wrapper
+
+        real_open = builtins.open
+        patchers = [patch.object(builtins, 'open', side_effect=record_open),
+                    patch('os.rename', side_effect=record_rename(os.rename))]
+        if hasattr(os, 'replace'):
+            patchers.append(patch('os.replace', side_effect=record_rename(os.replace)))
+        for patcher in patchers:
+            patcher.start()
+        try:
+            self.transform(args)
+        finally:
+            for patcher in patchers:
+                patcher.stop()
+        return len(file_writes)
+
+    def transform(self, args):
+        alias_manager = azext_alias.alias.AliasManager(load_cmd_tbl_func=lambda _: {})
+        return alias_manager.transform(args)
+
+
 class MockAliasManager(azext_alias.alias.AliasManager):
 
+    def load_alias_snapshot(self, alias_stat):
+        return False
+
     def load_alias_table(self):
 
         self.alias_config_str = self.kwargs.get('mock_alias_str', '')
@@ -214,11 +649,10 @@ class MockAliasManager(azext_alias.alias.AliasManager):
             self.alias_table = configparser.ConfigParser()
 
     def load_alias_hash(self):
-        import hashlib
         self.alias_config_hash = hashlib.sha1(self.alias_config_str.encode('utf-8')).hexdigest()
 
     def load_collided_alias(self):
-        pass
+        self.collided_alias = defaultdict(list)
 
 
 # Inject data-driven tests into TestAlias class
@@ -15,9 +15,8 @@ from azure.cli.testsdk import ScenarioTest
 from azext_alias import alias
 from azext_alias._const import (
     ALIAS_FILE_NAME,
-    ALIAS_HASH_FILE_NAME,
-    COLLIDED_ALIAS_FILE_NAME,
-    ALIAS_TAB_COMP_TABLE_FILE_NAME
+    ALIAS_STATE_FILE_NAME,
+    RESERVED_COMMANDS_FILE_NAME
 )
 
 
@@ -28,9 +27,8 @@ class AliasTests(ScenarioTest):
         self.patchers = []
         self.patchers.append(mock.patch('azext_alias.alias.GLOBAL_CONFIG_DIR', self.mock_config_dir))
         self.patchers.append(mock.patch('azext_alias.alias.GLOBAL_ALIAS_PATH', os.path.join(self.mock_config_dir, ALIAS_FILE_NAME)))
-        self.patchers.append(mock.patch('azext_alias.alias.GLOBAL_ALIAS_HASH_PATH', os.path.join(self.mock_config_dir, ALIAS_HASH_FILE_NAME)))
-        self.patchers.append(mock.patch('azext_alias.alias.GLOBAL_COLLIDED_ALIAS_PATH', os.path.join(self.mock_config_dir, COLLIDED_ALIAS_FILE_NAME)))
-        self.patchers.append(mock.patch('azext_alias.util.GLOBAL_ALIAS_TAB_COMP_TABLE_PATH', os.path.join(self.mock_config_dir, ALIAS_TAB_COMP_TABLE_FILE_NAME)))
+        self.patchers.append(mock.patch('azext_alias.util.GLOBAL_ALIAS_STATE_PATH', os.path.join(self.mock_config_dir, ALIAS_STATE_FILE_NAME)))
+        self.patchers.append(mock.patch('azext_alias.util.GLOBAL_RESERVED_COMMANDS_PATH', os.path.join(self.mock_config_dir, RESERVED_COMMANDS_FILE_NAME)))
         self.patchers.append(mock.patch('azext_alias.custom.GLOBAL_ALIAS_PATH', os.path.join(self.mock_config_dir, ALIAS_FILE_NAME)))
         os.makedirs(os.path.join(self.mock_config_dir, 'export'))
         for patcher in self.patchers:
@@ -230,6 +228,17 @@ command = create
             self.check('length(@)', 1)
         ])
 
+    def test_expand_file(self):
+        self.cmd('az alias create -n grp -c group')
+        source_path = os.path.join(self.mock_config_dir, 'commands')
+        destination_path = os.path.join(self.mock_config_dir, 'expanded')
+        with open(source_path, 'w') as f:
+            f.write('az grp list\naz vm list\n')
+
+        self.cmd('az alias expand -s {} -d {}'.format(source_path, destination_path))
+        with open(destination_path, 'r') as f:
+            self.assertEqual('az group list\naz vm list\n', f.read())
+
     @mock.patch('os.getcwd')
     def test_export_file_name_only(self, mock_os_getcwd):
         mock_os_getcwd.return_value = os.path.join(self.mock_config_dir, 'export')
@@ -5,21 +5,39 @@
 
 # pylint: disable=line-too-long,no-self-use,too-many-public-methods
 
+import os
+import shutil
+import tempfile
 import unittest
+from mock import patch
 
 from knack.util import CLIError
 
+import azext_alias
 from azext_alias.argument import (
+    get_jinja_env,
     get_placeholders,
     normalize_placeholders,
     build_pos_args_table,
     render_template,
+    compile_placeholder_expression,
     check_runtime_errors
 )
 
 
 class TestArgument(unittest.TestCase):
 
+    def setUp(self):
+        self.mock_template_cache_dir = tempfile.mkdtemp()
+        self.patcher = patch('azext_alias.argument.GLOBAL_ALIAS_TEMPLATE_CACHE_DIR', self.mock_template_cache_dir)
+        self.patcher.start()
+        azext_alias.argument._jinja_env = None  # pylint: disable=protected-access
+
+    def tearDown(self):
+        self.patcher.stop()
+        azext_alias.argument._jinja_env = None  # pylint: disable=protected-access
+        shutil.rmtree(self.mock_template_cache_dir)
+
     def test_get_placeholders(self):
         self.assertListEqual(['arg_1', 'arg_2'], get_placeholders('{{ arg_1 }} {{ arg_2 }}'))
 
@@ -119,6 +137,32 @@ class TestArgument(unittest.TestCase):
             render_template('{{ arg_1 }} {{ arg_2 }', pos_args_table)
         self.assertEqual(str(cm.exception), 'alias: Encounted error when injecting positional arguments to ""{{ arg_1 }}" "{{ arg_2 }". Error detail: unexpected \'}\'')
 
+    def test_render_template_bytecode_cache(self):
+        pos_args_table = {
+            'arg_1': 'test_1',
+            'arg_2': 'test_2'
+        }
+        self.assertListEqual(['test_1', 'test_2'], render_template('{{ arg_1 }} {{ arg_2 }}', pos_args_table))
+        self.assertEqual(1, len(os.listdir(self.mock_template_cache_dir)))
+
+        # Simulate a new az invocation, which should load the compiled template from the bytecode cache
+        azext_alias.argument._jinja_env = None  # pylint: disable=protected-access
+        with patch.object(get_jinja_env(), 'compile') as mock_compile:
+            self.assertListEqual(['test_1', 'test_2'], render_template('{{ arg_1 }} {{ arg_2 }}', pos_args_table))
+            self.assertFalse(mock_compile.called)
+
+    def test_render_template_corrupted_bytecode_cache(self):
+        pos_args_table = {
+            'arg_1': 'test_1'
+        }
+        render_template('{{ arg_1 }}', pos_args_table)
+        for cache_file in os.listdir(self.mock_template_cache_dir):
+            with open(os.path.join(self.mock_template_cache_dir, cache_file), 'wb') as f:
+                f.write(b'corrupted')
+
+        azext_alias.argument._jinja_env = None  # pylint: disable=protected-access
+        self.assertListEqual(['test_1'], render_template('{{ arg_1 }}', pos_args_table))
+
     def test_check_runtime_errors_no_error(self):
         pos_args_table = {
             'arg_1': 'test_1',
@@ -135,6 +179,28 @@ class TestArgument(unittest.TestCase):
             check_runtime_errors('{{ arg_1.split("_")[2] }} {{ arg_2.split("_")[1] }}', pos_args_table)
         self.assertEqual(str(cm.exception), 'alias: Encounted error when evaluating "arg_1.split("_")[2]". Error detail: list index out of range')
 
+    def test_check_runtime_errors_precomputed_expressions(self):
+        pos_args_table = {
+            'arg_1': 'test_1'
+        }
+        check_runtime_errors('{{ arg_1.split("_")[2] }}', pos_args_table, expressions=['arg_1.split("_")[0]'])
+        with self.assertRaises(CLIError):
+            check_runtime_errors('{{ arg_1.split("_")[0] }}', pos_args_table, expressions=['arg_1.split("_")[2]'])
+
+    def test_check_runtime_errors_escaped_quotes(self):
+        pos_args_table = build_pos_args_table('test {{ arg_1 }}', ['test', 'a"b'], 1)
+        check_runtime_errors('{{ arg_1.split(\'"\')[1] }}', pos_args_table)
+
+    def test_check_runtime_errors_syntax_error(self):
+        with self.assertRaises(CLIError) as cm:
+            check_runtime_errors('{{ arg_1[ }}', {'arg_1': 'test_1'}, expressions=['arg_1['])
+        self.assertIn('alias: Encounted error when evaluating "arg_1["', str(cm.exception))
+
+    def test_compile_placeholder_expression(self):
+        code = compile_placeholder_expression('arg_1.split("_")[0]')
+        self.assertIs(code, compile_placeholder_expression('arg_1.split("_")[0]'))
+        self.assertEqual('test', eval(code, {}, {'arg_1': 'test_1'}))  # pylint: disable=eval-used
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,92 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=line-too-long
+
+import os
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+import mock
+
+from azext_alias.util import get_config_parser
+from azext_alias._const import ALIAS_FILE_NAME, ALIAS_STATE_FILE_NAME, ALIAS_TEMPLATE_CACHE_DIR_NAME
+from azext_alias.tests._const import TEST_RESERVED_COMMANDS
+
+NUMBER_OF_READERS = 4
+NUMBER_OF_WRITERS = 2
+READS_PER_READER = 200
+ALIASES_PER_WRITER = 20
+
+
+def patch_config_dir(config_dir):
+    """ Point the alias extension to config_dir in a child process """
+    alias_path = os.path.join(config_dir, ALIAS_FILE_NAME)
+    patchers = [
+        mock.patch('azext_alias.cached_reserved_commands', TEST_RESERVED_COMMANDS),
+        mock.patch('azext_alias.alias.GLOBAL_ALIAS_PATH', alias_path),
+        mock.patch('azext_alias.alias.SYSTEM_ALIAS_PATH', os.path.join(config_dir, 'system_alias')),
+        mock.patch('azext_alias.custom.GLOBAL_ALIAS_PATH', alias_path),
+        mock.patch('azext_alias.util.GLOBAL_ALIAS_STATE_PATH', os.path.join(config_dir, ALIAS_STATE_FILE_NAME)),
+        mock.patch('azext_alias.argument.GLOBAL_ALIAS_TEMPLATE_CACHE_DIR', os.path.join(config_dir, ALIAS_TEMPLATE_CACHE_DIR_NAME))
+    ]
+    for patcher in patchers:
+        patcher.start()
+
+
+def read_aliases(config_dir):
+    from azext_alias.alias import load_alias_layers
+
+    patch_config_dir(config_dir)
+    number_of_aliases = 0
+    for _ in range(READS_PER_READER):
+        alias_table, alias_config_str, _ = load_alias_layers(config_dir)
+        aliases = alias_table.sections()
+        # A partially written alias config file would lose aliases or fail to parse
+        assert len(aliases) >= number_of_aliases, 'Read {} aliases after {}'.format(len(aliases), number_of_aliases)
+        assert alias_config_str.count('[') == len(aliases), 'Parsed aliases do not match the alias config read'
+        assert all(alias_table.get(alias, 'command') == 'account list-locations' for alias in aliases)
+        number_of_aliases = len(aliases)
+    return number_of_aliases
+
+
+def create_aliases(config_dir, writer):
+    from azext_alias.custom import create_alias
+
+    patch_config_dir(config_dir)
+    for i in range(ALIASES_PER_WRITER):
+        create_alias('w{}_{}'.format(writer, i), 'account list-locations')
+
+
+class TestConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_config_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.mock_config_dir, ALIAS_FILE_NAME), 'w') as alias_config_file:
+            alias_config_file.write('[w_0]\ncommand = account list-locations\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.mock_config_dir)
+
+    def test_concurrent_readers_and_writers(self):
+        pool = multiprocessing.Pool(NUMBER_OF_READERS + NUMBER_OF_WRITERS)
+        try:
+            readers = [pool.apply_async(read_aliases, (self.mock_config_dir,)) for _ in range(NUMBER_OF_READERS)]
+            writers = [pool.apply_async(create_aliases, (self.mock_config_dir, writer)) for writer in range(NUMBER_OF_WRITERS)]
+            for result in writers + readers:
+                result.get(timeout=120)
+        finally:
+            pool.terminate()
+
+        # The writer lock serializes the changes, so none of them is lost
+        alias_table = get_config_parser()
+        alias_table.read(os.path.join(self.mock_config_dir, ALIAS_FILE_NAME))
+        self.assertEqual(1 + NUMBER_OF_WRITERS * ALIASES_PER_WRITER, len(alias_table.sections()))
+        self.assertFalse([name for name in os.listdir(self.mock_config_dir) if name.endswith('.tmp')])
+
+
+if __name__ == '__main__':
+    unittest.main()
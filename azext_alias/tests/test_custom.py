@@ -5,30 +5,31 @@
 
 # pylint: disable=line-too-long,no-self-use,protected-access
 
+import os
+import tempfile
 import unittest
-from mock import Mock, patch
+from mock import patch
 
 from knack.util import CLIError
 
-import azext_alias
 from azext_alias.util import get_config_parser
-from azext_alias.tests._const import TEST_RESERVED_COMMANDS
+from azext_alias.tests._base import AliasTestCase
 from azext_alias.custom import (
+    _commit_change,
     create_alias,
+    import_aliases,
     list_alias,
     remove_alias,
 )
 
 
-class AliasCustomCommandTest(unittest.TestCase):
+class AliasCustomCommandTest(AliasTestCase):
 
     def setUp(self):
-        self.patcher = patch('azext_alias.cached_reserved_commands', TEST_RESERVED_COMMANDS)
-        self.patcher.start()
-        azext_alias.custom._commit_change = Mock()
-
-    def tearDown(self):
-        self.patcher.stop()
+        super(AliasCustomCommandTest, self).setUp()
+        # The alias writer lock file is created next to the alias config file
+        self.start_patcher(patch('azext_alias.custom.GLOBAL_ALIAS_PATH', self.alias_path))
+        self.mock_commit_change = self.start_patcher(patch('azext_alias.custom._commit_change'))
 
     def test_create_alias(self):
         create_alias('ac', 'account')
@@ -52,14 +53,14 @@ class AliasCustomCommandTest(unittest.TestCase):
         mock_alias_table = get_config_parser()
         mock_alias_table.add_section('ac')
         mock_alias_table.set('ac', 'command', 'account')
-        azext_alias.custom.get_alias_table = Mock(return_value=mock_alias_table)
+        self.mock_get_merged_alias_table(mock_alias_table)
         self.assertListEqual([{'alias': 'ac', 'command': 'account'}], list_alias())
 
     def test_list_alias_key_misspell(self):
         mock_alias_table = get_config_parser()
         mock_alias_table.add_section('ac')
         mock_alias_table.set('ac', 'cmmand', 'account')
-        azext_alias.custom.get_alias_table = Mock(return_value=mock_alias_table)
+        self.mock_get_merged_alias_table(mock_alias_table)
         self.assertListEqual([], list_alias())
 
     def test_list_alias_multiple_alias(self):
@@ -68,18 +69,71 @@ class AliasCustomCommandTest(unittest.TestCase):
         mock_alias_table.set('ac', 'command', 'account')
         mock_alias_table.add_section('dns')
         mock_alias_table.set('dns', 'command', 'network dns')
-        azext_alias.custom.get_alias_table = Mock(return_value=mock_alias_table)
+        self.mock_get_merged_alias_table(mock_alias_table)
         self.assertListEqual([{'alias': 'ac', 'command': 'account'}, {'alias': 'dns', 'command': 'network dns'}], list_alias())
 
+    def test_list_alias_layers(self):
+        with open(self.system_alias_path, 'w') as system_alias_file:
+            system_alias_file.write('[ac]\ncommand = account\n\n[grp]\ncommand = group\n')
+        with open(self.alias_path, 'w') as alias_file:
+            alias_file.write('[grp]\ncommand = group list\n')
+        self.assertListEqual([{'alias': 'grp', 'command': 'group list'}, {'alias': 'ac', 'command': 'account'}], list_alias())
+
     def test_remove_alias_remove_non_existing_alias(self):
         mock_alias_table = get_config_parser()
         mock_alias_table.add_section('ac')
         mock_alias_table.set('ac', 'command', 'account')
-        azext_alias.custom.get_alias_table = Mock(return_value=mock_alias_table)
+        self.mock_get_alias_table(mock_alias_table)
         with self.assertRaises(CLIError) as cm:
             remove_alias(['dns'])
         self.assertEqual(str(cm.exception), 'alias: "dns" alias not found')
 
+    def test_import_aliases(self):
+        mock_alias_table = get_config_parser()
+        mock_alias_table.add_section('ac')
+        mock_alias_table.set('ac', 'command', 'account')
+        mock_alias_table.add_section('dns')
+        mock_alias_table.set('dns', 'command', 'network dns')
+        self.mock_get_alias_table(mock_alias_table)
+        alias_source = self.write_alias_source('[ac]\ncommand = account\n\n[dns]\ncommand = network dns record-set\n\n[ll]\ncommand = list-locations\n')
+        import_aliases(alias_source)
+        self.mock_commit_change.assert_called_once_with(mock_alias_table, changed_aliases=['dns', 'll'])
+        self.assertEqual('network dns record-set', mock_alias_table.get('dns', 'command'))
+        self.assertEqual('list-locations', mock_alias_table.get('ll', 'command'))
+
+    def test_import_aliases_no_change(self):
+        mock_alias_table = get_config_parser()
+        mock_alias_table.add_section('ac')
+        mock_alias_table.set('ac', 'command', 'account')
+        mock_alias_table.add_section('dns')
+        mock_alias_table.set('dns', 'command', 'network dns')
+        self.mock_get_alias_table(mock_alias_table)
+        import_aliases(self.write_alias_source('[ac]\ncommand = account\n'))
+        self.assertFalse(self.mock_commit_change.called)
+
+    def test_commit_change_non_ascii(self):
+        alias_table = get_config_parser()
+        alias_table.add_section('greet')
+        alias_table.set('greet', 'command', u'group create -n gr\u00fc\u00df')
+        export_path = os.path.join(self.mock_config_dir, 'exported_alias')
+        # The patched _commit_change in setUp does not affect the function imported at module load
+        _commit_change(alias_table, export_path=export_path, post_commit=False)
+        with open(export_path, 'rb') as exported_file:
+            self.assertIn(u'gr\u00fc\u00df'.encode('utf-8'), exported_file.read())
+
+    def mock_get_alias_table(self, alias_table):
+        self.start_patcher(patch('azext_alias.custom.get_alias_table', return_value=alias_table))
+
+    def mock_get_merged_alias_table(self, alias_table):
+        self.start_patcher(patch('azext_alias.custom.get_merged_alias_table', return_value=alias_table))
+
+    def write_alias_source(self, alias_config_str):
+        fd, alias_source = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as alias_source_file:
+            alias_source_file.write(alias_config_str)
+        self.addCleanup(os.remove, alias_source)
+        return alias_source
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,123 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=line-too-long
+
+import os
+import time
+import threading
+import unittest
+import mock
+
+from knack.util import CLIError
+
+from azext_alias import daemon
+from azext_alias.alias import AliasManager
+from azext_alias.tests._base import AliasTestCase
+
+TEST_ALIAS_STRING = '''
+[grp]
+command = group
+
+[home]
+command = --path $HOME
+
+[gd {{ name }}]
+command = group delete -n {{ name }}
+'''
+
+
+@unittest.skipUnless(hasattr(daemon.socket, 'AF_UNIX'), 'Unix domain sockets are not supported')
+class TestDaemon(AliasTestCase):
+
+    def setUp(self):
+        super(TestDaemon, self).setUp()
+        self.socket_path = os.path.join(self.mock_config_dir, 'alias_daemon.sock')
+        self.write_alias_config(TEST_ALIAS_STRING)
+        self.alias_daemon = daemon.AliasDaemon()
+
+    def write_alias_config(self, alias_config):
+        with open(self.alias_path, 'w') as alias_file:
+            alias_file.write(alias_config)
+        # An in-process transform writes the alias state that the daemon serves from
+        AliasManager(load_cmd_tbl_func=lambda _: {}).transform(['vm', 'list'])
+
+    def test_handle_request(self):
+        self.assertDictEqual({'args': ['group', '--path', '$HOME'], 'aliases_hit': ['grp', 'home']},
+                             self.alias_daemon.handle_request({'args': ['grp', 'home']}))
+
+    def test_handle_request_error(self):
+        response = self.alias_daemon.handle_request({'args': ['gd']})
+        self.assertIn('takes exactly 1 positional argument', response['error'])
+
+    def test_handle_request_stale_alias_state(self):
+        with open(self.alias_path, 'a') as alias_file:
+            alias_file.write('[ac]\ncommand = account\n')
+        self.assertDictEqual({'fallback': True}, self.alias_daemon.handle_request({'args': ['ac', 'list']}))
+
+    def test_handle_request_alias_config_change(self):
+        self.alias_daemon.handle_request({'args': ['grp']})
+        # Make sure the alias config file stat changes
+        time.sleep(0.01)
+        self.write_alias_config('[grp]\ncommand = group list\n')
+        self.assertEqual(['group', 'list'], self.alias_daemon.handle_request({'args': ['grp']})['args'])
+
+    def test_handle_command(self):
+        self.assertDictEqual({}, self.alias_daemon.handle_request({'command': 'status'}))
+        self.assertFalse(self.alias_daemon.stopped)
+        self.alias_daemon.handle_request({'command': 'stop'})
+        self.assertTrue(self.alias_daemon.stopped)
+
+    def test_request_transform_no_daemon(self):
+        self.assertIsNone(daemon.request_transform(['grp'], self.socket_path))
+        # The socket of a daemon that did not exit cleanly
+        open(self.socket_path, 'w').close()
+        self.assertIsNone(daemon.request_transform(['grp'], self.socket_path))
+
+    @mock.patch.dict(os.environ, {'HOME': '/home/test'})
+    def test_serve(self):
+        server_thread = threading.Thread(target=daemon.serve, args=(self.socket_path,))
+        server_thread.start()
+        try:
+            for _ in range(100):
+                if daemon.is_daemon_running(self.socket_path):
+                    break
+                time.sleep(0.01)
+
+            self.assertEqual(['group', '--path', '/home/test'], daemon.request_transform(['grp', 'home'], self.socket_path))
+            with self.assertRaises(CLIError):
+                daemon.request_transform(['gd'], self.socket_path)
+            with self.assertRaises(CLIError):
+                daemon.serve(self.socket_path)
+        finally:
+            daemon.stop(self.socket_path)
+            server_thread.join()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+        with self.assertRaises(CLIError):
+            daemon.stop(self.socket_path)
+
+    def test_serve_idle_client(self):
+        server_thread = threading.Thread(target=daemon.serve, args=(self.socket_path,))
+        server_thread.start()
+        idle_client = daemon.socket.socket(daemon.socket.AF_UNIX, daemon.socket.SOCK_STREAM)  # pylint: disable=no-member
+        try:
+            for _ in range(100):
+                if daemon.is_daemon_running(self.socket_path):
+                    break
+                time.sleep(0.01)
+
+            # A client that never sends its request is disconnected instead of blocking the daemon
+            idle_client.connect(self.socket_path)
+            with mock.patch('azext_alias.daemon.ALIAS_DAEMON_TIMEOUT', 5):
+                self.assertEqual(['group'], daemon.request_transform(['grp'], self.socket_path))
+        finally:
+            idle_client.close()
+            daemon.stop(self.socket_path)
+            server_thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
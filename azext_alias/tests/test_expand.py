@@ -0,0 +1,80 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=line-too-long
+
+import os
+import unittest
+import mock
+from six import StringIO
+
+from knack.util import CLIError
+
+from azext_alias.alias import AliasManager
+from azext_alias.expand import expand_command_lines, expand_stream
+from azext_alias.tests._base import AliasTestCase
+
+TEST_ALIAS_STRING = '''
+[grp]
+command = group
+
+[ls]
+command = list -o table
+
+[gd {{ name }}]
+command = group delete -n {{ name }} --yes
+'''
+
+
+class TestExpand(AliasTestCase):
+
+    def setUp(self):
+        super(TestExpand, self).setUp()
+        with open(self.alias_path, 'w') as alias_file:
+            alias_file.write(TEST_ALIAS_STRING)
+
+    def test_expand_command_lines(self):
+        lines = ['az grp ls', 'grp ls', '', 'az gd "my group"', 'az vm list']
+        self.assertListEqual(['az group list -o table', 'group list -o table', '', "az group delete -n 'my group' --yes", 'az vm list'],
+                             list(expand_command_lines(AliasManager(), lines)))
+
+    def test_expand_command_lines_keeps_env_vars(self):
+        with mock.patch.dict('os.environ', {'AZ_ALIAS_TEST_GROUP': 'expanded'}):
+            self.assertListEqual(['az group delete -n "$AZ_ALIAS_TEST_GROUP" --yes'],
+                                 list(expand_command_lines(AliasManager(), ['az gd $AZ_ALIAS_TEST_GROUP'])))
+
+    def test_expand_command_lines_is_lazy(self):
+        def lines():
+            yield 'az grp ls'
+            raise AssertionError('The next line should not be read')
+
+        self.assertEqual('az group list -o table', next(expand_command_lines(AliasManager(), lines())))
+
+    def test_expand_command_lines_error(self):
+        with self.assertRaises(CLIError) as cm:
+            list(expand_command_lines(AliasManager(), ['az grp ls', 'az gd']))
+        self.assertIn('line 2', str(cm.exception))
+
+    def test_expand_stream_single_alias_manager(self):
+        AliasManager(load_cmd_tbl_func=lambda _: {}).transform(['vm', 'list'])
+        # Touching the alias config file makes the compiled alias table stale, but not the collision table
+        os.utime(self.alias_path, (0, os.stat(self.alias_path).st_mtime + 1))
+        output_stream = StringIO()
+        with mock.patch('azext_alias.util.write_alias_state') as mock_write_alias_state:
+            expand_stream(StringIO(u'az grp ls\naz gd test\n'), output_stream)
+        self.assertEqual('az group list -o table\naz group delete -n test --yes\n', output_stream.getvalue())
+        self.assertEqual(1, mock_write_alias_state.call_count)
+
+    def test_expand_stream_stale_alias_state(self):
+        with open(self.alias_path, 'w') as alias_file:
+            alias_file.write('[account]\ncommand = group\n')
+        # expand runs without the command table, so it must not rebuild the collision table
+        with mock.patch('azext_alias.cached_reserved_commands', []):
+            expand_stream(StringIO(u'az vm list\n'), StringIO())
+        self.assertListEqual(['account', 'list-locations'], AliasManager(load_cmd_tbl_func=lambda _: {}).transform(['account', 'list-locations']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=line-too-long
+
+import os
+import json
+import mock
+
+import azext_alias
+from azext_alias.alias import get_alias_layers_stat
+from azext_alias.hooks import alias_event_handler, enable_aliases_autocomplete
+from azext_alias.util import build_tab_completion_table, get_alias_table, AliasStateStore
+from azext_alias._const import ALIAS_TRACE_FILE_ENV_VAR
+from azext_alias.tests._base import AliasTestCase
+
+TEST_ALIAS_STRING = '''
+[grp]
+command = group
+
+[ac]
+command = account
+
+[ll]
+command = list-locations
+
+[gd {{ name }}]
+command = group delete -n {{ name }}
+'''
+
+
+class TestHooks(AliasTestCase):
+
+    def setUp(self):
+        super(TestHooks, self).setUp()
+        with open(self.alias_path, 'w') as alias_file:
+            alias_file.write(TEST_ALIAS_STRING)
+        alias_table = get_alias_table()
+        AliasStateStore().write(alias_table, '', get_alias_layers_stat(), {}, build_tab_completion_table(alias_table))
+
+    def test_enable_aliases_autocomplete(self):
+        self.assertEqual(['gd', 'grp'], self.autocomplete(['az'], 'g'))
+
+    def test_enable_aliases_autocomplete_single_completion(self):
+        self.assertEqual(['ll '], self.autocomplete(['az', 'account'], 'l'))
+
+    def test_enable_aliases_autocomplete_chained_alias(self):
+        self.assertEqual(['ll '], self.autocomplete(['az', 'ac'], ''))
+
+    def test_enable_aliases_autocomplete_no_completion(self):
+        self.assertEqual([], self.autocomplete(['az', 'group'], 'l'))
+
+    def test_enable_aliases_autocomplete_reads_state_once(self):
+        with mock.patch('azext_alias.hooks.read_alias_state', wraps=azext_alias.util.read_alias_state) as read_alias_state:
+            self.autocomplete(['az'], '')
+        self.assertEqual(1, read_alias_state.call_count)
+
+    def test_enable_aliases_autocomplete_uses_completion_index(self):
+        with mock.patch('azext_alias.util.remove_pos_arg_placeholders') as remove_pos_arg_placeholders:
+            self.assertEqual(['gd', 'grp'], self.autocomplete(['az'], 'g'))
+        self.assertFalse(remove_pos_arg_placeholders.called)
+
+    def test_enable_aliases_autocomplete_modified_alias_file(self):
+        with open(self.alias_path, 'a') as alias_file:
+            alias_file.write('[gl]\ncommand = group\n')
+        self.assertEqual(['gd', 'gl', 'grp'], self.autocomplete(['az'], 'g'))
+
+    def test_alias_event_handler_trace(self):
+        trace_path = os.path.join(self.mock_config_dir, 'trace.jsonl')
+        args = ['grp', 'list']
+        with mock.patch.dict(os.environ, {ALIAS_TRACE_FILE_ENV_VAR: trace_path}):
+            alias_event_handler(None, args=args)
+        self.assertListEqual(['group', 'list'], args)
+
+        with open(trace_path, 'r') as trace_file:
+            trace = json.loads(trace_file.read())
+        span_names = [span['name'] for span in trace['spans']]
+        self.assertIn('read_alias_state', span_names)
+        self.assertIn('load_alias_snapshot', span_names)
+        self.assertNotIn('parse_alias_config', span_names)
+
+    @mock.patch('azext_alias.hooks.AliasManager')
+    @mock.patch('azext_alias.hooks.request_transform', return_value=['group', 'list'])
+    def test_alias_event_handler_daemon(self, mock_request_transform, mock_alias_manager):
+        args = ['grp', 'list']
+        alias_event_handler(None, args=args)
+        self.assertListEqual(['group', 'list'], args)
+        self.assertEqual(1, mock_request_transform.call_count)
+        self.assertFalse(mock_alias_manager.called)
+
+    @mock.patch('azext_alias.hooks.request_transform', return_value=None)
+    def test_alias_event_handler_daemon_fallback(self, _):
+        args = ['grp', 'list']
+        alias_event_handler(None, args=args)
+        self.assertListEqual(['group', 'list'], args)
+
+    def autocomplete(self, comp_words, cword_prefix):
+        external_completions = []
+        enable_aliases_autocomplete(None, external_completions=external_completions, cword_prefix=cword_prefix, comp_words=comp_words)
+        return external_completions
@@ -0,0 +1,88 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=line-too-long
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+# Modules that Azure CLI imports before loading extensions, which are free for the alias extension to import
+CLI_MODULES = [
+    'azure.cli.core',
+    'azure.cli.core.commands.events',
+    'azure.cli.command_modules.interactive.events',
+    'knack.log',
+    'knack.util'
+]
+
+# Modules that should only be imported when an alias command, an alias with positional arguments,
+# tab completion or the interactive shell needs them
+LAZY_MODULES = [
+    'jinja2',
+    'hashlib',
+    'urllib.request',
+    'argcomplete.completers',
+    'azure.cli.command_modules.interactive.azclishell.command_tree',
+    'azext_alias._help',
+    'azext_alias._validators',
+    'azext_alias.argument',
+    'azext_alias.custom'
+]
+
+IMPORT_MARKER = 'import time: azext_alias begins'
+
+
+@unittest.skipUnless(sys.version_info >= (3, 7), '-X importtime requires Python 3.7+')
+class TestImportTime(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_config_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.mock_config_dir)
+
+    def test_import_extension(self):
+        imported_modules = self.get_imported_modules('import azext_alias')
+        self.assertIn('azext_alias', imported_modules)
+        self.assertNotIn('azext_alias.hooks', imported_modules)
+        self.assertNotIn('azext_alias.alias', imported_modules)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, imported_modules)
+
+    def test_import_alias_event_handler(self):
+        imported_modules = self.get_imported_modules('import azext_alias.hooks')
+        self.assertIn('azext_alias.alias', imported_modules)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, imported_modules)
+
+    def get_imported_modules(self, statement):
+        """
+        Run statement in a new interpreter with -X importtime, after importing the modules that Azure CLI
+        has already imported when loading extensions.
+
+        Returns:
+            The names of the modules that statement imported.
+        """
+        code = 'import sys\n{}\nsys.stderr.write("{}\\n")\n{}'.format(
+            '\n'.join('import ' + module for module in CLI_MODULES), IMPORT_MARKER, statement)
+        env = dict(os.environ, AZURE_CONFIG_DIR=self.mock_config_dir)
+        package_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env['PYTHONPATH'] = os.pathsep.join([package_dir, env.get('PYTHONPATH', '')])
+        process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', code], env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, stderr = process.communicate()
+        self.assertEqual(0, process.returncode, stderr)
+
+        stderr = stderr.decode('utf-8')
+        imported_modules = set()
+        for line in stderr[stderr.index(IMPORT_MARKER):].splitlines():
+            # import time: self [us] | cumulative | imported package
+            if line.startswith('import time:') and '|' in line:
+                imported_modules.add(line.split('|')[-1].strip())
+        return imported_modules
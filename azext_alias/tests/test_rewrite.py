@@ -0,0 +1,107 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=line-too-long
+
+import os
+import unittest
+import mock
+
+from azext_alias.alias import AliasManager
+from azext_alias.rewrite import get_shell, quote_arg, rewrite_script, ScriptScanner
+from azext_alias.tests._base import AliasTestCase
+
+TEST_ALIAS_STRING = '''
+[grp]
+command = group
+
+[ls]
+command = list --query "[].name"
+
+[gd {{ name }}]
+command = group delete -n {{ name }} --yes
+
+[sa {{ url }}]
+command = storage account show -n {{ url.split(".")[0] }}
+
+[home]
+command = --path $HOME/test
+'''
+
+
+class TestRewrite(AliasTestCase):
+
+    def setUp(self):
+        super(TestRewrite, self).setUp()
+        with open(self.alias_path, 'w') as alias_file:
+            alias_file.write(TEST_ALIAS_STRING)
+        self.alias_manager = AliasManager()
+
+    def test_get_shell(self):
+        self.assertEqual('bash', get_shell('deploy.sh'))
+        self.assertEqual('bash', get_shell('deploy'))
+        self.assertEqual('powershell', get_shell('Deploy.PS1'))
+
+    def test_find_az_invocations(self):
+        script = 'az grp ls # az grp\necho az grp; x=$(az gd test) && FOO=bar az vm \\\n  list 2>&1 | jq .'
+        invocations = [[word.value for word in words] for _, _, words in ScriptScanner(script, 'bash').find_az_invocations()]
+        self.assertListEqual([['az', 'grp', 'ls'], ['az', 'gd', 'test'], ['az', 'vm', 'list']], invocations)
+
+    def test_find_az_invocations_quoted(self):
+        script = 'echo "az grp; $(az grp ls)" \'az grp\' `az gd "my test"`'
+        invocations = [[word.value for word in words] for _, _, words in ScriptScanner(script, 'bash').find_az_invocations()]
+        self.assertListEqual([['az', 'grp', 'ls'], ['az', 'gd', 'my test']], invocations)
+
+    def test_find_az_invocations_heredoc(self):
+        script = 'cat <<EOF > out.txt\naz grp ls\nEOF\naz grp\ncat <<-\'END\' <<<az\n\taz gd test\n\tEND\necho $((1 << 2)); az ls\n'
+        invocations = [[word.value for word in words] for _, _, words in ScriptScanner(script, 'bash').find_az_invocations()]
+        self.assertListEqual([['az', 'grp'], ['az', 'ls']], invocations)
+
+    def test_find_az_invocations_array(self):
+        script = 'arr=(az grp ls)\nargs+=(\n  "(az" az gd # az\n)\naz grp ls'
+        invocations = [[word.value for word in words] for _, _, words in ScriptScanner(script, 'bash').find_az_invocations()]
+        self.assertListEqual([['az', 'grp', 'ls']], invocations)
+
+    def test_rewrite_bash(self):
+        script = '#!/bin/bash\n# az grp ls\naz grp ls\nif az gd "my rg"; then echo done; fi\naz vm list  -g test\n'
+        self.assertEqual('#!/bin/bash\n# az grp ls\naz group list --query \'[].name\'\nif az group delete -n \'my rg\' --yes; then echo done; fi\naz vm list  -g test\n',
+                         rewrite_script(self.alias_manager, script, 'bash'))
+
+    def test_rewrite_bash_dynamic_args(self):
+        script = 'az gd "$RG"\naz grp show -n $(get-name) *.json'
+        self.assertEqual('az group delete -n "$RG" --yes\naz group show -n $(get-name) *.json',
+                         rewrite_script(self.alias_manager, script, 'bash'))
+
+    @mock.patch('azext_alias.rewrite.logger')
+    def test_rewrite_bash_dynamic_positional_arg(self, mock_logger):
+        script = 'az sa "$URL"\naz sa test.blob.core.windows.net'
+        self.assertEqual('az sa "$URL"\naz storage account show -n test', rewrite_script(self.alias_manager, script, 'bash'))
+        self.assertEqual(1, mock_logger.warning.call_count)
+
+    @mock.patch('azext_alias.rewrite.logger')
+    def test_rewrite_insufficient_positional_args(self, mock_logger):
+        self.assertEqual('az gd', rewrite_script(self.alias_manager, 'az gd', 'bash'))
+        self.assertEqual(1, mock_logger.warning.call_count)
+
+    @mock.patch.dict(os.environ, {'HOME': '/should/not/be/expanded'})
+    def test_rewrite_env_vars(self):
+        self.assertEqual('az group --path "$HOME/test"', rewrite_script(self.alias_manager, 'az grp home', 'bash'))
+        self.assertEqual('az group --path "$env:HOME/test"', rewrite_script(self.alias_manager, 'az grp home', 'powershell'))
+
+    def test_rewrite_powershell(self):
+        script = '$groups = az grp ls\nforeach ($g in $groups) { az gd $g.Name }\naz gd "it\'s"'
+        self.assertEqual('$groups = az group list --query \'[].name\'\nforeach ($g in $groups) { az group delete -n $g.Name --yes }\naz group delete -n \'it\'\'s\' --yes',
+                         rewrite_script(self.alias_manager, script, 'powershell'))
+
+    def test_quote_arg(self):
+        self.assertEqual('test-1', quote_arg('test-1', 'bash'))
+        self.assertEqual("'a b'", quote_arg('a b', 'bash'))
+        self.assertEqual("'it'\"'\"'s'", quote_arg("it's", 'bash'))
+        self.assertEqual("'@a'", quote_arg('@a', 'powershell'))
+        self.assertEqual('"`"$env:HOME`""', quote_arg('"$HOME"', 'powershell'))
+
+
+if __name__ == '__main__':
+    unittest.main()
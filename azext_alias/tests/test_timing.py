@@ -0,0 +1,77 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=line-too-long
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import mock
+
+from azext_alias import timing
+from azext_alias._const import ALIAS_TRACE_FILE_ENV_VAR
+
+
+class TestTiming(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_trace_dir = tempfile.mkdtemp()
+        self.trace_path = os.path.join(self.mock_trace_dir, 'trace.jsonl')
+        timing.start()
+
+    def tearDown(self):
+        shutil.rmtree(self.mock_trace_dir)
+
+    def test_span(self):
+        with timing.span('parse_alias_config'):
+            pass
+        for _ in range(2):
+            with timing.span('render_template'):
+                pass
+
+        phase_times = timing.get_phase_times()
+        self.assertListEqual(['parse_alias_config', 'render_template'], [name for name, _ in phase_times])
+        self.assertTrue(all(duration >= 0 for _, duration in phase_times))
+
+    def test_span_exception(self):
+        with self.assertRaises(ValueError):
+            with timing.span('parse_alias_config'):
+                raise ValueError()
+        self.assertListEqual(['parse_alias_config'], [name for name, _ in timing.get_phase_times()])
+
+    def test_start(self):
+        with timing.span('parse_alias_config'):
+            pass
+        timing.start()
+        self.assertListEqual([], timing.get_phase_times())
+
+    @mock.patch('azext_alias.timing.logger')
+    def test_conclude(self, mock_logger):
+        with timing.span('parse_alias_config'):
+            pass
+        with mock.patch.dict(os.environ, {ALIAS_TRACE_FILE_ENV_VAR: ''}):
+            timing.conclude(1.5)
+        self.assertEqual(1, mock_logger.debug.call_count)
+        self.assertFalse(os.path.exists(self.trace_path))
+
+    def test_conclude_trace_file(self):
+        with timing.span('parse_alias_config'):
+            pass
+        with mock.patch.dict(os.environ, {ALIAS_TRACE_FILE_ENV_VAR: self.trace_path}):
+            timing.conclude(1.5)
+            timing.conclude(2.5)
+
+        with open(self.trace_path, 'r') as trace_file:
+            traces = [json.loads(line) for line in trace_file]
+        self.assertEqual(2, len(traces))
+        self.assertEqual(1.5, traces[0]['execution_time_ms'])
+        self.assertEqual(os.getpid(), traces[0]['pid'])
+        self.assertListEqual(['parse_alias_config'], [span['name'] for span in traces[0]['spans']])
+
+    def test_conclude_unwritable_trace_file(self):
+        with mock.patch.dict(os.environ, {ALIAS_TRACE_FILE_ENV_VAR: os.path.join(self.mock_trace_dir, 'non-existing', 'trace.jsonl')}):
+            timing.conclude(1.5)
@@ -11,25 +11,35 @@ import tempfile
 import unittest
 import mock
 
-from azext_alias.util import remove_pos_arg_placeholders, build_tab_completion_table, get_config_parser
-from azext_alias._const import ALIAS_TAB_COMP_TABLE_FILE_NAME
+import azext_alias
+from azext_alias.util import (
+    remove_pos_arg_placeholders,
+    build_tab_completion_table,
+    update_tab_completion_table,
+    build_alias_completion_index,
+    search_alias_completion_index,
+    get_config_parser,
+    get_reserved_command_index,
+    ReservedCommandIndex,
+    read_alias_state,
+    write_alias_state,
+    get_alias_state_path,
+    get_alias_state_lock_path,
+    prune_local_alias_states,
+    cache_reserved_commands,
+    get_cli_fingerprint,
+    write_file_atomically
+)
+from azext_alias._const import ALIAS_STATE_FILE_NAME, LEGACY_ALIAS_STATE_FILE_NAMES, RESERVED_COMMANDS_FILE_NAME
 from azext_alias.tests._const import TEST_RESERVED_COMMANDS
+from azext_alias.tests._base import AliasTestCase
 
 
-class TestUtil(unittest.TestCase):
+class TestUtil(AliasTestCase):
 
     def setUp(self):
-        self.mock_config_dir = tempfile.mkdtemp()
-        self.patchers = []
-        self.patchers.append(mock.patch('azext_alias.util.GLOBAL_ALIAS_TAB_COMP_TABLE_PATH', os.path.join(self.mock_config_dir, ALIAS_TAB_COMP_TABLE_FILE_NAME)))
-        self.patchers.append(mock.patch('azext_alias.cached_reserved_commands', TEST_RESERVED_COMMANDS))
-        for patcher in self.patchers:
-            patcher.start()
-
-    def tearDown(self):
-        for patcher in self.patchers:
-            patcher.stop()
-        shutil.rmtree(self.mock_config_dir)
+        super(TestUtil, self).setUp()
+        self.start_patcher(mock.patch('azext_alias.util.GLOBAL_RESERVED_COMMANDS_PATH', os.path.join(self.mock_config_dir, RESERVED_COMMANDS_FILE_NAME)))
 
     def test_remove_pos_arg_placeholders(self):
         self.assertEqual('webapp create', remove_pos_arg_placeholders('webapp create'))
@@ -61,6 +71,219 @@ class TestUtil(unittest.TestCase):
             'account list-locations': ['']
         }, tab_completion_table)
 
+    def test_update_tab_completion_table(self):
+        mock_alias_table = get_config_parser()
+        mock_alias_table.add_section('ac')
+        mock_alias_table.set('ac', 'command', 'account')
+        mock_alias_table.add_section('ll')
+        mock_alias_table.set('ll', 'command', 'list-locations')
+        tab_completion_table = build_tab_completion_table(mock_alias_table)
+
+        mock_alias_table.set('ll', 'command', 'network')
+        mock_alias_table.add_section('al {{ arg }}')
+        mock_alias_table.set('al {{ arg }}', 'command', 'account list-locations {{ arg }}')
+        with mock.patch('azext_alias.util.get_reserved_command_index', wraps=get_reserved_command_index) as mock_index:
+            updated_tab_completion_table = update_tab_completion_table(tab_completion_table, mock_alias_table, ['ll', 'al {{ arg }}'])
+        self.assertEqual(1, mock_index.call_count)
+        self.assertDictEqual(build_tab_completion_table(mock_alias_table), updated_tab_completion_table)
+        self.assertIs(tab_completion_table['account'], updated_tab_completion_table['account'])
+
+    def test_build_alias_completion_index(self):
+        mock_alias_table = get_config_parser()
+        mock_alias_table.add_section('n')
+        mock_alias_table.set('n', 'command', 'network')
+        mock_alias_table.add_section('dns {{ arg_1 }}')
+        mock_alias_table.set('dns {{ arg_1 }}', 'command', 'network dns {{ arg_1 }}')
+        mock_alias_table.add_section('ac')
+        mock_alias_table.set('ac', 'command', 'account -o table')
+        mock_alias_table.add_section('no-command')
+        alias_completion_index = build_alias_completion_index(mock_alias_table)
+        self.assertListEqual([('ac', 'account'), ('dns', 'network dns'), ('n', 'network')], alias_completion_index)
+
+    def test_search_alias_completion_index(self):
+        alias_completion_index = [('ac', 'account'), ('dns', 'network dns'), ('n', 'network'), ('nd', 'network dns')]
+        self.assertListEqual(alias_completion_index, list(search_alias_completion_index(alias_completion_index, '')))
+        self.assertListEqual([('n', 'network'), ('nd', 'network dns')], list(search_alias_completion_index(alias_completion_index, 'n')))
+        self.assertListEqual([('dns', 'network dns')], list(search_alias_completion_index(alias_completion_index, 'dns')))
+        self.assertListEqual([], list(search_alias_completion_index(alias_completion_index, 'b')))
+        self.assertListEqual([], list(search_alias_completion_index(alias_completion_index, 'z')))
+
+    def test_reserved_command_index(self):
+        reserved_command_index = ReservedCommandIndex(TEST_RESERVED_COMMANDS)
+        self.assertTrue(reserved_command_index.is_reserved_word('account', 1))
+        self.assertTrue(reserved_command_index.is_reserved_word('account', 2))
+        self.assertTrue(reserved_command_index.is_reserved_word('create', 3))
+        self.assertFalse(reserved_command_index.is_reserved_word('create', 2))
+        self.assertFalse(reserved_command_index.is_reserved_word('create', 4))
+        self.assertFalse(reserved_command_index.is_reserved_word('dns', 1))
+
+    def test_reserved_command_index_non_command_word(self):
+        reserved_command_index = ReservedCommandIndex(['network p2s-vpn-gateway show', 'group create'])
+        self.assertTrue(reserved_command_index.is_reserved_word('p2s-vpn-gateway', 2))
+        self.assertFalse(reserved_command_index.is_reserved_word('show', 3))
+
+    def test_reserved_command_index_command_words(self):
+        reserved_command_index = ReservedCommandIndex(TEST_RESERVED_COMMANDS)
+        self.assertTrue(reserved_command_index.has_command_words(['storage', 'account', 'create']))
+        self.assertTrue(reserved_command_index.has_command_words(['account', 'create']))
+        self.assertTrue(reserved_command_index.has_command_words(['list-locations']))
+        self.assertFalse(reserved_command_index.has_command_words(['storage', 'create']))
+        self.assertFalse(reserved_command_index.has_command_words(['account', 'list']))
+        self.assertFalse(reserved_command_index.has_command_words(['dns', 'network']))
+        self.assertFalse(reserved_command_index.has_command_words([]))
+
+    def test_reserved_command_index_command_ending_with(self):
+        reserved_command_index = ReservedCommandIndex(TEST_RESERVED_COMMANDS)
+        self.assertTrue(reserved_command_index.has_command_ending_with('account create'))
+        self.assertTrue(reserved_command_index.has_command_ending_with('dns'))
+        self.assertTrue(reserved_command_index.has_command_ending_with('ete'))
+        self.assertFalse(reserved_command_index.has_command_ending_with('storage account'))
+        self.assertFalse(reserved_command_index.has_command_ending_with('zgroup delete'))
+
+    def test_reserved_command_index_commands_containing(self):
+        reserved_command_index = ReservedCommandIndex(TEST_RESERVED_COMMANDS + ['network dns record-set list'])
+        self.assertListEqual(['storage account create'], reserved_command_index.get_commands_containing('account create'))
+        self.assertListEqual(['account list-locations', 'storage account create'], reserved_command_index.get_commands_containing('account'))
+        self.assertListEqual(['network dns', 'network dns record-set list'], reserved_command_index.get_commands_containing('network dns'))
+        self.assertListEqual([], reserved_command_index.get_commands_containing('storage create'))
+        self.assertListEqual([], reserved_command_index.get_commands_containing('accoun'))
+
+    def test_get_reserved_command_index(self):
+        reserved_command_index = get_reserved_command_index()
+        self.assertIs(reserved_command_index, get_reserved_command_index())
+        with mock.patch('azext_alias.cached_reserved_commands', ['vm list']):
+            self.assertTrue(get_reserved_command_index().is_reserved_word('vm', 1))
+        self.assertFalse(get_reserved_command_index().is_reserved_word('vm', 1))
+
+    def test_cache_reserved_commands_persisted(self):
+        load_cmd_tbl_func = mock.Mock(return_value={command: None for command in TEST_RESERVED_COMMANDS})
+        with mock.patch('azext_alias.util.get_cli_fingerprint', return_value=('2.0.28', (('alias', '0.4.0'),))):
+            with mock.patch('azext_alias.cached_reserved_commands', []):
+                self.assertTrue(cache_reserved_commands(load_cmd_tbl_func))
+            # A new process should read the reserved commands from disk
+            with mock.patch('azext_alias.cached_reserved_commands', []):
+                self.assertFalse(cache_reserved_commands(load_cmd_tbl_func))
+                self.assertListEqual(sorted(TEST_RESERVED_COMMANDS), sorted(azext_alias.cached_reserved_commands))
+        self.assertEqual(1, load_cmd_tbl_func.call_count)
+
+    def test_cache_reserved_commands_cli_fingerprint_changed(self):
+        load_cmd_tbl_func = mock.Mock(return_value={command: None for command in TEST_RESERVED_COMMANDS})
+        for cli_fingerprint in [('2.0.28', ()), ('2.0.28', (('alias', '0.4.0'),)), ('2.0.29', (('alias', '0.4.0'),))]:
+            with mock.patch('azext_alias.util.get_cli_fingerprint', return_value=cli_fingerprint):
+                with mock.patch('azext_alias.cached_reserved_commands', []):
+                    self.assertTrue(cache_reserved_commands(load_cmd_tbl_func))
+        self.assertEqual(3, load_cmd_tbl_func.call_count)
+
+    def test_cache_reserved_commands_no_cli_fingerprint(self):
+        load_cmd_tbl_func = mock.Mock(return_value={command: None for command in TEST_RESERVED_COMMANDS})
+        with mock.patch('azext_alias.util.get_cli_fingerprint', return_value=None):
+            with mock.patch('azext_alias.cached_reserved_commands', []):
+                self.assertTrue(cache_reserved_commands(load_cmd_tbl_func))
+        self.assertFalse(os.path.exists(os.path.join(self.mock_config_dir, RESERVED_COMMANDS_FILE_NAME)))
+
+    def test_get_cli_fingerprint(self):
+        self.assertEqual(get_cli_fingerprint(), get_cli_fingerprint())
+
+
+class TestAliasState(AliasTestCase):
+
+    def test_read_alias_state_missing(self):
+        alias_state = read_alias_state()
+        self.assertEqual('', alias_state['alias_config_hash'])
+        self.assertDictEqual({}, alias_state['collided_alias'])
+        self.assertDictEqual({}, alias_state['tab_completion_table'])
+
+    def test_write_alias_state(self):
+        alias_state = read_alias_state()
+        alias_state['alias_config_hash'] = 'test-hash'
+        alias_state['collided_alias'] = {'account': [1, 2]}
+        write_alias_state(alias_state)
+        self.assertDictEqual(alias_state, read_alias_state())
+        # No temporary file should be left behind
+        self.assertListEqual([ALIAS_STATE_FILE_NAME], os.listdir(self.mock_config_dir))
+
+    def test_write_alias_state_legacy_files(self):
+        for file_name in LEGACY_ALIAS_STATE_FILE_NAMES:
+            open(os.path.join(self.mock_config_dir, file_name), 'w').close()
+        write_alias_state(read_alias_state())
+        self.assertListEqual([ALIAS_STATE_FILE_NAME], os.listdir(self.mock_config_dir))
+        # The legacy files are only looked for when the alias state file is created
+        with mock.patch('azext_alias.util.remove_legacy_alias_state_files') as mock_remove:
+            write_alias_state(read_alias_state())
+        self.assertFalse(mock_remove.called)
+
+    def test_read_alias_state_corrupted(self):
+        with open(os.path.join(self.mock_config_dir, ALIAS_STATE_FILE_NAME), 'wb') as f:
+            f.write(b'corrupted')
+        self.assertEqual('', read_alias_state()['alias_config_hash'])
+
+    def test_get_alias_state_path(self):
+        self.assertEqual(os.path.join(self.mock_config_dir, ALIAS_STATE_FILE_NAME), get_alias_state_path())
+        local_alias_state_path = get_alias_state_path(os.path.join('repo', '.azalias'))
+        self.assertEqual(local_alias_state_path, get_alias_state_path(os.path.abspath(os.path.join('repo', '.azalias'))))
+        self.assertNotEqual(local_alias_state_path, get_alias_state_path(os.path.join('other_repo', '.azalias')))
+
+    @mock.patch('azext_alias.util.MAX_LOCAL_ALIAS_STATES', 2)
+    def test_prune_local_alias_states(self):
+        state_paths = [get_alias_state_path(os.path.join('repo_{}'.format(i), '.azalias')) for i in range(3)]
+        for i, path in enumerate([get_alias_state_path()] + state_paths):
+            write_alias_state(read_alias_state(), path)
+            os.utime(path, (0, i))
+        open(get_alias_state_lock_path(state_paths[0]), 'w').close()
+        prune_local_alias_states()
+        self.assertFalse(os.path.exists(state_paths[0]))
+        self.assertFalse(os.path.exists(get_alias_state_lock_path(state_paths[0])))
+        for path in [get_alias_state_path()] + state_paths[1:]:
+            self.assertTrue(os.path.exists(path))
+
+
+class TestWriteFileAtomically(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_config_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.mock_config_dir, 'alias')
+
+    def tearDown(self):
+        shutil.rmtree(self.mock_config_dir)
+
+    @mock.patch('os.fsync', wraps=os.fsync)
+    def test_write_file_atomically(self, mock_fsync):
+        write_file_atomically(self.path, b'[ac]\ncommand = account\n')
+        self.assertTrue(mock_fsync.called)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(b'[ac]\ncommand = account\n', f.read())
+        self.assertListEqual(['alias'], os.listdir(self.mock_config_dir))
+
+    @unittest.skipIf(os.name == 'nt', 'Windows does not support POSIX file permissions')
+    def test_write_file_atomically_new_file_mode(self):
+        umask = os.umask(0o022)
+        try:
+            write_file_atomically(self.path, b'')
+        finally:
+            os.umask(umask)
+        self.assertEqual(0o644, os.stat(self.path).st_mode & 0o777)
+
+    @unittest.skipIf(os.name == 'nt', 'Windows does not support POSIX file permissions')
+    def test_write_file_atomically_existing_file_mode(self):
+        open(self.path, 'w').close()
+        os.chmod(self.path, 0o640)
+        write_file_atomically(self.path, b'')
+        self.assertEqual(0o640, os.stat(self.path).st_mode & 0o777)
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), 'Symbolic links are not supported')
+    def test_write_file_atomically_symlink(self):
+        target_dir = os.path.join(self.mock_config_dir, 'dotfiles')
+        os.makedirs(target_dir)
+        target_path = os.path.join(target_dir, 'alias')
+        with open(target_path, 'wb') as f:
+            f.write(b'[ac]\ncommand = account\n')
+        os.symlink(target_path, self.path)
+        write_file_atomically(self.path, b'[grp]\ncommand = group\n')
+        self.assertTrue(os.path.islink(self.path))
+        with open(target_path, 'rb') as f:
+            self.assertEqual(b'[grp]\ncommand = group\n', f.read())
+        self.assertListEqual(['alias'], os.listdir(target_dir))
+
 
 if __name__ == '__main__':
     unittest.main()
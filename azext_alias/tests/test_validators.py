@@ -13,7 +13,7 @@ from mock import patch
 
 from knack.util import CLIError
 
-from azext_alias._validators import process_alias_create_namespace, process_alias_import_namespace
+from azext_alias._validators import process_alias_create_namespace, process_alias_import_namespace, validate_aliases
 from azext_alias.tests._const import TEST_RESERVED_COMMANDS
 
 
@@ -135,6 +135,38 @@ class TestValidators(unittest.TestCase):
             process_alias_import_namespace(MockAliasImportNamespace(os.getcwd()))
         self.assertEqual(str(cm.exception), 'alias: {} is a directory'.format(os.getcwd()))
 
+    def test_process_alias_import_namespace_invalid_aliases_in_file(self):
+        _, mock_alias_config_file = tempfile.mkstemp()
+        with open(mock_alias_config_file, 'w') as f:
+            f.write('[ac]\ncommand = account\n\n[1ac]\ncommand = account\n\n[test]\ncommand = non existing command\n')
+        with self.assertRaises(CLIError) as cm:
+            process_alias_import_namespace(MockAliasImportNamespace(mock_alias_config_file))
+        self.assertEqual(str(cm.exception), 'alias: Found 2 invalid aliases in {}:\n'
+                                            '  [1ac] alias: Alias name should not start with "1"\n'
+                                            '  [test] alias: Invalid Azure CLI command "non existing command"'.format(mock_alias_config_file))
+        os.remove(mock_alias_config_file)
+
+    def test_validate_aliases(self):
+        aliases = [('ac', 'account'), ('network', 'account list'), ('account {{ test }}', 'dns {{ test }}'), ('dns', 'network dns')]
+        self.assertListEqual([('network', 'account list', 'alias: Invalid Azure CLI command "account list"'),
+                              ('account {{ test }}', 'dns {{ test }}', 'alias: "account {{ test }}" is a reserved command and cannot be used to represent "dns {{ test }}"')],
+                             validate_aliases(aliases))
+
+    @patch('multiprocessing.cpu_count', return_value=2)
+    def test_validate_aliases_in_batches(self, _):
+        aliases = [('ac{}'.format(i), 'account' if i % 3 else 'non existing command') for i in range(20)]
+        invalid_aliases = validate_aliases(aliases, batch_size=4, pool_threshold=0)
+        self.assertListEqual(['ac{}'.format(i) for i in range(0, 20, 3)], [invalid_alias.alias for invalid_alias in invalid_aliases])
+        self.assertListEqual(invalid_aliases, validate_aliases(aliases, batch_size=len(aliases)))
+
+    @patch('multiprocessing.Pool')
+    def test_validate_aliases_below_pool_threshold(self, mock_pool):
+        aliases = [('ac{}'.format(i), 'account') for i in range(20)]
+        self.assertListEqual([], validate_aliases(aliases, batch_size=4, pool_threshold=21))
+        with patch('multiprocessing.cpu_count', return_value=1):
+            self.assertListEqual([], validate_aliases(aliases, batch_size=4, pool_threshold=0))
+        self.assertFalse(mock_pool.called)
+
 
 class MockAliasCreateNamespace(object):  # pylint: disable=too-few-public-methods
 
@@ -0,0 +1,116 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import json
+import timeit
+import datetime
+from contextlib import contextmanager
+
+from knack.log import get_logger
+
+from azext_alias.version import VERSION
+from azext_alias._const import DEBUG_MSG_PHASE_TIMING, DEBUG_MSG_TRACE_WRITE_ERROR, ALIAS_TRACE_FILE_ENV_VAR
+
+logger = get_logger(__name__)
+
+
+class AliasTimingSession(object):
+
+    def __init__(self):
+        self.start_time = None
+        self.start_timer = timeit.default_timer()
+        # A list of (phase name, start offset in ms, duration in ms), in the order in which the phases ended
+        self.spans = []
+
+    def add_span(self, name, start_timer, end_timer):
+        self.spans.append((name, (start_timer - self.start_timer) * 1000, (end_timer - start_timer) * 1000))
+
+    def get_phase_times(self):
+        """
+        Get the total time spent in each phase, in the order in which the phases first ended.
+        """
+        phase_times = []
+        phase_indexes = {}
+        for name, _, duration in self.spans:
+            if name not in phase_indexes:
+                phase_indexes[name] = len(phase_times)
+                phase_times.append([name, 0])
+            phase_times[phase_indexes[name]][1] += duration
+
+        return [(name, round(duration, 3)) for name, duration in phase_times]
+
+    def generate_trace(self, execution_time):
+        return {
+            'time': str(self.start_time),
+            'pid': os.getpid(),
+            'version': VERSION,
+            'execution_time_ms': round(execution_time, 3) if execution_time is not None else None,
+            'spans': [{
+                'name': name,
+                'start_ms': round(start, 3),
+                'duration_ms': round(duration, 3)
+            } for name, start, duration in self.spans]
+        }
+
+
+_session = AliasTimingSession()
+
+
+def start():
+    """
+    Start a new timing session, discarding the spans of the previous one.
+    """
+    global _session  # pylint: disable=global-statement
+    _session = AliasTimingSession()
+    _session.start_time = datetime.datetime.now()
+
+
+@contextmanager
+def span(name):
+    """
+    Time the enclosed block of code as a phase of the current timing session.
+
+    Args:
+        name: The name of the phase. The time of phases with the same name adds up.
+    """
+    start_timer = timeit.default_timer()
+    try:
+        yield
+    finally:
+        _session.add_span(name, start_timer, timeit.default_timer())
+
+
+def get_phase_times():
+    """
+    Get the total time spent in each phase of the current timing session.
+
+    Returns:
+        A list of tuples with [0] being the name of the phase and [1] being its total time in ms.
+    """
+    return _session.get_phase_times()
+
+
+def conclude(execution_time=None):
+    """
+    Log the time spent in each phase, and append the trace of the current timing session to the
+    JSON lines file named by the AZURE_ALIAS_TRACE_FILE environment variable, if it is set.
+
+    Args:
+        execution_time: The total execution time in ms.
+    """
+    for name, duration in _session.get_phase_times():
+        logger.debug(DEBUG_MSG_PHASE_TIMING, name, duration)
+
+    trace_path = os.environ.get(ALIAS_TRACE_FILE_ENV_VAR)
+    if not trace_path:
+        return
+
+    try:
+        # A single short append is atomic enough for concurrent az processes sharing a trace file
+        with open(os.path.expanduser(trace_path), 'a') as trace_file:
+            trace_file.write(json.dumps(_session.generate_trace(execution_time), sort_keys=True) + '\n')
+    except (IOError, OSError) as exception:
+        logger.debug(DEBUG_MSG_TRACE_WRITE_ERROR, trace_path, exception)
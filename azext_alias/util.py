@@ -5,19 +5,41 @@
 
 # pylint: disable=wrong-import-order,import-error,relative-import
 
+import os
 import re
 import sys
-import json
+import time
 import shlex
+import bisect
+import timeit
+import tempfile
+from contextlib import contextmanager
 from collections import defaultdict
-from six.moves import configparser
+from six import StringIO
+from six.moves import configparser, cPickle as pickle
 from six.moves.urllib.parse import urlparse
-from six.moves.urllib.request import urlretrieve
 
 from knack.util import CLIError
+from knack.log import get_logger
 
 import azext_alias
-from azext_alias._const import COLLISION_CHECK_LEVEL_DEPTH, GLOBAL_ALIAS_TAB_COMP_TABLE_PATH, ALIAS_FILE_URL_ERROR
+from azext_alias._const import (
+    COLLISION_CHECK_LEVEL_DEPTH,
+    GLOBAL_ALIAS_STATE_PATH,
+    LEGACY_ALIAS_STATE_FILE_NAMES,
+    GLOBAL_RESERVED_COMMANDS_PATH,
+    RESERVED_COMMANDS_VERSION,
+    ALIAS_STATE_VERSION,
+    ALIAS_LOCK_FILE_SUFFIX,
+    ALIAS_STATE_LOCK_TARGET_SUFFIX,
+    ALIAS_STATE_REBUILD_TIMEOUT,
+    MAX_LOCAL_ALIAS_STATES,
+    ALIAS_STATE_REBUILD_POLL_INTERVAL,
+    ALIAS_FILE_URL_ERROR,
+    DEBUG_MSG_ALIAS_STATE_REBUILD_DEFERRED
+)
+
+logger = get_logger(__name__)
 
 
 def get_config_parser():
@@ -32,18 +54,509 @@ def get_config_parser():
     return configparser.ConfigParser()  # pylint: disable=undefined-variable
 
 
+def read_config_string(config_parser, config_str, source):
+    """
+    Read an alias configuration that has already been read from a file into a config parser, so that
+    the parsed aliases match the content exactly even if the file has been replaced since.
+
+    Args:
+        config_parser: The config parser to read into.
+        config_str: The alias configuration.
+        source: The path of the file that config_str was read from, used in error messages.
+    """
+    config_file = StringIO(config_str)
+    if hasattr(config_parser, 'read_file'):
+        config_parser.read_file(config_file, source)
+    else:
+        config_parser.readfp(config_file, source)  # pylint: disable=deprecated-method
+
+
 def get_alias_table():
     """
     Get the current alias table.
     """
+    # Import here because azext_alias.alias imports this module
+    from azext_alias import alias
+
     try:
         alias_table = get_config_parser()
-        alias_table.read(azext_alias.alias.GLOBAL_ALIAS_PATH)
+        alias_table.read(alias.GLOBAL_ALIAS_PATH)
         return alias_table
     except Exception:  # pylint: disable=broad-except
         return get_config_parser()
 
 
+def get_merged_alias_table(cwd=None):
+    """
+    Get the alias table merged from the layers of alias config files in effect in cwd.
+    """
+    # Import here because azext_alias.alias imports this module
+    from azext_alias import alias
+
+    try:
+        return alias.load_alias_layers(cwd)[0]
+    except Exception:  # pylint: disable=broad-except
+        return get_config_parser()
+
+
+def get_file_stat(path):
+    """
+    Get a fingerprint of a file's stat, used to tell whether the file has been modified.
+
+    Args:
+        path: The path of the file, or a file descriptor.
+
+    Returns:
+        A tuple of the file's modification time, size and inode.
+    """
+    file_stat = os.fstat(path) if isinstance(path, int) else os.stat(path)
+    return getattr(file_stat, 'st_mtime_ns', file_stat.st_mtime), file_stat.st_size, file_stat.st_ino
+
+
+def read_alias_state(path=None):
+    """
+    Read an alias state file with a single open. The alias state holds everything derived from the alias
+    config file, and is structured as:
+    {
+        'version': the version of the alias state format,
+        'alias_config_hash': the hash of the alias config files the state was derived from,
+        'alias_stat': the stat fingerprints of the alias config files the compiled alias table was read from,
+        'number_of_aliases': the number of aliases in the alias config file,
+        'compiled_alias_table': the compiled alias table (see AliasManager.compile_alias_table),
+        'collided_alias': the collision table (see AliasManager.build_collision_table),
+        'collided_alias_sections': the aliases that the collision table was built from,
+        'cli_fingerprint': the fingerprint of the Azure CLI that the collision table was built against,
+        'tab_completion_table': the tab completion table (see build_tab_completion_table),
+        'alias_completion_index': the alias completion index (see build_alias_completion_index),
+        'invalid_alias_config': the alias config that failed to parse, if the last one did, as
+            {'alias_config_hash': its hash, 'alias_stat': its stat fingerprints, 'error': the parsing error}
+    }
+
+    Args:
+        path: The path of the alias state file (see get_alias_state_path). Default: GLOBAL_ALIAS_STATE_PATH.
+
+    Returns:
+        The alias state. An empty state is returned if the alias state file is missing, corrupted or
+        written in another version of the format.
+    """
+    try:
+        with open(path or GLOBAL_ALIAS_STATE_PATH, 'rb') as alias_state_file:
+            alias_state = pickle.load(alias_state_file)
+        if isinstance(alias_state, dict) and alias_state.get('version') == ALIAS_STATE_VERSION:
+            return alias_state
+    except Exception:  # pylint: disable=broad-except
+        pass
+
+    return {
+        'version': ALIAS_STATE_VERSION,
+        'alias_config_hash': '',
+        'alias_stat': None,
+        'number_of_aliases': 0,
+        'compiled_alias_table': None,
+        'collided_alias': {},
+        'collided_alias_sections': None,
+        'cli_fingerprint': None,
+        'tab_completion_table': {},
+        'alias_completion_index': None,
+        'invalid_alias_config': None
+    }
+
+
+def write_alias_state(alias_state, path=None):
+    """
+    Atomically replace an alias state file. The alias state files of older versions of the extension
+    are removed when an alias state file is created.
+
+    Args:
+        alias_state: The alias state to write (see read_alias_state).
+        path: The path of the alias state file (see get_alias_state_path). Default: GLOBAL_ALIAS_STATE_PATH.
+    """
+    path = path or GLOBAL_ALIAS_STATE_PATH
+    is_new_alias_state = not os.path.exists(path)
+    alias_state['version'] = ALIAS_STATE_VERSION
+    write_file_atomically(path, pickle.dumps(alias_state, pickle.HIGHEST_PROTOCOL))
+    if is_new_alias_state:
+        remove_legacy_alias_state_files()
+
+
+def remove_legacy_alias_state_files():
+    """
+    Remove the files that older versions of the extension kept the alias state in (the alias config hash,
+    the collision table and the tab completion table), which are now part of the alias state file.
+    """
+    state_dir = os.path.dirname(GLOBAL_ALIAS_STATE_PATH)
+    for file_name in LEGACY_ALIAS_STATE_FILE_NAMES:
+        try:
+            os.remove(os.path.join(state_dir, file_name))
+        except (IOError, OSError):
+            pass
+
+
+def get_alias_state_path(local_alias_path=None):
+    """
+    Get the path of the alias state file derived from the alias config files in effect. Each repo-local
+    alias config file has its own alias state file, so that working in several repositories in turn
+    does not rebuild the alias state every time (see prune_local_alias_states).
+
+    Args:
+        local_alias_path: The path of the repo-local alias config file in effect, if any.
+
+    Returns:
+        GLOBAL_ALIAS_STATE_PATH if there is no repo-local alias config file in effect, or the path of the
+        alias state file of the repo-local alias config file next to it.
+    """
+    if not local_alias_path:
+        return GLOBAL_ALIAS_STATE_PATH
+
+    import hashlib
+
+    local_alias_path_hash = hashlib.sha1(os.path.abspath(local_alias_path).encode('utf-8')).hexdigest()
+    return '{}_{}'.format(GLOBAL_ALIAS_STATE_PATH, local_alias_path_hash[:12])
+
+
+def prune_local_alias_states():
+    """
+    Remove the least recently written alias state files of repo-local alias config files (see get_alias_state_path),
+    along with their alias state lock files, so that at most MAX_LOCAL_ALIAS_STATES of them are kept.
+    """
+    state_dir, state_file_name = os.path.split(GLOBAL_ALIAS_STATE_PATH)
+    state_paths = []
+    for file_name in os.listdir(state_dir or os.curdir):
+        path = os.path.join(state_dir, file_name)
+        if file_name.startswith(state_file_name + '_') and os.path.splitext(file_name)[1] not in \
+                [ALIAS_LOCK_FILE_SUFFIX, ALIAS_STATE_LOCK_TARGET_SUFFIX]:
+            try:
+                state_paths.append((os.path.getmtime(path), path))
+            except (IOError, OSError):
+                pass
+
+    for _, path in sorted(state_paths, reverse=True)[MAX_LOCAL_ALIAS_STATES:]:
+        for stale_path in [path, get_alias_state_lock_target_path(path), get_alias_state_lock_path(path)]:
+            try:
+                os.remove(stale_path)
+            except (IOError, OSError):
+                pass
+
+
+def _get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_file_atomically(path, content):
+    """
+    Write content to a temporary file in the same directory as path, then rename it to path.
+    Readers see either the old or the new file, never a partially written one, and the content is flushed
+    to disk before the rename so that a crash does not leave an empty file behind. The permissions of
+    an existing file at path are kept, and a new file gets the permissions that open() would give it.
+    If path is a symbolic link, the file it points to is replaced and the link is kept.
+
+    Args:
+        path: The path of the file to write.
+        content: The bytes to write.
+    """
+    path = os.path.realpath(path)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or None,
+                                     prefix='.{}.'.format(os.path.basename(path)),
+                                     suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        # mkstemp creates the temporary file readable and writable by the current user only
+        os.chmod(temp_path, os.stat(path).st_mode & 0o7777 if os.path.exists(path) else 0o666 & ~_get_umask())
+        if hasattr(os, 'replace'):
+            os.replace(temp_path, path)  # pylint: disable=no-member
+        else:
+            # os.rename does not overwrite an existing file on Windows in Python 2
+            if os.name == 'nt' and os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive advisory lock on a lock file, waiting for other processes to release it.
+    The lock only excludes other holders of the same lock; it never blocks readers of the locked data.
+
+    Args:
+        path: The path of the lock file, created if it does not exist.
+    """
+    lock_file = acquire_file_lock(path)
+    try:
+        yield
+    finally:
+        release_file_lock(lock_file)
+
+
+def acquire_file_lock(path, blocking=True):
+    """
+    Acquire an exclusive advisory lock on a lock file.
+
+    Args:
+        path: The path of the lock file, created if it does not exist.
+        blocking: False if the lock should not be waited for when another process holds it.
+
+    Returns:
+        The open lock file, to pass to release_file_lock, or None if the lock is held by another process
+        and blocking is False.
+    """
+    lock_file = open(path, 'a+')
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)  # pylint: disable=no-member
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except (IOError, OSError):
+        lock_file.close()
+        if blocking:
+            raise
+        return None
+
+    return lock_file
+
+
+def release_file_lock(lock_file):
+    """
+    Release a lock acquired with acquire_file_lock.
+
+    Args:
+        lock_file: The open lock file returned by acquire_file_lock.
+    """
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)  # pylint: disable=no-member
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    finally:
+        lock_file.close()
+
+
+def get_alias_state_lock_path(path=None):
+    """
+    Get the path of the lock file held by the process that rebuilds an alias state against the command table.
+
+    Args:
+        path: The path of the alias state file. Default: GLOBAL_ALIAS_STATE_PATH.
+    """
+    return (path or GLOBAL_ALIAS_STATE_PATH) + ALIAS_LOCK_FILE_SUFFIX
+
+
+def get_alias_state_lock_target_path(path=None):
+    """
+    Get the path of the file that contains the hash of the alias config that the holder of the alias state lock
+    rebuilds the alias state for. It is kept apart from the lock file, whose locked byte cannot be read on Windows.
+
+    Args:
+        path: The path of the alias state file. Default: GLOBAL_ALIAS_STATE_PATH.
+    """
+    return (path or GLOBAL_ALIAS_STATE_PATH) + ALIAS_STATE_LOCK_TARGET_SUFFIX
+
+
+class AliasStateStore(object):
+    """
+    The alias state file (see read_alias_state), as used by an AliasManager: the alias state read from it,
+    whether its compiled alias table is up to date with the alias config files in effect, the alias config
+    that is known to fail to parse, and the alias state lock held while rebuilding it against the command table.
+
+    self.alias_stat is the stat fingerprints of the alias config files that the AliasManager loaded
+    (see get_alias_layers_stat), and self.alias_config_error the error they failed to parse with, if they did.
+
+    Args:
+        local_alias_path: The path of the repo-local alias config file in effect, if any (see get_alias_state_path).
+    """
+
+    def __init__(self, local_alias_path=None):
+        self.path = get_alias_state_path(local_alias_path)
+        self.alias_state = read_alias_state(self.path)
+        self.alias_stat = None
+        self.alias_config_error = None
+        self.snapshot_loaded = False
+        self.lock_file = None
+        self.written = False
+
+    def __getitem__(self, key):
+        return self.alias_state[key]
+
+    def load_snapshot(self, alias_stat):
+        """
+        Get the compiled alias table of the alias state, if none of the alias config files in effect has been
+        modified since it was compiled (same files, modification time, size and inode).
+
+        Args:
+            alias_stat: The stat fingerprints of the alias config files in effect.
+
+        Returns:
+            The compiled alias table, or None if it is not up to date.
+        """
+        if not self.alias_state['compiled_alias_table'] or self.alias_state['alias_stat'] != alias_stat:
+            return None
+
+        self.alias_stat = alias_stat
+        self.snapshot_loaded = True
+        return self.alias_state['compiled_alias_table']
+
+    def load_invalid_alias_config(self, alias_stat=None, alias_config_hash=None):
+        """
+        Check if the alias config files are known to fail to parse, either because none of them has been modified
+        since they failed to parse (alias_stat), or because their content is the same (alias_config_hash).
+        In the latter case, the invalid alias config has to be written again with its new stat fingerprints.
+
+        Returns:
+            True if the alias config files are known to fail to parse. self.alias_config_error is then set.
+        """
+        invalid_alias_config = self.alias_state['invalid_alias_config']
+        if not invalid_alias_config:
+            return False
+
+        if alias_stat is not None and invalid_alias_config['alias_stat'] == alias_stat:
+            self.alias_stat = alias_stat
+            # The invalid alias config is already in the alias state
+            self.written = True
+        elif alias_config_hash is None or invalid_alias_config['alias_config_hash'] != alias_config_hash:
+            return False
+
+        self.alias_config_error = invalid_alias_config['error'] or ''
+        return True
+
+    def write(self, alias_table, alias_config_hash, alias_stat, collided_alias, tab_completion_table,
+              compiled_alias_table=None):
+        """
+        Compile the alias table and write it, along with everything else derived from the alias config files,
+        to the alias state file. Only the aliases that have been added or modified since the alias table
+        in the alias state was compiled are compiled again.
+
+        Args:
+            alias_table: The alias table to compile.
+            alias_config_hash: The hash of the alias config files that alias_table was read from.
+            alias_stat: The stat fingerprints of the alias config files that alias_table was read from,
+                as returned by get_alias_layers_stat.
+            collided_alias: The collision table of alias_table.
+            tab_completion_table: The tab completion table of alias_table.
+            compiled_alias_table: The compiled alias table of alias_table, if it is already compiled.
+        """
+        # Import here because azext_alias.alias imports this module
+        from azext_alias.alias import AliasManager
+
+        if compiled_alias_table is None:
+            compiled_alias_table = AliasManager.compile_alias_table(alias_table,
+                                                                    self.alias_state['compiled_alias_table'])
+
+        is_new_local_alias_state = self.path != GLOBAL_ALIAS_STATE_PATH and not os.path.exists(self.path)
+        write_alias_state({
+            'alias_config_hash': alias_config_hash,
+            'alias_stat': alias_stat,
+            'number_of_aliases': len(alias_table.sections()),
+            'compiled_alias_table': compiled_alias_table,
+            'collided_alias': collided_alias,
+            'collided_alias_sections': alias_table.sections(),
+            'cli_fingerprint': get_cli_fingerprint(),
+            'tab_completion_table': tab_completion_table,
+            'alias_completion_index': build_alias_completion_index(alias_table),
+            'invalid_alias_config': None
+        }, self.path)
+        self.written = True
+        if is_new_local_alias_state:
+            prune_local_alias_states()
+
+    def write_invalid_alias_config(self, alias_config_hash):
+        """
+        Remember the alias config files that failed to parse (with self.alias_config_error), so that they are not
+        parsed again until they change. An empty alias config hash is written along with them, so that the next
+        run checks the alias config files against the entire command table again once they are fixed.
+
+        Args:
+            alias_config_hash: The hash of the alias config files that failed to parse.
+        """
+        if self.written:
+            return
+
+        alias_state = dict(self.alias_state, alias_config_hash='', alias_stat=None, compiled_alias_table=None,
+                           invalid_alias_config={
+                               'alias_config_hash': alias_config_hash,
+                               'alias_stat': self.alias_stat,
+                               'error': self.alias_config_error
+                           })
+        write_alias_state(alias_state, self.path)
+        self.written = True
+
+    def acquire_lock(self, alias_config_hash):
+        """
+        Make sure that only one process rebuilds the alias state for a new alias config. The process that gets
+        the alias state lock rebuilds it. The others wait (for ALIAS_STATE_REBUILD_TIMEOUT at most) if the lock
+        is held for the same alias config, and use the collision table of the alias state otherwise; they leave
+        the alias state to the process that rebuilds it.
+
+        Args:
+            alias_config_hash: The hash of the alias config files to rebuild the alias state for.
+
+        Returns:
+            True if this process holds the alias state lock and has to rebuild the alias state.
+        """
+        lock_path = get_alias_state_lock_path(self.path)
+        lock_file = acquire_file_lock(lock_path, blocking=False)
+        if lock_file is None and self.read_lock_target() == alias_config_hash:
+            deadline = timeit.default_timer() + ALIAS_STATE_REBUILD_TIMEOUT
+            while lock_file is None and timeit.default_timer() < deadline:
+                time.sleep(ALIAS_STATE_REBUILD_POLL_INTERVAL)
+                lock_file = acquire_file_lock(lock_path, blocking=False)
+
+        if lock_file is None:
+            logger.debug(DEBUG_MSG_ALIAS_STATE_REBUILD_DEFERRED)
+            self.written = True
+            return False
+
+        # The alias state may have been rebuilt for this alias config while waiting for the lock
+        alias_state = read_alias_state(self.path)
+        if alias_state['alias_config_hash'] == alias_config_hash:
+            release_file_lock(lock_file)
+            self.alias_state = alias_state
+            self.written = True
+            return False
+
+        self.lock_file = lock_file
+        try:
+            write_file_atomically(get_alias_state_lock_target_path(self.path), alias_config_hash.encode('utf-8'))
+        except (IOError, OSError):
+            # The other processes only use the target to decide whether to wait for the alias state
+            pass
+        return True
+
+    def release_lock(self):
+        """
+        Release the alias state lock, if it is held.
+        """
+        if self.lock_file:
+            release_file_lock(self.lock_file)
+            self.lock_file = None
+
+    def read_lock_target(self):
+        """
+        Read the hash of the alias config that the holder of the alias state lock is rebuilding the alias state for.
+
+        Returns:
+            The hash, or None if it cannot be read.
+        """
+        try:
+            with open(get_alias_state_lock_target_path(self.path), 'r') as lock_target_file:
+                return lock_target_file.read()
+        except (IOError, OSError):
+            return None
+
+
 def is_alias_command(subcommands, args):
     """
     Check if the user is invoking one of the comments in 'subcommands' in the  from az alias .
@@ -72,11 +585,221 @@ def cache_reserved_commands(load_cmd_tbl_func):
     This cache saves the entire command table globally so custom.py can have access to it.
     Alter this cache through cache_reserved_commands(load_cmd_tbl_func) in util.py.
 
+    The reserved commands are also persisted to disk, so the entire command table is only loaded again
+    when the installed versions of Azure CLI or its extensions change.
+
     Args:
         load_cmd_tbl_func: The function to load the entire command table.
+
+    Returns:
+        True if the entire command table had to be loaded.
+    """
+    if azext_alias.cached_reserved_commands:
+        return False
+
+    cli_fingerprint = get_cli_fingerprint()
+    reserved_commands = read_reserved_commands(cli_fingerprint)
+    if reserved_commands:
+        azext_alias.cached_reserved_commands = reserved_commands
+        return False
+
+    azext_alias.cached_reserved_commands = list(load_cmd_tbl_func([]).keys())
+    if cli_fingerprint and azext_alias.cached_reserved_commands:
+        write_reserved_commands(cli_fingerprint, azext_alias.cached_reserved_commands)
+    return True
+
+
+def get_cli_fingerprint():
+    """
+    Get a fingerprint of the installed Azure CLI, which changes whenever the reserved commands may change.
+
+    Returns:
+        A tuple of the version of Azure CLI core and the sorted names and versions of the installed extensions,
+        or None if the fingerprint cannot be determined.
+    """
+    try:
+        from azure.cli.core import __version__ as core_version
+        from azure.cli.core.extension import get_extensions
+        return (core_version, tuple(sorted((ext.name, ext.version) for ext in get_extensions())))
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def read_reserved_commands(cli_fingerprint):
+    """
+    Read the reserved commands persisted for a given Azure CLI fingerprint.
+
+    Args:
+        cli_fingerprint: The fingerprint of the installed Azure CLI (see get_cli_fingerprint).
+
+    Returns:
+        The list of reserved commands, or None if the file is missing, corrupted or written for another fingerprint.
+    """
+    if not cli_fingerprint:
+        return None
+
+    try:
+        with open(GLOBAL_RESERVED_COMMANDS_PATH, 'rb') as reserved_commands_file:
+            reserved_commands = pickle.load(reserved_commands_file)
+        if isinstance(reserved_commands, dict) and reserved_commands.get('version') == RESERVED_COMMANDS_VERSION and \
+                reserved_commands.get('cli_fingerprint') == cli_fingerprint:
+            return reserved_commands['reserved_commands']
+    except Exception:  # pylint: disable=broad-except
+        pass
+
+    return None
+
+
+def write_reserved_commands(cli_fingerprint, reserved_commands):
+    """
+    Atomically replace the persisted reserved commands.
+
+    Args:
+        cli_fingerprint: The fingerprint of the installed Azure CLI the reserved commands were loaded from.
+        reserved_commands: The list of reserved commands.
+    """
+    try:
+        write_file_atomically(GLOBAL_RESERVED_COMMANDS_PATH, pickle.dumps({
+            'version': RESERVED_COMMANDS_VERSION,
+            'cli_fingerprint': cli_fingerprint,
+            'reserved_commands': list(reserved_commands)
+        }, pickle.HIGHEST_PROTOCOL))
+    except (IOError, OSError):
+        # Failing to persist the reserved commands only means that they will be loaded again next time
+        pass
+
+
+class ReservedCommandIndex(object):
+    """
+    Indexes of the reserved commands, so that aliases and alias commands can be validated without
+    scanning the entire list of reserved commands. Only command words made of lowercase letters and
+    dashes lead to deeper levels of the command tree.
+
+    self.words_by_level[level - 1] is the set of words that appear at a given level of the command tree.
+    For example, with ['account list-locations', 'storage account create'] as the reserved commands:
+    [{'account', 'storage'}, {'list-locations', 'account'}, {'create'}]
+
+    self.command_trie is a trie of every word-level suffix of the reserved commands:
+    {'account': {'list-locations': {}, 'create': {}}, 'list-locations': {}, 'storage': {'account': {...}}, ...}
+    so that any sequence of consecutive words in a reserved command is a path from its root.
+
+    self.reversed_commands is the sorted list of the reversed reserved commands, so that the commands
+    ending with a given string are next to each other.
+
+    self.commands_by_words maps every sequence of consecutive words in the reserved commands to the reserved
+    commands containing it, and is only built when it is first needed.
     """
-    if not azext_alias.cached_reserved_commands:
-        azext_alias.cached_reserved_commands = list(load_cmd_tbl_func([]).keys())
+
+    def __init__(self, reserved_commands):
+        self.reserved_commands = reserved_commands
+        self.commands_by_words = None
+        self.words_by_level = []
+        self.command_trie = {}
+        self.reversed_commands = sorted(command[::-1] for command in reserved_commands)
+        for command in reserved_commands:
+            words = command.split()
+            for level, word in enumerate(words):
+                if level == len(self.words_by_level):
+                    self.words_by_level.append(set())
+                self.words_by_level[level].add(word)
+
+                trie_node = self.command_trie
+                for suffix_word in words[level:]:
+                    trie_node = trie_node.setdefault(suffix_word, {})
+
+                if not re.match(r'^[a-z\-]*$', word):
+                    break
+
+    def is_reserved_word(self, word, level):
+        """
+        Check if a word is a reserved command at a given level of the command tree.
+
+        Args:
+            word: The word to check.
+            level: The level of the command tree, starting at 1.
+
+        Returns:
+            True if the word is a reserved command at the given level.
+        """
+        return level <= len(self.words_by_level) and word in self.words_by_level[level - 1]
+
+    def has_command_words(self, words):
+        """
+        Check if a sequence of words appears, consecutively, in a reserved command.
+
+        Args:
+            words: The list of words to check.
+
+        Returns:
+            True if the words appear in a reserved command, e.g. ['list-locations'] and ['account', 'list-locations']
+            both appear in 'account list-locations'.
+        """
+        if not words:
+            return False
+
+        trie_node = self.command_trie
+        for word in words:
+            if word not in trie_node:
+                return False
+            trie_node = trie_node[word]
+        return True
+
+    def has_command_ending_with(self, suffix):
+        """
+        Check if a reserved command ends with a given string.
+
+        Args:
+            suffix: The string to check.
+
+        Returns:
+            True if a reserved command ends with suffix.
+        """
+        reversed_suffix = suffix[::-1]
+        index = bisect.bisect_left(self.reversed_commands, reversed_suffix)
+        return index < len(self.reversed_commands) and self.reversed_commands[index].startswith(reversed_suffix)
+
+    def get_commands_containing(self, command):
+        """
+        Get the reserved commands that contain a given command as a sequence of whole words.
+
+        Args:
+            command: The space-delimited command to look for.
+
+        Returns:
+            The list of the reserved commands containing command, in their original order.
+        """
+        if self.commands_by_words is None:
+            self.commands_by_words = defaultdict(list)
+            for reserved_command in self.reserved_commands:
+                words = reserved_command.split()
+                subcommands = set(' '.join(words[start:end]) for start in range(len(words))
+                                  for end in range(start + 1, len(words) + 1))
+                for subcommand in subcommands:
+                    self.commands_by_words[subcommand].append(reserved_command)
+
+        return self.commands_by_words.get(command, [])
+
+
+# The reserved command index, along with the list of reserved commands it was built from
+_reserved_command_index = (None, None)
+
+
+def get_reserved_command_index():
+    """
+    Get the index of azext_alias.cached_reserved_commands, building it if cached_reserved_commands
+    has been replaced since the index was last built.
+
+    Returns:
+        The reserved command index.
+    """
+    global _reserved_command_index  # pylint: disable=global-statement
+    reserved_commands, reserved_command_index = _reserved_command_index
+    if reserved_commands is not azext_alias.cached_reserved_commands:
+        reserved_commands = azext_alias.cached_reserved_commands
+        reserved_command_index = ReservedCommandIndex(reserved_commands)
+        _reserved_command_index = (reserved_commands, reserved_command_index)
+
+    return reserved_command_index
 
 
 def remove_pos_arg_placeholders(alias_command):
@@ -119,7 +842,7 @@ def filter_aliases(alias_table):
 def build_tab_completion_table(alias_table):
     """
     Build a dictionary where the keys are all the alias commands (without positional argument placeholders)
-    and the values are all the parent commands of the keys. After that, write the table into a file.
+    and the values are all the parent commands of the keys.
     The purpose of the dictionary is to validate the alias tab completion state.
 
     For example:
@@ -134,10 +857,42 @@ def build_tab_completion_table(alias_table):
     Returns:
         The tab completion table.
     """
-    alias_commands = [t[1] for t in filter_aliases(alias_table)]
+    return _build_tab_completion_entries(set(t[1] for t in filter_aliases(alias_table)))
+
+
+def update_tab_completion_table(tab_completion_table, alias_table, changed_aliases):
+    """
+    Update the tab completion table of a previous version of an alias table. Only the commands of the changed
+    aliases are looked up in the command table; the entries of the commands that no alias points to anymore
+    are dropped.
+
+    Args:
+        tab_completion_table: The tab completion table of the previous version of alias_table.
+        alias_table: The alias table.
+        changed_aliases: The aliases that have been added or modified since the previous version of alias_table.
+
+    Returns:
+        The updated tab completion table.
+    """
+    alias_commands = set(t[1] for t in filter_aliases(alias_table))
+    changed_commands = set(remove_pos_arg_placeholders(alias_table.get(alias, 'command')) for alias in changed_aliases
+                           if alias_table.has_option(alias, 'command')) & alias_commands
+    updated_tab_completion_table = {alias_command: parent_commands
+                                    for alias_command, parent_commands in tab_completion_table.items()
+                                    if alias_command in alias_commands and alias_command not in changed_commands}
+    updated_tab_completion_table.update(_build_tab_completion_entries(changed_commands))
+    return updated_tab_completion_table
+
+
+def _build_tab_completion_entries(alias_commands):
+    """
+    Build the tab completion table entries of a set of alias commands (see build_tab_completion_table).
+    """
+    # Only the reserved commands that contain an alias command as whole words can be related to it
+    reserved_command_index = get_reserved_command_index()
     tab_completion_table = defaultdict(list)
     for alias_command in alias_commands:
-        for reserved_command in azext_alias.cached_reserved_commands:
+        for reserved_command in reserved_command_index.get_commands_containing(alias_command):
             # Check if alias_command has no parent command
             if reserved_command == alias_command or reserved_command.startswith(alias_command + ' ') \
                     and '' not in tab_completion_table[alias_command]:
@@ -149,10 +904,43 @@ def build_tab_completion_table(alias_table):
                 if parent_command not in tab_completion_table[alias_command]:
                     tab_completion_table[alias_command].append(parent_command)
 
-    with open(GLOBAL_ALIAS_TAB_COMP_TABLE_PATH, 'w') as f:
-        f.write(json.dumps(tab_completion_table))
+    return dict(tab_completion_table)
+
+
+def build_alias_completion_index(alias_table):
+    """
+    Build a sorted list of the first words of all the aliases, along with the commands (without positional
+    argument placeholders) they point to, so that the aliases starting with a given prefix can be found
+    with a binary search.
+
+    For example:
+    [('ac', 'account'), ('dns', 'network dns'), ('dns', 'network dns record-set'), ('n', 'network')]
+
+    Args:
+        alias_table: The alias table.
 
-    return tab_completion_table
+    Returns:
+        The alias completion index.
+    """
+    return sorted(filter_aliases(alias_table))
+
+
+def search_alias_completion_index(alias_completion_index, prefix):
+    """
+    Search the alias completion index for aliases that start with a given prefix.
+
+    Args:
+        alias_completion_index: The alias completion index (see build_alias_completion_index).
+        prefix: The prefix to search for.
+
+    Yield:
+        A tuple with [0] being the first word of the alias and
+        [1] being the command that the alias points to.
+    """
+    for i in range(bisect.bisect_left(alias_completion_index, (prefix,)), len(alias_completion_index)):
+        if not alias_completion_index[i][0].startswith(prefix):
+            break
+        yield alias_completion_index[i]
 
 
 def is_url(s):
@@ -191,6 +979,8 @@ def retrieve_file_from_url(url):
         The absolute path of the downloaded file.
     """
     try:
+        from six.moves.urllib.request import urlretrieve
+
         alias_source, _ = urlretrieve(url)
         # Check for HTTPError in Python 2.x
         with open(alias_source, 'r') as f:
@@ -0,0 +1,296 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Benchmark the hot paths of the alias extension against synthetic alias tables and reserved commands.
+
+Every benchmark runs in two modes:
+    cold: every in-process cache and every file derived from the alias config file is cleared before each run,
+          which is what the first az invocation after an alias change goes through.
+    warm: the benchmark runs once untimed before being timed, which is what every other az invocation goes through.
+
+The median of each benchmark is compared against the baselines in baselines.json, and the script exits with
+a non-zero code if any benchmark is slower than its baseline by more than the tolerance.
+
+Usage:
+    python scripts/benchmark/benchmark.py [--sizes 10 1000 10000 100000] [--save-baselines]
+"""
+
+from __future__ import print_function
+
+import os
+import re
+import sys
+import json
+import random
+import shutil
+import tempfile
+import argparse
+import timeit
+
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+DEFAULT_BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+GROUP_WORDS = ['account', 'acr', 'aks', 'appservice', 'batch', 'cdn', 'cosmosdb', 'disk', 'dns', 'eventhubs',
+               'functionapp', 'group', 'identity', 'image', 'iot', 'keyvault', 'lock', 'monitor', 'network',
+               'policy', 'redis', 'resource', 'role', 'servicebus', 'sql', 'storage', 'tag', 'vm', 'vmss', 'webapp']
+SUBGROUP_WORDS = ['blob', 'container', 'deployment', 'diagnostic-settings', 'extension', 'firewall-rule', 'nic',
+                  'nsg', 'plan', 'public-ip', 'queue', 'record-set', 'rule', 'secret', 'share', 'slot', 'subnet',
+                  'user', 'vnet', 'zone']
+VERB_WORDS = ['create', 'delete', 'list', 'show', 'update', 'wait', 'start', 'stop', 'restart', 'add', 'remove']
+
+
+def generate_reserved_commands(number_of_commands, seed=0):
+    """
+    Generate a list of unique synthetic reserved commands, one to three levels deep below their command group.
+    """
+    rand = random.Random(seed)
+    reserved_commands = set()
+    while len(reserved_commands) < number_of_commands:
+        words = [rand.choice(GROUP_WORDS) + str(rand.randint(0, number_of_commands // 100))]
+        words += [rand.choice(SUBGROUP_WORDS) for _ in range(rand.randint(0, 2))]
+        words.append(rand.choice(VERB_WORDS))
+        reserved_commands.add(' '.join(words))
+    return sorted(reserved_commands)
+
+
+def generate_alias_config(number_of_aliases, reserved_commands, seed=0):
+    """
+    Generate an alias config file with plain aliases, aliases with named arguments
+    and aliases with positional arguments, all pointing to reserved commands.
+    """
+    rand = random.Random(seed)
+    sections = []
+    for i in range(number_of_aliases):
+        command = rand.choice(reserved_commands)
+        kind = i % 3
+        if kind == 0:
+            sections.append('[a{}]\ncommand = {}\n'.format(i, command))
+        elif kind == 1:
+            sections.append('[a{}]\ncommand = {} -g test-group -o table\n'.format(i, command))
+        else:
+            sections.append('[a{} {{{{ name }}}} {{{{ url }}}}]\ncommand = {} -n {{{{ name }}}} '
+                            '--account {{{{ url.split(".")[0] }}}}\n'.format(i, command))
+    return '\n'.join(sections)
+
+
+class BenchmarkContext(object):  # pylint: disable=too-few-public-methods
+    """
+    The synthetic alias config file and reserved commands that a set of benchmarks runs against.
+    """
+
+    def __init__(self, config_dir, number_of_aliases, reserved_commands):
+        import azext_alias
+        from azext_alias.alias import GLOBAL_ALIAS_PATH
+        from azext_alias.util import get_alias_table
+
+        self.config_dir = config_dir
+        self.number_of_aliases = number_of_aliases
+        self.reserved_commands = reserved_commands
+        azext_alias.cached_reserved_commands = reserved_commands
+        with open(GLOBAL_ALIAS_PATH, 'w') as alias_config_file:
+            alias_config_file.write(generate_alias_config(number_of_aliases, reserved_commands))
+        self.alias_table = get_alias_table()
+        self.aliases = self.alias_table.sections()
+        self.plain_alias = self.aliases[0]
+        self.pos_arg_alias = next((alias for alias in self.aliases if '{{' in alias), None)
+
+    def clear_caches(self):
+        """
+        Clear every in-process cache and every file derived from the alias config file.
+        """
+        import azext_alias
+        from azext_alias import argument, util
+
+        re.purge()
+        argument._jinja_env = None  # pylint: disable=protected-access
+        util._reserved_command_index = (None, None)  # pylint: disable=protected-access
+        azext_alias.cached_reserved_commands = list(self.reserved_commands)
+        for name in os.listdir(self.config_dir):
+            if name != 'alias':
+                path = os.path.join(self.config_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+
+
+def benchmark_transform(context):
+    from azext_alias.alias import AliasManager
+
+    args = [context.plain_alias, '--debug']
+    if context.pos_arg_alias:
+        args = [context.pos_arg_alias.split()[0], 'test-name', 'account.blob.core.windows.net']
+    # Like az, pass the command table loader, without which the alias state is not written (the reserved commands
+    # are already cached, so it is never called)
+    AliasManager(load_cmd_tbl_func=lambda _: {}).transform(args)
+
+
+def benchmark_get_placeholders(context):
+    from azext_alias.argument import get_placeholders
+
+    for alias in context.aliases:
+        get_placeholders(alias, check_duplicates=True)
+
+
+def benchmark_render_template(context):
+    from azext_alias.argument import render_template
+
+    for alias in context.aliases[2:1000:3]:
+        render_template(context.alias_table.get(alias, 'command'), {'name': 'test-name', 'url': 'account.blob'})
+
+
+def benchmark_build_collision_table(context):
+    from azext_alias.alias import AliasManager
+
+    AliasManager.build_collision_table(context.aliases)
+
+
+def benchmark_build_tab_completion_table(context):
+    from azext_alias.util import build_tab_completion_table
+
+    build_tab_completion_table(context.alias_table)
+
+
+def benchmark_enable_aliases_autocomplete(context):  # pylint: disable=unused-argument
+    from azext_alias.hooks import enable_aliases_autocomplete
+
+    enable_aliases_autocomplete(None, external_completions=[], cword_prefix='a1', comp_words=['az'])
+
+
+def benchmark_validate_aliases_in_process(context):
+    from azext_alias._validators import validate_aliases
+    from azext_alias.util import reduce_alias_table
+
+    validate_aliases(reduce_alias_table(context.alias_table), pool_threshold=float('inf'))
+
+
+def benchmark_validate_aliases_pool(context):
+    from azext_alias._validators import validate_aliases
+    from azext_alias.util import reduce_alias_table
+
+    validate_aliases(reduce_alias_table(context.alias_table), pool_threshold=0)
+
+
+def prepare_enable_aliases_autocomplete(context):
+    from azext_alias.alias import get_alias_layers_stat
+    from azext_alias.util import build_tab_completion_table, AliasStateStore
+
+    # The alias state is written by the az invocation (or alias command) that follows an alias change
+    AliasStateStore().write(context.alias_table, '', get_alias_layers_stat(), {},
+                            build_tab_completion_table(context.alias_table))
+
+
+# (name, function, preparation run after clearing caches in cold mode)
+BENCHMARKS = [
+    ('transform', benchmark_transform, None),
+    ('get_placeholders', benchmark_get_placeholders, None),
+    ('render_template', benchmark_render_template, None),
+    ('build_collision_table', benchmark_build_collision_table, None),
+    ('build_tab_completion_table', benchmark_build_tab_completion_table, None),
+    ('enable_aliases_autocomplete', benchmark_enable_aliases_autocomplete, prepare_enable_aliases_autocomplete),
+    # Compared to find the number of aliases from which a pool of worker processes validates them faster
+    ('validate_aliases_in_process', benchmark_validate_aliases_in_process, None),
+    ('validate_aliases_pool', benchmark_validate_aliases_pool, None)
+]
+
+
+def run_benchmark(context, func, prepare, mode, repeat):
+    """
+    Run a benchmark repeatedly.
+
+    Returns:
+        The median running time in milliseconds.
+    """
+    timings = []
+    if mode == 'warm':
+        context.clear_caches()
+        if prepare:
+            prepare(context)
+        func(context)
+
+    for _ in range(repeat):
+        if mode == 'cold':
+            context.clear_caches()
+            if prepare:
+                prepare(context)
+        start_time = timeit.default_timer()
+        func(context)
+        timings.append((timeit.default_timer() - start_time) * 1000)
+
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of the alias extension.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='the numbers of aliases')
+    parser.add_argument('--reserved-commands', type=int, default=3000, help='the number of reserved commands')
+    parser.add_argument('--benchmarks', nargs='+', choices=[name for name, _, _ in BENCHMARKS],
+                        help='the benchmarks to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of timed runs per benchmark')
+    parser.add_argument('--baselines', default=DEFAULT_BASELINES_PATH, help='the path of the baselines file')
+    parser.add_argument('--save-baselines', action='store_true', help='save the results as the new baselines')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='the fraction by which a benchmark may exceed its baseline before it is a regression')
+    args = parser.parse_args()
+
+    config_dir = tempfile.mkdtemp()
+    # The alias extension resolves its file paths from the CLI config directory on import
+    os.environ['AZURE_CONFIG_DIR'] = config_dir
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+    baselines = {}
+    if os.path.isfile(args.baselines):
+        with open(args.baselines, 'r') as baselines_file:
+            baselines = json.load(baselines_file)
+
+    results = {}
+    regressions = []
+    missing_baselines = []
+    reserved_commands = generate_reserved_commands(args.reserved_commands)
+    try:
+        print('{:<30} {:>8} {:>5} {:>12} {:>12}'.format('benchmark', 'aliases', 'mode', 'median (ms)', 'baseline'))
+        for size in args.sizes:
+            context = BenchmarkContext(config_dir, size, reserved_commands)
+            for name, func, prepare in BENCHMARKS:
+                if args.benchmarks and name not in args.benchmarks:
+                    continue
+                for mode in ['cold', 'warm']:
+                    key = '{}/{}/{}'.format(name, size, mode)
+                    results[key] = round(run_benchmark(context, func, prepare, mode, args.repeat), 3)
+                    baseline = baselines.get(key)
+                    # Ignore sub-millisecond differences, which are mostly noise
+                    is_regression = baseline is not None and results[key] > baseline * (1 + args.tolerance) and \
+                        results[key] - baseline > 1
+                    if is_regression:
+                        regressions.append(key)
+                    if baseline is None:
+                        missing_baselines.append(key)
+                    print('{:<30} {:>8} {:>5} {:>12.3f} {:>12}{}'.format(
+                        name, size, mode, results[key], '-' if baseline is None else '{:.3f}'.format(baseline),
+                        '  REGRESSION' if is_regression else ''))
+    finally:
+        shutil.rmtree(config_dir)
+
+    if args.save_baselines:
+        baselines.update(results)
+        with open(args.baselines, 'w') as baselines_file:
+            json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+            baselines_file.write('\n')
+        print('Baselines saved to {}'.format(args.baselines))
+        return
+
+    if missing_baselines:
+        print('{} benchmark(s) have no baseline, run with --save-baselines to record them: {}'.format(
+            len(missing_baselines), ', '.join(missing_baselines)))
+    if regressions:
+        print('{} benchmark(s) regressed by more than {:.0%}: {}'.format(
+            len(regressions), args.tolerance, ', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Measure the latency of alias tab completion against a synthetic alias table.
+
+Usage:
+    python scripts/benchmark/completion_latency.py [--aliases 5000] [--iterations 50]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+import argparse
+import timeit
+
+RESERVED_COMMANDS = [
+    'account list-locations',
+    'group create',
+    'group delete',
+    'network dns zone create',
+    'storage account create',
+    'vm create',
+    'vm list'
+]
+
+# The pairs of (comp_words, cword_prefix) which simulate TAB keypresses
+COMPLETION_REQUESTS = [
+    (['az'], ''),
+    (['az'], 'a'),
+    (['az'], 'alias42'),
+    (['az', 'group'], ''),
+    (['az', 'network', 'dns'], 'z')
+]
+
+
+def write_alias_file(alias_path, number_of_aliases):
+    with open(alias_path, 'w') as alias_file:
+        for i in range(number_of_aliases):
+            command = RESERVED_COMMANDS[i % len(RESERVED_COMMANDS)]
+            if i % 3:
+                alias_file.write('[alias{}]\ncommand = {}\n\n'.format(i, command))
+            else:
+                alias_file.write('[alias{} {{{{ arg }}}}]\ncommand = {} -n {{{{ arg }}}}\n\n'.format(i, command))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark alias tab completion.')
+    parser.add_argument('--aliases', type=int, default=5000, help='the number of synthetic aliases')
+    parser.add_argument('--iterations', type=int, default=50, help='the number of runs per completion request')
+    args = parser.parse_args()
+
+    config_dir = tempfile.mkdtemp()
+    # The alias extension resolves its file paths from the CLI config directory on import
+    os.environ['AZURE_CONFIG_DIR'] = config_dir
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+    try:
+        import azext_alias
+        from azext_alias.alias import GLOBAL_ALIAS_PATH, get_alias_layers_stat
+        from azext_alias.hooks import enable_aliases_autocomplete
+        from azext_alias.util import build_tab_completion_table, get_alias_table, AliasStateStore
+
+        azext_alias.cached_reserved_commands = RESERVED_COMMANDS
+        write_alias_file(GLOBAL_ALIAS_PATH, args.aliases)
+        alias_table = get_alias_table()
+        AliasStateStore().write(alias_table, '', get_alias_layers_stat(), {}, build_tab_completion_table(alias_table))
+
+        print('{} aliases, {} iterations per request'.format(args.aliases, args.iterations))
+        for comp_words, cword_prefix in COMPLETION_REQUESTS:
+            timings = []
+            for _ in range(args.iterations):
+                external_completions = []
+                start_time = timeit.default_timer()
+                enable_aliases_autocomplete(None, external_completions=external_completions,
+                                            cword_prefix=cword_prefix, comp_words=list(comp_words))
+                timings.append((timeit.default_timer() - start_time) * 1000)
+            timings.sort()
+            print('{:<30} {:>6} completions  median {:8.3f}ms  max {:8.3f}ms'.format(
+                '"{}" + "{}"'.format(' '.join(comp_words), cword_prefix), len(external_completions),
+                timings[len(timings) // 2], timings[-1]))
+    finally:
+        shutil.rmtree(config_dir)
+
+
+if __name__ == '__main__':
+    main()